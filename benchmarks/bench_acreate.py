@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Compare creating hosts with params transforms doing I/O (simulated with a
+sleep) with the normal instantiation (blocking transforms) and with
+_acreate/acreate_all (coroutine transforms awaited concurrently)'''
+import asyncio
+import time
+import timeit
+
+from metaparams import ParamsBase
+from metaparams.aio import acreate_all
+
+DELAY = 0.005  # cost of the I/O of each transform
+HOSTS = 50
+
+
+def resolve(value):
+    time.sleep(DELAY)
+    return value.upper()
+
+
+async def aresolve(value):
+    await asyncio.sleep(DELAY)
+    return value.upper()
+
+
+class Sync(ParamsBase):
+    params = dict(symbol=dict(value='', transform=resolve),
+                  market=dict(value='', transform=resolve))
+
+
+class Async(ParamsBase):
+    params = dict(symbol=dict(value='', transform=aresolve),
+                  market=dict(value='', transform=aresolve))
+
+
+KWARGS = [dict(symbol=str(i), market='m') for i in range(HOSTS)]
+
+
+def sync():
+    return [Sync(**kwargs) for kwargs in KWARGS]
+
+
+async def one_by_one():
+    return [await Async._acreate(**kwargs) for kwargs in KWARGS]
+
+
+def concurrent(limit):
+    return asyncio.run(acreate_all(Async, KWARGS, limit))
+
+
+if __name__ == '__main__':
+    t = timeit.timeit('sync()', globals=globals(), number=1)
+    print('sync              : {:.3f}s'.format(t))
+    t = timeit.timeit('asyncio.run(one_by_one())', globals=globals(),
+                      number=1)
+    print('_acreate (one/one): {:.3f}s'.format(t))
+    for limit in (8, 32):
+        t = timeit.timeit('concurrent(limit)', globals=globals(), number=1)
+        print('acreate_all ({:>2})  : {:.3f}s'.format(limit, t))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Time the creation of many ParamsBase subclasses without the definitions
+cache, with a cold cache and with a warm cache (each in a fresh process)'''
+import os
+import subprocess
+import sys
+import tempfile
+
+NCLASSES = 3000
+NPARAMS = 10
+
+CODE = '''
+import time
+from metaparams import ParamsBase, MetaParams
+
+t0 = time.perf_counter()
+for i in range({ncls}):
+    params = {{
+        'p%d' % j: dict(value=j, type=int,
+                        doc='Documentation for param %d of class %d' % (j, i))
+        for j in range({npar})
+    }}
+    MetaParams('C%d' % i, (ParamsBase,), dict(params=params))
+
+print(time.perf_counter() - t0)
+'''.format(ncls=NCLASSES, npar=NPARAMS)
+
+
+def run(cachedir=None):
+    env = dict(os.environ)
+    env.pop('METAPARAMS_CACHE', None)
+    if cachedir:
+        env['METAPARAMS_CACHE'] = cachedir
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    env['PYTHONPATH'] = os.path.join(here, '..')
+    out = subprocess.check_output([sys.executable, '-c', CODE], env=env)
+    return float(out)
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmpdir:
+        nocache = run()
+        cold = run(tmpdir)
+        warm = run(tmpdir)
+
+    print('{} classes x {} params'.format(NCLASSES, NPARAMS))
+    print('no cache  : {:.3f}s'.format(nocache))
+    print('cold cache: {:.3f}s'.format(cold))
+    print('warm cache: {:.3f}s ({:.0%} saved)'.format(
+        warm, 1.0 - warm / nocache))
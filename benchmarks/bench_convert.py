@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Compare loading params from csv converting cell by cell and by columns'''
+import csv
+import io
+import timeit
+
+from metaparams import ParamsBase, convert
+
+NROWS = 200000
+
+
+class Strategy(ParamsBase):
+    params = dict(
+        period=dict(value=10, type=int),
+        factor=dict(value=0.5, type=float),
+        flag=dict(value=False, type=bool),
+        mode=dict(value='fast', choices=['fast', 'slow']),
+    )
+
+
+DATA = 'period,factor,flag,mode\n' + ''.join(
+    '{},{},{},{}\n'.format(i % 50, i / 7.0, i % 2, ('fast', 'slow')[i % 2])
+    for i in range(NROWS))
+
+
+def by_cell():
+    pcls = Strategy.params
+    conv = convert.converters(pcls)
+    reader = csv.reader(io.StringIO(DATA))
+    header = next(reader)
+    return [pcls(**{k: conv[k](v) for k, v in zip(header, row)})
+            for row in reader]
+
+
+def by_column():
+    return convert.from_csv(Strategy, io.StringIO(DATA))
+
+
+if __name__ == '__main__':
+    t = timeit.timeit('by_cell()', globals=globals(), number=1)
+    print('cell by cell: {:.3f}s'.format(t))
+    t = timeit.timeit('by_column()', globals=globals(), number=1)
+    print('by columns  : {:.3f}s'.format(t))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Compare classes created by the decorator by subclassing (default) and by
+recreating them in place (``_pinplace=True``)'''
+import timeit
+
+from metaparams import metaparams
+
+NUMBER = 1000000
+
+
+class Base:
+    attr = 'base'
+
+    def method(self):
+        return self.attr
+
+
+def make(inplace):
+    @metaparams(_pinplace=inplace)
+    class A(Base):
+        params = dict(p1=1, p2=2)
+
+    return A
+
+
+if __name__ == '__main__':
+    metas = set()
+    for inplace in (False, True):
+        A = make(inplace)
+        metas.add(type(A))
+        a = A()
+        title = 'inplace' if inplace else 'subclass'
+        print('{} (mro length: {})'.format(title, len(A.__mro__)))
+        t = timeit.timeit('a.attr', globals=globals(), number=NUMBER)
+        print('  class attribute : {:.3f}s'.format(t))
+        t = timeit.timeit('a.method()', globals=globals(), number=NUMBER)
+        print('  method call     : {:.3f}s'.format(t))
+        t = timeit.timeit('A()', globals=globals(), number=NUMBER // 10)
+        print('  instantiation   : {:.3f}s (x{})'.format(t, NUMBER // 10))
+
+    for i in range(1000):
+        metas.add(type(make(i % 2)))
+
+    print('metaclasses for 1002 decorated classes:', len(metas))
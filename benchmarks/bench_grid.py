@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Compare enumerating the valid combinations of constrained params by
+building the params for the whole product of the values (rejecting the
+invalid ones) and with search.grid'''
+import itertools
+import timeit
+
+from metaparams import ParamsBase
+from metaparams.search import grid, space
+
+
+class Host(ParamsBase):
+    params = dict(
+        fast=dict(value=5, range=(1, 30), constraints=('<', 'mid')),
+        mid=dict(value=20, range=(1, 30), constraints=('<', 'slow')),
+        slow=dict(value=50, range=(1, 30)),
+        long_=dict(value=100, range=(1, 30), constraints=('>=', 'slow')),
+    )
+
+
+def reject():
+    # what is done without grid: build the params, drop the invalid ones
+    dims = space(Host)
+    names = [d.name for d in dims]
+    out = []
+    for combo in itertools.product(*(d.values() for d in dims)):
+        values = dict(zip(names, combo))
+        try:
+            Host.params(**values)
+        except ValueError:
+            continue
+
+        out.append(values)
+
+    return out
+
+
+def pruned():
+    return list(grid(Host))
+
+
+if __name__ == '__main__':
+    total = 30 ** 4
+    print('product: {}, valid: {}'.format(total, len(pruned())))
+    t = timeit.timeit('reject()', globals=globals(), number=1)
+    print('generate + reject: {:.3f}s'.format(t))
+    t = timeit.timeit('pruned()', globals=globals(), number=1)
+    print('grid (pruned)    : {:.3f}s'.format(t))
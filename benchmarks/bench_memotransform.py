@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Compare instantiating params with expensive transforms (date parsing,
+regex compilation) applied to a few repeated values, with and without the
+"memoize" definition entry'''
+import datetime
+import re
+import timeit
+
+from metaparams import ParamsBase
+
+NUMBER = 20000
+DATES = ['2020-01-{:02d} 10:00:00'.format(i) for i in range(1, 11)]
+PATTERNS = [r'^[A-Z]{{3}}{}$'.format(i) for i in range(10)]
+
+
+def todate(s):
+    return datetime.datetime.strptime(s, '%Y-%m-%d %H:%M:%S')
+
+
+def torx(s):
+    re.purge()  # do not use the cache of re
+    return re.compile(s)
+
+
+class Plain(ParamsBase):
+    params = dict(start=dict(value=None, transform=todate),
+                  pattern=dict(value=None, transform=torx))
+
+
+class Memo(ParamsBase):
+    params = dict(start=dict(value=None, transform=todate, memoize=True),
+                  pattern=dict(value=None, transform=torx, memoize=True))
+
+
+def run(cls):
+    for i in range(NUMBER):
+        cls(start=DATES[i % 10], pattern=PATTERNS[i % 10])
+
+
+if __name__ == '__main__':
+    t = timeit.timeit('run(Plain)', globals=globals(), number=1)
+    print('plain   : {:.3f}s'.format(t))
+    t = timeit.timeit('run(Memo)', globals=globals(), number=1)
+    print('memoize : {:.3f}s'.format(t))
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Compare a wide params class with prefixed names against the same params
+split in nested sections, creating hosts which change one value of one
+section and read it'''
+import timeit
+
+from metaparams import ParamsBase
+
+NUMBER = 20000
+SECTIONS = ('sizer', 'broker', 'feed')
+NPARAMS = 20
+
+
+class Flat(ParamsBase):
+    params = {'{}_p{}'.format(s, i): i
+              for s in SECTIONS for i in range(NPARAMS)}
+
+
+def section(name):
+    return type(name, (ParamsBase,), {
+        'params': {'p{}'.format(i): i for i in range(NPARAMS)}})
+
+
+class Nested(ParamsBase):
+    params = {s: section(s).params for s in SECTIONS}
+
+
+def flat():
+    return Flat(sizer_p1=5).p.sizer_p1
+
+
+def nested():
+    return Nested(**{'sizer.p1': 5}).p.sizer.p1
+
+
+if __name__ == '__main__':
+    t = timeit.timeit('flat()', globals=globals(), number=NUMBER)
+    print('flat (60 params)    : {:.3f}s'.format(t))
+    t = timeit.timeit('nested()', globals=globals(), number=NUMBER)
+    print('nested (3 x 20)     : {:.3f}s'.format(t))
+    t = timeit.timeit('Nested().p.feed.p1', globals=globals(), number=NUMBER)
+    print('nested, all defaults: {:.3f}s'.format(t))
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Compare reading params through the instance copies (``_pinst=True``), the
+class level accessors (``_pinst='live'``) and the params instance'''
+import timeit
+
+from metaparams import ParamsBase
+
+NUMBER = 2000000
+
+
+class A(ParamsBase, _pinst=True):
+    params = {'p{}'.format(i): i for i in range(10)}
+
+
+class B(ParamsBase, _pinst='live'):
+    params = {'p{}'.format(i): i for i in range(10)}
+
+
+if __name__ == '__main__':
+    a, b = A(), B()
+    tests = [
+        ('copy:  a.p_p5', 'a.p_p5'),
+        ('live:  b.p_p5', 'b.p_p5'),
+        ('short: b.p.p5', 'b.p.p5'),
+        ('copy:  A()', 'A()'),
+        ('live:  B()', 'B()'),
+    ]
+    for title, stmt in tests:
+        number = NUMBER if '()' not in stmt else NUMBER // 20
+        t = timeit.timeit(stmt, globals=globals(), number=number)
+        print('{}: {:.3f}s (x{})'.format(title, t, number))
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Compare the instantiation of short-lived hosts with and without a pool'''
+import timeit
+
+from metaparams import ParamsBase
+
+NUMBER = 200000
+
+
+class A(ParamsBase):
+    params = {'p{}'.format(i): i for i in range(10)}
+
+
+class B(ParamsBase, _ppool=16):
+    params = {'p{}'.format(i): i for i in range(10)}
+
+
+if __name__ == '__main__':
+    t = timeit.timeit('A(p1=5)', globals=globals(), number=NUMBER)
+    print('create and discard: {:.3f}s'.format(t))
+    t = timeit.timeit('B._release(B(p1=5))', globals=globals(), number=NUMBER)
+    print('pooled            : {:.3f}s'.format(t))
+    print('pool stats        :', B._poolstats())
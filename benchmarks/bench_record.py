@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Compare reading the params in an inner loop through the host instance and
+unpacking a record, and time the bulk conversions'''
+import timeit
+
+from metaparams import ParamsBase, record
+
+NUMBER = 1000
+
+
+class Host(ParamsBase):
+    params = dict(a=1, b=2.0, c=3, d=4.0)
+
+
+host = Host()
+rec = record.to_record(host.p)
+hosts = [Host(a=i).p for i in range(1000)]
+
+
+def attrs(xs):
+    out = 0.0
+    for x in xs:
+        out += host.p.a * x + host.p.b + host.p.c * x + host.p.d
+    return out
+
+
+def unpack(xs):
+    a, b, c, d = rec
+    out = 0.0
+    for x in xs:
+        out += a * x + b + c * x + d
+    return out
+
+
+XS = list(range(1000))
+
+
+if __name__ == '__main__':
+    t = timeit.timeit('attrs(XS)', globals=globals(), number=NUMBER)
+    print('host.p.x     : {:.3f}s'.format(t))
+    t = timeit.timeit('unpack(XS)', globals=globals(), number=NUMBER)
+    print('record unpack: {:.3f}s'.format(t))
+    t = timeit.timeit('record.from_records(Host, record.to_records(hosts))',
+                      globals=globals(), number=100)
+    print('bulk 1000 x 100 (to + from): {:.3f}s'.format(t))
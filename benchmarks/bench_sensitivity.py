@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Compare evaluating every perturbation one after the other with the
+Sensitivity engine (process pool, identical configurations evaluated once)
+for an objective taking 20ms'''
+import time
+
+from metaparams import ParamsBase
+from metaparams.sensitivity import Sensitivity
+
+WORKERS = 4
+
+
+class Host(ParamsBase):
+    params = dict(
+        {'p{}'.format(i): dict(value=10, type=int) for i in range(8)},
+        mode=dict(value='a', choices=['a', 'b']),
+        # only used by mode "b": moving them does not change anything
+        **{'b{}'.format(i): dict(value=1.0, irrelevant=dict(mode='a'))
+           for i in range(8)}
+    )
+
+
+def objective(params):
+    time.sleep(0.02)
+    return params.p0 + params.p1
+
+
+if __name__ == '__main__':
+    sens = Sensitivity(Host, objective)
+    candidates = list(sens.candidates())
+    t0 = time.perf_counter()
+    for _, _, params in candidates:
+        objective(params)
+    t = time.perf_counter() - t0
+    print('serial ({} evaluations): {:.3f}s'.format(len(candidates), t))
+
+    sens = Sensitivity(Host, objective, workers=WORKERS)
+    t0 = time.perf_counter()
+    rows = list(sens.run())
+    t = time.perf_counter() - t0
+    print('engine ({} evaluations, {} rows, {} workers): {:.3f}s'.format(
+        sens.evaluations, len(rows), WORKERS, t))
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Compare creating variants of a host class with other defaults by
+subclassing and with _specialize'''
+import timeit
+
+from metaparams import ParamsBase
+
+NUMBER = 2000
+
+
+class Host(ParamsBase):
+    params = {'p{}'.format(i): dict(value=i, doc='param {}'.format(i))
+              for i in range(20)}
+
+
+def subclass(i):
+    class Variant(Host):
+        params = dict(p1=i)
+
+    return Variant
+
+
+if __name__ == '__main__':
+    t = timeit.timeit('subclass(1)', globals=globals(), number=NUMBER)
+    print('subclass          : {:.3f}s'.format(t))
+    t = timeit.timeit('for i in range(NUMBER): Host._specialize(p1=i)',
+                      globals=globals(), number=1)
+    print('specialize (new)  : {:.3f}s'.format(t))
+    t = timeit.timeit('Host._specialize(p1=1)', globals=globals(),
+                      number=NUMBER)
+    print('specialize (again): {:.3f}s'.format(t))
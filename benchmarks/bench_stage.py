@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Compare a sweep over the params of the last stage of a pipeline with
+memoize (keyed by all the params) and with stage (keyed by the params read
+by each stage)'''
+import time
+import timeit
+
+from metaparams import ParamsBase
+from metaparams.memo import memoize, stage
+
+DELAY = 0.01  # cost of each stage
+PERIODS = range(5)
+STAKES = range(20)
+
+
+class Memo(ParamsBase):
+    params = dict(period=10, stake=1)
+
+    @memoize(maxsize=1000)
+    def indicator(self):
+        time.sleep(DELAY)
+        return self.p.period * 2
+
+    @memoize(maxsize=1000)
+    def execution(self):
+        time.sleep(DELAY)
+        return self.indicator() * self.p.stake
+
+
+class Staged(ParamsBase):
+    params = dict(period=10, stake=1)
+
+    @stage('period', maxsize=1000)
+    def indicator(self):
+        time.sleep(DELAY)
+        return self.p.period * 2
+
+    @stage(maxsize=1000)
+    def execution(self):
+        time.sleep(DELAY)
+        return self.indicator() * self.p.stake
+
+
+def sweep(cls):
+    for period in PERIODS:
+        for stake in STAKES:
+            cls(period=period, stake=stake).execution()
+
+
+if __name__ == '__main__':
+    t = timeit.timeit('sweep(Memo)', globals=globals(), number=1)
+    print('memoize: {:.3f}s'.format(t))
+    t = timeit.timeit('sweep(Staged)', globals=globals(), number=1)
+    print('stage  : {:.3f}s'.format(t))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Throughput of class creation (host classes with params) from 1 and from
+32 threads'''
+import threading
+import time
+
+from metaparams import ParamsBase
+
+NUMBER = 6400
+
+DECL = {'p{}'.format(i): dict(value=i, doc='param {}'.format(i))
+        for i in range(10)}
+
+
+class Base(ParamsBase):
+    params = dict(x=1)
+
+
+def create(n):
+    for _ in range(n):
+        class Host(Base):
+            params = DECL
+
+
+def run(nthreads):
+    threads = [threading.Thread(target=create, args=(NUMBER // nthreads,))
+               for _ in range(nthreads)]
+    t0 = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+
+    return NUMBER / (time.perf_counter() - t0)
+
+
+if __name__ == '__main__':
+    for nthreads in (1, 32):
+        print('{:2} threads: {:.0f} classes/s'.format(nthreads, run(nthreads)))
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Time the introspection of params done on every event by logging and
+caching layers: _kwargs, _values, str and the defaults, and the cost of the
+writes which invalidate the cached _kwargs'''
+import timeit
+
+from metaparams import ParamsBase
+
+NUMBER = 200000
+
+
+class Host(ParamsBase):
+    params = {'p{}'.format(i): i for i in range(20)}
+
+
+host = Host()
+p = host.p
+view = p._view()
+
+if __name__ == '__main__':
+    for stmt in ('p._kwargs()', 'tuple(p._values())', 'str(p)',
+                 'p._defkwargs()', 'p._defview()', 'view.values()',
+                 'p.p1 = 5', 'p._update(p1=5, p2=6)', 'p._reset()'):
+        t = timeit.timeit(stmt, globals=globals(), number=NUMBER)
+        print('{:20}: {:.3f}s'.format(stmt, t))
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Asynchronous creation of host instances, for params with transforms which
+do I/O (resolving symbols, fetching metadata ...).
+
+A ``transform`` may be a coroutine function (or return an awaitable). The
+awaitables of all the params are run concurrently (at most ``limit`` at the
+same time) and the results are set without transforming them again. Plain
+transforms are applied as during a normal instantiation. A normal (synchronous)
+instantiation raises ``TypeError`` if a transform returns an awaitable::
+
+    class Host(ParamsBase):
+        params = dict(symbol=dict(value='', transform=resolve))  # async def
+
+    host = await Host._acreate(symbol='abc')
+    hosts = await aio.acreate_all(Host, [dict(symbol=s) for s in symbols],
+                                  limit=16)
+'''
+import asyncio
+import inspect
+
+from .metaparams import (PSETTING, KWARG_PNAME, KWARG_PPARAMS, PARAMS,
+                         CONSTRAINTS, NESTED, NAME_REQUIRED, NAME_VAL,
+                         NAME_TYPE, NAME_TRANSFORM, _build, _ERR_REQ,
+                         _ERR_TYPE, _ERR_TR)
+
+__all__ = ['AIO_LIMIT', 'aparams', 'acreate', 'acreate_all']
+
+AIO_LIMIT = 8  # default max number of transforms awaited at the same time
+
+
+def _pcls(cls):
+    if cls in PSETTING:
+        return getattr(cls, PSETTING[cls][KWARG_PNAME])
+
+    return cls
+
+
+def _semaphore(limit):
+    if isinstance(limit, asyncio.Semaphore):
+        return limit
+
+    return asyncio.Semaphore(AIO_LIMIT if limit is None else limit)
+
+
+async def _identity(aw):
+    return await aw
+
+
+def _discard(aw):
+    '''Disposes of the awaitable ``aw`` which will not be awaited'''
+    if inspect.iscoroutine(aw):
+        aw.close()
+    else:
+        asyncio.ensure_future(aw).cancel()
+
+
+async def _await(sem, clsname, name, value, tr):
+    async with sem:
+        try:
+            return await tr(value)
+        except Exception:
+            raise ValueError(_ERR_TR.format(name, value, clsname))
+
+
+async def aparams(cls, kwargs, limit=None):
+    '''Returns an instance of the params class of ``cls`` (params or host
+    class) created with the values in ``kwargs``, awaiting the asynchronous
+    transforms concurrently. ``limit`` is the max number of transforms
+    awaited at the same time or an ``asyncio.Semaphore`` shared with other
+    calls. The checks are the same as during a normal instantiation'''
+    pcls = _pcls(cls)
+    clsname = pcls.__name__
+    if pcls in NESTED:  # fold "nested.name" kwargs
+        from . import nested  # not at the top, nested imports this module
+        kwargs = nested.fold(pcls, kwargs)
+
+    values, pending = {}, []  # pending: (name, value, transform) to await
+    try:
+        for name, pdef in PARAMS[pcls].items():
+            if name not in kwargs:
+                if pdef[NAME_REQUIRED]:
+                    raise ValueError(_ERR_REQ.format(name, clsname))
+
+                values[name] = pdef[NAME_VAL]
+                continue
+
+            value = kwargs[name]
+            t = pdef[NAME_TYPE]
+            if t and not isinstance(value, t):
+                errmsg = _ERR_TYPE.format(type(value), name, t, clsname)
+                raise TypeError(errmsg)
+
+            tr = pdef[NAME_TRANSFORM]
+            if tr:
+                if inspect.iscoroutinefunction(tr):
+                    pending.append((name, value, tr))
+                    continue
+
+                try:
+                    value = tr(value)
+                except Exception:
+                    raise ValueError(_ERR_TR.format(name, value, clsname))
+
+                if inspect.isawaitable(value):  # plain function returning one
+                    pending.append((name, value, _identity))
+                    continue
+
+            values[name] = value
+    except Exception:  # the awaitables already returned are not awaited
+        for _, value, tr in pending:
+            if tr is _identity:
+                _discard(value)
+
+        raise
+
+    if pending:  # all checked, no coroutine is left unawaited on errors
+        sem = _semaphore(limit)
+        results = await asyncio.gather(*[
+            _await(sem, clsname, name, value, tr)
+            for name, value, tr in pending
+        ])
+        values.update(zip([name for name, _, _ in pending], results))
+
+    params = _build(pcls, values)
+    if pcls in CONSTRAINTS:
+        params._check()
+
+    return params
+
+
+async def acreate(cls, *args, limit=None, **kwargs):
+    '''Returns an instance of host class ``cls`` created with ``args`` and
+    ``kwargs``, with the params created by ``aparams``'''
+    params = await aparams(cls, kwargs, limit=limit)
+    kwargs = params._remaining(**kwargs)
+    kwargs[KWARG_PPARAMS] = params
+    return cls(*args, **kwargs)
+
+
+async def acreate_all(cls, kwargslist, limit=None):
+    '''Returns a list of instances of host class ``cls``, one per dict of
+    kwargs in ``kwargslist``, created concurrently and sharing the ``limit``
+    of transforms awaited at the same time'''
+    sem = _semaphore(limit)
+    return await asyncio.gather(*[acreate(cls, limit=sem, **kwargs)
+                                  for kwargs in kwargslist])
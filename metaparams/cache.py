@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import atexit
+import json
+import os
+import sys
+import tempfile
+import threading
+
+__all__ = ['DefinitionCache', 'enable', 'disable', 'active']
+
+CACHE_ENV = 'METAPARAMS_CACHE'  # directory for the cache, enables it if set
+CACHE_FILE = 'metaparams-{}{}.json'.format(*sys.version_info[:2])
+
+
+class DefinitionCache:
+    '''On-disk store (much like ``__pycache__``) of the precomputed parts of
+    the definition of ``Params`` subclasses, keyed by the fingerprint of the
+    class.
+
+    The entries are loaded once and written back (merged with what other
+    processes may have stored in the meantime) with ``save``, which is
+    automatically called at exit when the cache is activated with
+    ``enable``
+    '''
+    def __init__(self, path):
+        self.path = os.path.join(path, CACHE_FILE)
+        self.entries = self._load()
+        self.hits = 0
+        self.misses = 0
+        self._new = {}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):  # not there or corrupt, start afresh
+            return {}
+
+    def get(self, fingerprint):
+        '''Returns the entry for ``fingerprint`` or ``None``'''
+        entry = self.entries.get(fingerprint)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return entry
+
+    def put(self, fingerprint, entry):
+        '''Stores ``entry`` (must be json-serializable) for ``fingerprint``'''
+        with self._lock:
+            self.entries[fingerprint] = self._new[fingerprint] = entry
+
+    def save(self):
+        '''Writes the new entries (if any) to disk atomically'''
+        with self._lock:
+            if not self._new:
+                return
+
+            entries = self._load()  # merge with concurrent writers
+            entries.update(self._new)
+            dirname = os.path.dirname(self.path)
+            os.makedirs(dirname, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(entries, f)
+                os.replace(tmp, self.path)
+            except OSError:
+                os.unlink(tmp)
+                raise
+
+            self._new = {}
+
+
+_cache = None
+
+
+def enable(path):
+    '''Activates the cache in directory ``path``. Classes created from now on
+    use it. Returns the cache'''
+    global _cache
+    if _cache is not None:
+        disable()
+
+    _cache = DefinitionCache(path)
+    atexit.register(_cache.save)
+    return _cache
+
+
+def disable():
+    '''Saves and deactivates the current cache (if any)'''
+    global _cache
+    if _cache is not None:
+        atexit.unregister(_cache.save)
+        _cache.save()
+        _cache = None
+
+
+def active():
+    '''Returns the active cache or ``None``'''
+    return _cache
+
+
+if os.environ.get(CACHE_ENV):
+    enable(os.environ[CACHE_ENV])
@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Conversion of strings (command line, environment, csv files) to the values
+of params.
+
+A converter is compiled once per param from the declared ``type`` (or the
+type of the default value if no type is declared), the ``choices`` and the
+default value. Values which are not strings are returned unchanged and empty
+strings give the default value (except for ``str`` params).
+
+Whole columns are converted at once with ``Converter.column``, which tries
+the plain builtin conversion (``int``, ``float`` ...) over the column before
+falling back to converting cell by cell.
+'''
+import collections
+import csv
+import datetime
+import enum
+import itertools
+import os
+
+from .metaparams import (PSETTING, KWARG_PNAME, NAME_TYPE, PARAMS, CONSTRAINTS,
+                         NAME_REQUIRED, NAME_TRANSFORM, _osetattr, _ERR_REQ,
+                         _ERR_TYPE, _ERR_TR)
+
+__all__ = ['Converter', 'converter', 'converters', 'convert', 'columns',
+           'from_csv', 'from_env']
+
+_TRUE = ('1', 'true', 't', 'yes', 'y', 'on')
+_FALSE = ('0', 'false', 'f', 'no', 'n', 'off')
+_BOOLS = dict([(s, True) for s in _TRUE] + [(s, False) for s in _FALSE])
+
+_ERR_BOOL = 'Invalid bool value "{}"'
+_ERR_ROW = '{} {} has {} cells and the header {}'  # "Row"/"Line", number
+
+
+def _tobool(s):
+    try:
+        return _BOOLS[s.lower()]
+    except KeyError:
+        raise ValueError(_ERR_BOOL.format(s))
+
+
+# fast paths: callables taking the string and returning the value
+_FAST = {
+    int: int,
+    float: float,
+    bool: _tobool,
+    datetime.datetime: datetime.datetime.fromisoformat,
+    datetime.date: datetime.date.fromisoformat,
+    datetime.time: datetime.time.fromisoformat,
+}
+
+_INFER = (int, float, bool)  # types of defaults used if no type is declared
+
+_repeat = itertools.repeat
+
+
+def _pcls(cls):
+    if cls in PSETTING:
+        return getattr(cls, PSETTING[cls][KWARG_PNAME])
+
+    return cls
+
+
+def _identity(s):
+    return s
+
+
+def _enum(etype):
+    '''Returns a converter for enum ``etype``, by name or value'''
+    members = {str(m.value): m for m in etype}
+    members.update(etype.__members__)
+
+    def conv(s):
+        try:
+            return members[s]
+        except KeyError:
+            return etype(s)  # let it complain
+
+    return conv
+
+
+class Converter:
+    '''Converts strings to values of a param (see ``converter``). The
+    ``__name__`` is the name of the type, for the error messages of
+    ``argparse``'''
+    __slots__ = ['__name__', 'fast', 'table', 'default', 'empty']
+
+    def __init__(self, ptype, choices, default):
+        self.__name__ = getattr(ptype, '__name__', 'str')
+        self.default = default
+        self.empty = ptype is not None and ptype is not str
+        self.table = None
+        if choices:  # strings of the choices (names for enums) to choices
+            self.table = {str(c): c for c in choices}
+            self.table.update((c.name, c) for c in choices
+                              if isinstance(c, enum.Enum))
+
+        if ptype in _FAST:
+            self.fast = _FAST[ptype]
+        elif isinstance(ptype, type) and issubclass(ptype, enum.Enum):
+            self.fast = _enum(ptype)
+        elif ptype is None or ptype is str or not callable(ptype):
+            self.fast = _identity
+        else:  # e.g.: Decimal, Path ...
+            self.fast = ptype
+
+    def __call__(self, value):
+        if value.__class__ is not str:
+            return value
+
+        if not value and self.empty:
+            return self.default
+
+        if self.table is not None:
+            try:
+                return self.table[value]
+            except KeyError:
+                pass
+
+        return self.fast(value)
+
+    def column(self, values):
+        '''Returns the list of converted ``values``'''
+        try:  # all good strings: convert them without calls to python code
+            if self.table is not None:
+                return list(map(self.table.__getitem__, values))
+
+            if self.fast is _tobool:
+                return list(map(_BOOLS.__getitem__, map(str.lower, values)))
+
+            if self.fast is not _identity:
+                return list(map(self.fast, values))
+        except (ValueError, TypeError, KeyError):
+            pass  # empty cells, non-strings ... go one by one
+
+        return list(map(self, values))
+
+
+_CONVERTERS = {}  # params class -> dict name -> Converter
+
+
+def converters(cls):
+    '''Returns a dict with the ``Converter`` for each param of ``cls`` (params
+    or host class)'''
+    pcls = _pcls(cls)
+    try:
+        return _CONVERTERS[pcls]
+    except KeyError:
+        pass
+
+    convs = {}
+    for name in pcls:
+        default = pcls._defvalue(name)
+        ptype = pcls._get(name, NAME_TYPE)
+        if ptype is None and type(default) in _INFER:
+            ptype = type(default)
+
+        convs[name] = Converter(ptype, pcls._choices(name), default)
+
+    return _CONVERTERS.setdefault(pcls, convs)
+
+
+def converter(cls, name):
+    '''Returns the ``Converter`` for param ``name`` of ``cls``'''
+    return converters(cls)[name]
+
+
+def convert(cls, name, value):
+    '''Returns ``value`` converted for param ``name`` of ``cls``'''
+    return converters(cls)[name](value)
+
+
+def _checkrows(header, rows):
+    '''Returns the non-empty ``rows`` and raises ``ValueError`` if one has
+    not as many cells as ``header``'''
+    rows = [row for row in rows if row]
+    n = len(header)
+    for i, row in enumerate(rows):
+        if len(row) != n:
+            raise ValueError(_ERR_ROW.format('Row', i, len(row), n))
+
+    return rows
+
+
+def columns(cls, header, rows):
+    '''Returns a dict name -> list of converted values for the params in
+    ``header`` (other names are skipped) from the string cells in ``rows``.
+    Empty rows are skipped and the others must have as many cells as the
+    header (else ``ValueError``)'''
+    convs = converters(cls)
+    rows = _checkrows(header, rows)
+    cols = list(zip(*rows)) or [()] * len(header)
+    return {name: convs[name].column(col)
+            for name, col in zip(header, cols) if name in convs}
+
+
+def from_csv(cls, f, **kwargs):
+    '''Returns a list of params instances (of the params class of ``cls``)
+    with the values in the csv file ``f`` (an open file or a path). The first
+    row names the params. ``kwargs`` are passed to ``csv.reader``.
+
+    Columns are converted at once and transformed once. Missing columns take
+    the default value. The constraints are checked for each instance. Empty
+    lines are skipped and a line without as many cells as the header raises
+    ``ValueError``'''
+    if isinstance(f, (str, os.PathLike)):
+        with open(f, newline='') as fh:
+            return from_csv(cls, fh, **kwargs)
+
+    pcls = _pcls(cls)
+    clsname = pcls.__name__
+    reader = csv.reader(f, **kwargs)
+    header = next(reader)
+    rows = []
+    for row in reader:
+        if not row:
+            continue
+
+        if len(row) != len(header):
+            raise ValueError(_ERR_ROW.format('Line', reader.line_num,
+                                             len(row), len(header)))
+
+        rows.append(row)
+
+    cols = columns(pcls, header, rows)
+
+    nrows = len(rows)
+    new = pcls.__new__
+    objs = [new(pcls) for _ in range(nrows)]
+    # set the values by columns (deque consumes the map without storing)
+    for name, pdef in PARAMS[pcls].items():
+        if name not in cols:
+            if pdef[NAME_REQUIRED]:
+                raise ValueError(_ERR_REQ.format(name, clsname))
+
+            col = itertools.repeat(pcls._defvalue(name), nrows)
+            collections.deque(map(_osetattr, objs, _repeat(name), col), 0)
+            continue
+
+        col = cols[name]
+        t = pdef[NAME_TYPE]
+        if t and not all(map(isinstance, col, _repeat(t))):
+            v = next(v for v in col if not isinstance(v, t))
+            raise TypeError(_ERR_TYPE.format(type(v), name, t, clsname))
+
+        tr = pdef[NAME_TRANSFORM]
+        if tr:
+            try:
+                col = list(map(tr, col))
+            except Exception:
+                for v in col:  # find the culprit for the error message
+                    try:
+                        tr(v)
+                    except Exception:
+                        raise ValueError(_ERR_TR.format(name, v, clsname))
+
+                raise
+
+        collections.deque(map(_osetattr, objs, _repeat(name), col), 0)
+
+    if pcls in CONSTRAINTS:
+        for obj in objs:
+            obj._check()
+
+    return objs
+
+
+def from_env(cls, prefix='', environ=None):
+    '''Returns a dict with the converted values of the params of ``cls`` found
+    in ``environ`` (defaults to ``os.environ``) as ``prefix`` + the name of
+    the param in uppercase'''
+    environ = os.environ if environ is None else environ
+    out = {}
+    for name, conv in converters(cls).items():
+        key = prefix + name.upper()
+        if key in environ:
+            out[name] = conv(environ[key])
+
+    return out
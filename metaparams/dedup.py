@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Canonicalization and deduplication of combinations of params values.
+
+Two combinations are the same if the values are the same after the
+``transform`` of each param has been applied and after the params which are
+irrelevant (given the value of others) have been set to the default. The
+extra definition entry ``irrelevant`` declares when::
+
+    class A(ParamsBase):
+        params = dict(
+            mode=dict(value='ema', transform=str.lower),
+            # alpha only matters for the "ema" mode
+            alpha=dict(value=0.5, irrelevant=dict(mode=['sma', 'wma'])),
+        )
+
+    for p in dedup(A, sweep):  # sweep yields kwargs or params instances
+        run(p)
+
+The rule is a dict ``name -> value`` (or a list/tuple/set of values) which
+must all match, or a callable receiving the dict of values. The rules are
+evaluated together and the resets applied, again until nothing changes (a
+reset can make another param irrelevant): the order of the declarations does
+not matter and canonical values are their own canonical form.
+'''
+from .metaparams import (PSETTING, KWARG_PNAME, PARAMS, DEFAULTS,
+                         NAME_REQUIRED, CONSTRAINTS, Params, _build, _canon,
+                         _ERR_REQ)
+
+__all__ = ['Dedup', 'canonical', 'dedup']
+
+NAME_IRRELEVANT = 'irrelevant'  # extra definition entry: irrelevant-when rule
+
+_VALUES = (list, tuple, set, frozenset)
+
+
+def _pcls(cls):
+    if cls in PSETTING:
+        return getattr(cls, PSETTING[cls][KWARG_PNAME])
+
+    return cls
+
+
+def _irrelevant(rule, values):
+    if callable(rule):
+        return rule(values)
+
+    for name, match in rule.items():
+        value = values[name]
+        if isinstance(match, _VALUES):
+            if value not in match:
+                return False
+        elif value != match:
+            return False
+
+    return True
+
+
+def canonical(cls, item):
+    '''Returns the dict of canonical values for ``item`` (a params instance
+    or a dict of kwargs) for params (or host) class ``cls``.
+
+    The kwargs are checked and transformed (the instance values already are),
+    the values are checked against the constraints and irrelevant params are
+    set to their defaults. Keys which are not params are ignored'''
+    pcls = _pcls(cls)
+    if isinstance(item, Params):
+        values = item._kwargs()
+    else:
+        values = dict(DEFAULTS[pcls])
+        for name, value in item.items():
+            if name in values:
+                values[name] = pcls._validate(name, value)
+
+        pdefs = PARAMS[pcls]
+        for name in values:
+            if pdefs[name][NAME_REQUIRED] and name not in item:
+                raise ValueError(_ERR_REQ.format(name, pcls.__name__))
+
+    if pcls in CONSTRAINTS:
+        _build(pcls, values)._check()
+
+    defaults, rules = DEFAULTS[pcls], _rules(pcls)
+    while True:  # ends: a param reset to the default is not changed again
+        resets = [name for name, rule in rules
+                  if values[name] is not defaults[name] and
+                  _irrelevant(rule, values)]
+        if not resets:
+            return values
+
+        for name in resets:
+            values[name] = defaults[name]
+
+
+_RULES = {}  # params class -> list of (name, irrelevant rule)
+
+
+def _rules(pcls):
+    try:
+        return _RULES[pcls]
+    except KeyError:
+        pass
+
+    rules = [(name, pcls._get(name, NAME_IRRELEVANT, default=None))
+             for name in pcls]
+    _RULES[pcls] = rules = [(name, rule) for name, rule in rules if rule]
+    return rules
+
+
+def _key(values):
+    key = tuple(values.values())
+    try:
+        hash(key)
+    except TypeError:  # unhashable values (lists, dicts ...)
+        return _canon(key)
+
+    return key
+
+
+class Dedup:
+    '''Stage for a pipeline of combinations of values of the params of
+    ``cls`` (params or host class) which yields params instances with the
+    canonical values, dropping the combinations already seen.
+
+      - ``redirects``: for each item which has gone through the stage, the
+        position in the output of the instance which stands for it. Use it
+        to map the results back to the original combinations
+
+    The same stage can be used with several streams and remembers what it
+    has seen across them.
+    '''
+    def __init__(self, cls):
+        self.pcls = _pcls(cls)
+        self.redirects = []
+        self.unique = 0
+        self._seen = {}  # key -> position in the output
+
+    @property
+    def duplicates(self):
+        return len(self.redirects) - self.unique
+
+    def __call__(self, items):
+        pcls, seen, redirects = self.pcls, self._seen, self.redirects
+        for item in items:
+            values = canonical(pcls, item)
+            key = _key(values)
+            pos = seen.get(key)
+            if pos is not None:  # redirect to the first one
+                redirects.append(pos)
+                continue
+
+            seen[key] = pos = self.unique
+            self.unique += 1
+            redirects.append(pos)
+            yield _build(pcls, values)
+
+
+def dedup(cls, items):
+    '''Yields params instances with the canonical values of the distinct
+    combinations in ``items`` (kwargs or params instances). See ``Dedup``'''
+    return Dedup(cls)(items)
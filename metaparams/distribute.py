@@ -0,0 +1,437 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Distribution of evaluations of params over worker processes/machines.
+
+A ``Broker`` puts tasks (a function and a params instance) in a work queue and
+collects the results sent by ``Worker`` instances, which re-create the host
+object for the params and call the function with it::
+
+    # broker (authkey: a random secret shared with the workers)
+    transport = ManagerTransport(address=('127.0.0.1', 50000), authkey=key)
+    transport.serve()
+    broker = Broker(transport)
+    for p in candidates:
+        broker.submit(evaluate, p)
+    results = broker.gather()
+
+    # on each worker (other machines reach the broker through a tunnel)
+    transport = ManagerTransport(address=('127.0.0.1', 50000), authkey=key)
+    transport.connect()
+    Worker(transport).run()
+
+Params are sent as a schema (the host class and the fingerprint of the
+definition) and the tuple of values. A specialized host class is sent as its
+base host class plus the pickled defaults and is specialized again in the
+worker. Workers send heartbeats while running a task. Tasks held by a worker
+which stops sending heartbeats are retried, as are tasks taken from the queue
+but never claimed (the worker died before the first heartbeat). The
+heartbeats carry the attempt: those of an earlier attempt do not claim a task
+submitted again.
+'''
+import importlib
+import itertools
+import multiprocessing
+import os
+import pickle
+import queue
+import socket
+import threading
+import time
+import traceback
+from multiprocessing.managers import BaseManager
+
+from .metaparams import (CLS, PSETTING, SPECIALIZED, KWARG_PNAME,
+                         KWARG_PPARAMS, Params, _build, _fingerprint)
+
+__all__ = ['encode', 'decode', 'LocalTransport', 'ManagerTransport',
+           'Broker', 'Worker', 'LostTask', 'TaskError']
+
+_ERR_HOST = 'Params "{}" have no host class and cannot be distributed'
+_ERR_SCHEMA = 'Definition of "{}" differs in the worker (schema "{}")'
+_ERR_LOST = 'Task {} lost {} times'
+
+_SCHEMAS = {}  # params class -> schema
+_RESOLVED = {}  # schema -> params class
+_QUEUES = {}  # name -> queue served by the manager of this process
+
+
+class LostTask(Exception):
+    '''Result of a task which was lost more times than the retries'''
+
+
+class TaskError(Exception):
+    '''Result of a task for which the function raised an exception. The
+    argument is the formatted traceback from the worker'''
+
+
+def _schema(pcls):
+    try:
+        return _SCHEMAS[pcls]
+    except KeyError:
+        pass
+
+    host = CLS.get(pcls)
+    if host is None:
+        raise ValueError(_ERR_HOST.format(pcls.__name__))
+
+    special = SPECIALIZED.get(host)
+    if special is not None:  # the name cannot be imported in the worker
+        base, defaults = special
+        bpcls = getattr(base, PSETTING[base][KWARG_PNAME])
+        schema = '{}#{}'.format(_schema(bpcls), pickle.dumps(defaults).hex())
+    else:
+        schema = '{}:{}@{}'.format(host.__module__, host.__qualname__,
+                                   _fingerprint(pcls))
+
+    _SCHEMAS[pcls] = schema
+    _RESOLVED[schema] = pcls
+    return schema
+
+
+def _resolve(schema):
+    try:
+        return _RESOLVED[schema]
+    except KeyError:
+        pass
+
+    if '#' in schema:  # specialized host: specialize the base host again
+        bschema, defaults = schema.split('#', 1)
+        base = CLS[_resolve(bschema)]
+        host = base._specialize(**pickle.loads(bytes.fromhex(defaults)))
+        pcls = getattr(host, PSETTING[host][KWARG_PNAME])
+        _RESOLVED[schema] = pcls
+        return pcls
+
+    path, fingerprint = schema.rsplit('@', 1)
+    modname, qualname = path.split(':')
+    host = importlib.import_module(modname)
+    for name in qualname.split('.'):
+        host = getattr(host, name)
+
+    pcls = getattr(host, PSETTING[host][KWARG_PNAME])
+    if _fingerprint(pcls) != fingerprint:
+        raise ValueError(_ERR_SCHEMA.format(pcls.__name__, schema))
+
+    _RESOLVED[schema] = pcls
+    return pcls
+
+
+def encode(params):
+    '''Returns ``(schema, values)`` for the ``params`` instance (or the params
+    of a host instance)'''
+    if not isinstance(params, Params):
+        params = getattr(params, PSETTING[type(params)][KWARG_PNAME])
+
+    return _schema(params.__class__), tuple(params._values())
+
+
+def decode(schema, values):
+    '''Returns the params instance for ``schema`` and ``values``. The host
+    class is imported if needed and the definition must have the same
+    fingerprint'''
+    pcls = _resolve(schema)
+    return _build(pcls, dict(zip(pcls, values)))
+
+
+def _queues(name):
+    return _QUEUES.setdefault(name, queue.Queue())
+
+
+def _tasks():
+    return _queues('tasks')
+
+
+def _messages():
+    return _queues('messages')
+
+
+class _Manager(BaseManager):
+    pass
+
+
+_Manager.register('tasks', callable=_tasks)
+_Manager.register('messages', callable=_messages)
+
+
+class LocalTransport:
+    '''In-process queues, for workers running in threads'''
+    def __init__(self):
+        self.tasks = queue.Queue()
+        self.messages = queue.Queue()
+
+    def close(self):
+        pass
+
+
+class ManagerTransport:
+    '''Queues served by a ``multiprocessing`` manager over a socket. The
+    broker calls ``serve`` (the default ``address`` takes a free port on
+    localhost, see ``address`` after the call) and the workers ``connect``
+    to the same address with the same ``authkey``.
+
+    The manager exchanges pickles: whoever knows the ``authkey`` and can
+    reach the address can run code in the broker and the workers. The
+    default ``authkey`` is the one of the current process (inherited by the
+    processes it starts), workers elsewhere need it passed explicitly'''
+    def __init__(self, address=('127.0.0.1', 0), authkey=None):
+        self.address = address
+        self.authkey = authkey
+        self._manager = None
+        self._owner = False
+
+    def serve(self):
+        if self.authkey is None:
+            self.authkey = multiprocessing.current_process().authkey
+
+        self._manager = _Manager(address=self.address, authkey=self.authkey)
+        self._manager.start()
+        self._owner = True
+        self.address = self._manager.address
+        self._bind()
+
+    def connect(self):
+        if self.authkey is None:
+            self.authkey = multiprocessing.current_process().authkey
+
+        self._manager = _Manager(address=self.address, authkey=self.authkey)
+        self._manager.connect()
+        self._bind()
+
+    def _bind(self):
+        self.tasks = self._manager.tasks()
+        self.messages = self._manager.messages()
+
+    def close(self):
+        if self._owner:
+            self._manager.shutdown()
+
+        self._manager = None
+
+
+class Broker:
+    '''Submits tasks and collects the results
+
+      - ``transport``: provides the ``tasks`` and ``messages`` queues
+      - ``timeout``: seconds without heartbeats after which a task taken by
+        a worker is considered lost and submitted again. Tasks taken from the
+        queue (the queue is FIFO: a later one has been claimed or the queue
+        is empty) are lost if not claimed within ``timeout`` seconds
+      - ``retries``: times a lost task is submitted again before its result
+        is a ``LostTask`` exception
+    '''
+    def __init__(self, transport, timeout=10.0, retries=2):
+        self.transport = transport
+        self.timeout = timeout
+        self.retries = retries
+        self.submitted = self.completed = self.failed = 0
+        self.retried = self.lost = 0
+        self.workers = {}  # worker id -> number of tasks completed
+        self._ids = itertools.count()
+        self._pending = {}  # tid -> [task, worker id, last heartbeat, seq]
+        self._seq = 0  # of the last task put in the queue
+        self._taken = 0  # tasks up to this seq have left the queue
+        self._start = None
+
+    def _put(self, task):
+        self._seq += 1
+        self.transport.tasks.put(task)
+        return self._seq
+
+    def submit(self, func, params, *args):
+        '''Queues the evaluation ``func(host, *args)`` where ``host`` is an
+        instance of the host class of ``params`` (a params or host instance).
+        ``func`` must be picklable if the transport needs it. Returns the id
+        of the task'''
+        if self._start is None:
+            self._start = time.monotonic()
+
+        tid = next(self._ids)
+        task = (tid, 0, func, args) + encode(params)
+        self._pending[tid] = [task, None, None, self._put(task)]
+        self.submitted += 1
+        return tid
+
+    def _retry(self, now):
+        if self.transport.tasks.empty():
+            self._taken = self._seq
+
+        for tid, pending in list(self._pending.items()):
+            task, wid, seen, seq = pending
+            if wid is None:  # not claimed
+                if seq > self._taken:
+                    continue  # still in the queue
+
+                if seen is None:  # out of the queue: the clock starts now
+                    pending[2] = now
+                    continue
+
+            if now - seen < self.timeout:
+                continue
+
+            self.lost += 1
+            attempt = task[1] + 1
+            if attempt > self.retries:
+                del self._pending[tid]
+                self.failed += 1
+                yield tid, LostTask(_ERR_LOST.format(tid, attempt))
+                continue
+
+            self.retried += 1
+            task = (tid, attempt) + task[2:]
+            pending[:] = [task, None, None, self._put(task)]
+
+    def results(self, timeout=None):
+        '''Yields ``(tid, result)`` as results arrive until no tasks are
+        pending or, if given, ``timeout`` seconds pass without any result.
+        Failed tasks have an exception as result (``TaskError`` or
+        ``LostTask``)'''
+        poll = min(1.0, self.timeout / 4.0)
+        last = checked = time.monotonic()
+        while self._pending:
+            try:
+                msg = self.transport.messages.get(timeout=poll)
+            except queue.Empty:
+                msg = None
+
+            now = time.monotonic()
+            if msg is not None:
+                kind, wid, tid, attempt = msg[:4]
+                pending = self._pending.get(tid)
+                if kind == 'hb':
+                    # else done, or from an attempt which has been retried
+                    if pending is not None and pending[0][1] == attempt:
+                        pending[1:3] = [wid, now]
+                        self._taken = max(self._taken, pending[3])
+                elif pending is not None:  # the first result counts
+                    del self._pending[tid]
+                    ok, result = msg[4:]
+                    if ok:
+                        self.completed += 1
+                        self.workers[wid] = self.workers.get(wid, 0) + 1
+                    else:
+                        self.failed += 1
+                        result = TaskError(result)
+
+                    last = now
+                    yield tid, result
+
+            if now - checked >= poll:  # look for lost tasks
+                checked = now
+                for tid, result in self._retry(now):
+                    last = now
+                    yield tid, result
+
+            if timeout is not None and now - last > timeout:
+                return
+
+    def gather(self, timeout=None):
+        '''Waits for the pending tasks (see ``results``) and returns a dict
+        of task id to result'''
+        return dict(self.results(timeout))
+
+    def stop(self, nworkers=1):
+        '''Tells ``nworkers`` workers to stop once the queue is empty'''
+        for _ in range(nworkers):
+            self.transport.tasks.put(None)
+
+    def stats(self):
+        '''Returns a dict with the counters and the throughput in completed
+        tasks per second since the first submission'''
+        elapsed = 0.0
+        if self._start is not None:
+            elapsed = time.monotonic() - self._start
+
+        return dict(
+            submitted=self.submitted,
+            completed=self.completed,
+            failed=self.failed,
+            pending=len(self._pending),
+            retried=self.retried,
+            lost=self.lost,
+            workers=dict(self.workers),
+            elapsed=elapsed,
+            tasks_per_sec=self.completed / elapsed if elapsed else 0.0,
+        )
+
+
+class Worker:
+    '''Takes tasks from the transport, re-creates the host object (with the
+    params as sent) and sends back the result of the function. A heartbeat is
+    sent every ``interval`` seconds while a task runs'''
+    def __init__(self, transport, wid=None, interval=1.0):
+        self.transport = transport
+        self.wid = wid or '{}:{}:{}'.format(socket.gethostname(), os.getpid(),
+                                            threading.get_ident())
+        self.interval = interval
+        self.done = 0
+        self.elapsed = 0.0
+
+    def _heartbeat(self, tid, attempt, stop):
+        messages = self.transport.messages
+        while not stop.wait(self.interval):
+            messages.put(('hb', self.wid, tid, attempt))
+
+    def execute(self, task):
+        '''Returns ``(ok, result)`` for the ``task``'''
+        tid, attempt, func, args, schema, values = task
+        try:
+            params = decode(schema, values)
+            host = CLS[params.__class__](**{KWARG_PPARAMS: params})
+            return True, func(host, *args)
+        except Exception:
+            return False, traceback.format_exc()
+
+    def run(self, maxtasks=None):
+        '''Runs tasks until a stop is received (see ``Broker.stop``) or
+        ``maxtasks`` have been run'''
+        tasks, messages = self.transport.tasks, self.transport.messages
+        while maxtasks is None or self.done < maxtasks:
+            task = tasks.get()
+            if task is None:
+                break
+
+            tid, attempt = task[:2]
+            messages.put(('hb', self.wid, tid, attempt))  # claim it
+            stop = threading.Event()
+            hb = threading.Thread(target=self._heartbeat,
+                                  args=(tid, attempt, stop))
+            hb.daemon = True
+            hb.start()
+            start = time.monotonic()
+            try:
+                ok, result = self.execute(task)
+            finally:
+                stop.set()
+
+            try:
+                messages.put(('done', self.wid, tid, attempt, ok, result))
+            except Exception:  # the result cannot be sent (not picklable)
+                messages.put(('done', self.wid, tid, attempt, False,
+                              traceback.format_exc()))
+
+            self.elapsed += time.monotonic() - start
+            self.done += 1
+
+    def stats(self):
+        '''Returns a dict with the tasks run and the throughput in tasks per
+        second of run time'''
+        rate = self.done / self.elapsed if self.elapsed else 0.0
+        return dict(done=self.done, elapsed=self.elapsed, tasks_per_sec=rate)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Params whose value is loaded on first access.
+
+The definition entry ``lazy`` is the loader, which receives the raw value
+(after ``type`` checking and ``transform``) and returns the object to use::
+
+    class A(ParamsBase):
+        params = dict(
+            calendar=dict(value='nyse.csv', lazy=load_calendar),
+        )
+
+    a = A()
+    a.p.calendar  # loaded now (or taken from the cache)
+    a.p._kwargs()  # {'calendar': 'nyse.csv'}
+
+Loaded objects are kept in a process-wide cache keyed by the loader and the
+raw value, holding up to ``LAZY_MAXSIZE`` objects (least recently used are
+evicted). Instances with the same raw value share the loaded object.
+'''
+import threading
+
+from .memo import LRUCache
+from .metaparams import _canon
+
+__all__ = ['LazyParam', 'load', 'stats', 'clear', 'resize']
+
+LAZY_MAXSIZE = 32  # loaded objects kept in the process-wide cache
+
+_MISSING = object()
+_cache = LRUCache(LAZY_MAXSIZE)
+_loading = {}  # key -> lock, for concurrent first loads of the same key
+_lock = threading.Lock()
+
+
+def load(loader, raw):
+    '''Returns the object loaded by ``loader`` for ``raw`` from the cache or
+    loads and caches it. Concurrent loads of the same object run once'''
+    key = (loader, raw)
+    try:
+        hash(key)
+    except TypeError:  # unhashable raw value
+        key = (loader, _canon(raw))
+
+    value = _cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    with _lock:
+        keylock = _loading.setdefault(key, threading.Lock())
+
+    with keylock:
+        value = _cache.get(key, _MISSING)  # may have been loaded meanwhile
+        if value is _MISSING:
+            value = loader(raw)
+            _cache.put(key, value)
+
+    with _lock:
+        _loading.pop(key, None)
+
+    return value
+
+
+def stats():
+    '''Returns the statistics of the cache of loaded objects'''
+    return _cache.stats()
+
+
+def clear():
+    '''Releases all loaded objects'''
+    _cache.clear()
+
+
+def resize(maxsize):
+    '''Sets the maximum number of loaded objects kept'''
+    _cache.maxsize = maxsize
+
+
+class LazyParam:
+    '''Replaces the slot of a lazy param in the params class. The slot holds
+    the raw value, reading the attribute returns the loaded object'''
+    __slots__ = ['member', 'loader']
+
+    def __init__(self, member, loader):
+        self.member = member
+        self.loader = loader
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+
+        return load(self.loader, self.member.__get__(obj, cls))
+
+    def __set__(self, obj, value):
+        self.member.__set__(obj, value)
+
+    def __delete__(self, obj):
+        self.member.__delete__(obj)
+
+
+def install(cls, loaders):
+    '''Installs ``LazyParam`` for the params ``name -> loader`` in ``loaders``
+    of class ``cls``. Returns a function ``(obj, name)`` returning the raw
+    values'''
+    members = {}
+    for name, loader in loaders.items():
+        members[name] = member = cls.__dict__[name]
+        setattr(cls, name, LazyParam(member, loader))
+
+    def rawget(obj, name):
+        member = members.get(name)
+        if member is None:
+            return getattr(obj, name)
+
+        return member.__get__(obj)
+
+    return rawget
@@ -0,0 +1,559 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import collections
+import copy
+import datetime
+import decimal
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import re
+import sys
+import tempfile
+import threading
+
+from .metaparams import (PSETTING, KWARG_PNAME, PARAMS, RAWGET, SLOT_CACHE,
+                         NAME_TRANSFORM, NAME_MEMOIZE, _canon, _canon_code,
+                         _descriptor, _fingerprint, _UNSTABLE, _FP_UNSTABLE)
+
+__all__ = ['LRUCache', 'DiskStore', 'memoize', 'stage', 'MemoTransform',
+           'transformstats']
+
+MEMO_MAXSIZE = 128  # default number of results kept in memory
+
+_MISSING = object()
+
+
+def _sizeof(value):
+    '''Approximate size in bytes of ``value`` (``nbytes`` for arrays)'''
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    '''Thread-safe in-memory store of up to ``maxsize`` entries (and up to
+    ``maxbytes`` approximate bytes if given), evicting the least recently
+    used ones'''
+    def __init__(self, maxsize=MEMO_MAXSIZE, maxbytes=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._data = collections.OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = _sizeof(value) if self.maxbytes is not None else 0
+        with self._lock:
+            self.nbytes += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while self._data and (
+                    len(self._data) > self.maxsize or
+                    (self.maxbytes is not None and
+                     self.nbytes > self.maxbytes)):
+                old, _ = self._data.popitem(last=False)
+                self.nbytes -= self._sizes.pop(old)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        '''Returns a dict with the statistics of the cache'''
+        return dict(size=len(self._data), maxsize=self.maxsize,
+                    nbytes=self.nbytes, maxbytes=self.maxbytes,
+                    hits=self.hits, misses=self.misses,
+                    evictions=self.evictions)
+
+
+class DiskStore:
+    '''Pickle based store of results in directory ``path``, one file per key,
+    which survives restarts and can be shared by processes (files are written
+    atomically)'''
+    def __init__(self, path):
+        self.path = path
+        self.hits = self.misses = 0
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], key + '.pickle')
+
+    def get(self, key, default=None):
+        try:
+            with open(self._file(key), 'rb') as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:  # not picklable, keep it only in memory
+            return
+
+        dirname = os.path.dirname(self._file(key))
+        os.makedirs(dirname, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+
+        os.replace(tmp, self._file(key))
+
+    def stats(self):
+        '''Returns a dict with the statistics of the store'''
+        return dict(hits=self.hits, misses=self.misses)
+
+
+def _funcid(func):
+    '''Identifies a function including its code, to invalidate entries when
+    the code changes'''
+    return '{}.{}:{}'.format(func.__module__, func.__qualname__,
+                             _canon_code(func.__code__))
+
+
+def _memokey(funcid, host, params, args, kwargs):
+    '''Returns the key for the call or ``None`` if the values cannot be
+    identified in a stable manner'''
+    fp = _fingerprint(params.__class__)
+    canon = '|'.join((
+        funcid,
+        '{}.{}'.format(host.__module__, host.__qualname__),  # mixins
+        fp,  # changes if defaults change
+        _canon(tuple(params._values())),
+        _canon(args),
+        _canon(kwargs),
+    ))
+    if _UNSTABLE in canon or fp[0] == _FP_UNSTABLE:
+        return None
+
+    return hashlib.sha1(canon.encode('utf-8')).hexdigest()
+
+
+def memoize(*args, **kwargs):
+    '''Decorator for methods of host classes which caches the results keyed by
+    the definition and the values of the params of the instance (and the
+    arguments to the method)
+
+    Args:
+        maxsize / maxbytes (def: ``MEMO_MAXSIZE`` / None):
+            Bounds of the in-memory cache, in number of results and in
+            (approximate) bytes. The least recently used are evicted (see
+            ``LRUCache``)
+        path (def: None):
+            If given, directory used to also store the results on disk
+
+    Calls for which the values (params or arguments) cannot be identified in
+    a stable manner (objects with the default ``repr``) are not cached.
+
+    The decorated method has the attributes ``cache`` and ``store`` (``None``
+    if no ``path`` was given)
+    '''
+    maxsize = kwargs.get('maxsize', MEMO_MAXSIZE)
+    maxbytes = kwargs.get('maxbytes', None)
+    path = kwargs.get('path', None)
+
+    def real_decorator(func):
+        cache = LRUCache(maxsize, maxbytes)
+        store = DiskStore(path) if path is not None else None
+        funcid = _funcid(func)
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            params = getattr(self, PSETTING[type(self)][KWARG_PNAME])
+            key = _memokey(funcid, type(self), params, args, kwargs)
+            if key is None:
+                return func(self, *args, **kwargs)
+
+            result = cache.get(key, _MISSING)
+            if result is not _MISSING:
+                return result
+
+            if store is not None:
+                result = store.get(key, _MISSING)
+                if result is not _MISSING:
+                    cache.put(key, result)
+                    return result
+
+            result = func(self, *args, **kwargs)
+            cache.put(key, result)
+            if store is not None:
+                store.put(key, result)
+
+            return result
+
+        wrapper.cache = cache
+        wrapper.store = store
+        return wrapper
+
+    if len(args):  # any non-named arg must be func and it passed by Python
+        return real_decorator(*args)  # no kwargs ... kick real decorator
+
+    return real_decorator
+
+
+# Stages: methods cached by the values of only the params they depend on
+_local = threading.local()  # .stack: dependencies of the running stages
+_BULK = object()  # read of something which can read all params
+
+_RECORDING = {}  # params class -> [traced calls running, descriptors, rawget]
+_RECLOCK = threading.Lock()
+
+
+class _Recorder:
+    '''Wraps the descriptor of a param adding the name to the reads of the
+    stage running in the thread (if any)'''
+    __slots__ = ['name', 'desc']
+
+    def __init__(self, name, desc):
+        self.name = name
+        self.desc = desc
+
+    def __get__(self, obj, cls=None):
+        if obj is not None:
+            stack = getattr(_local, 'stack', None)
+            if stack:
+                stack[-1].add(self.name)
+
+        return self.desc.__get__(obj, cls)
+
+    def __set__(self, obj, value):
+        self.desc.__set__(obj, value)
+
+    def __delete__(self, obj):
+        self.desc.__delete__(obj)
+
+
+def _record(pcls):
+    '''Installs the recording of the reads of the params of ``pcls`` (the
+    cache of the values counts as reading all of them). Nothing is changed in
+    the instances: other threads read as usual'''
+    with _RECLOCK:
+        entry = _RECORDING.get(pcls)
+        if entry is not None:
+            entry[0] += 1
+            return
+
+        names = list(pcls) + [SLOT_CACHE]
+        owned = {name: pcls.__dict__.get(name) for name in names}
+        for name in names:
+            desc = _descriptor(pcls, name)
+            setattr(pcls, name,
+                    _Recorder(_BULK if name == SLOT_CACHE else name, desc))
+
+        rawget = RAWGET.get(pcls)
+        if rawget is not None:  # bulk raw access of lazies
+            def recget(obj, name):
+                stack = getattr(_local, 'stack', None)
+                if stack:
+                    stack[-1].add(name)
+
+                return rawget(obj, name)
+
+            RAWGET[pcls] = recget
+
+        _RECORDING[pcls] = [1, owned, rawget]
+
+
+def _unrecord(pcls):
+    '''Removes the recording when the last traced call on ``pcls`` ends'''
+    with _RECLOCK:
+        entry = _RECORDING[pcls]
+        entry[0] -= 1
+        if entry[0]:
+            return
+
+        del _RECORDING[pcls]
+        _, owned, rawget = entry
+        for name, desc in owned.items():
+            if desc is None:
+                delattr(pcls, name)  # the one of the base is used again
+            else:
+                setattr(pcls, name, desc)
+
+        if rawget is not None:
+            RAWGET[pcls] = rawget
+
+
+def _stagekey(funcid, host, params, names, args, kwargs):
+    fp = _fingerprint(params.__class__)
+    canon = '|'.join((
+        funcid,
+        '{}.{}'.format(host.__module__, host.__qualname__),  # overrides
+        fp,
+        ','.join(names),
+        _canon(tuple([params._value(name) for name in names])),
+        _canon(args),
+        _canon(kwargs),
+    ))
+    if _UNSTABLE in canon or fp[0] == _FP_UNSTABLE:
+        return None
+
+    return hashlib.sha1(canon.encode('utf-8')).hexdigest()
+
+
+def stage(*names, **kwargs):
+    '''Decorator for methods of host classes which are stages of a pipeline.
+    The results are cached keyed only by the values of the params the stage
+    depends on (and the arguments to the method), which lets runs differing
+    only in the params of later stages reuse the results of earlier ones::
+
+        @stage('period')
+        def indicator(self):
+            ...
+
+        @stage('threshold', depends=[indicator])
+        def signals(self):
+            return self.indicator() > self.p.threshold
+
+        @stage  # the params read are traced
+        def execution(self):
+            ...
+
+    Args:
+        names:
+            Params read by the stage. If none is given, the params read
+            during the calls are traced (accumulated over the calls which
+            are not cached). Reads through copies made with ``_pinst=True``
+            cannot be traced
+        depends (def: ()):
+            Stages whose results are used. Their params are added. Calls to
+            other stages during a traced call are taken into account
+            without declaring them
+        trace (def: False):
+            Trace the reads also if ``names`` are given
+        maxsize / maxbytes (def: ``MEMO_MAXSIZE`` / None):
+            Bounds of the in-memory cache (see ``LRUCache``)
+        cache (def: None):
+            ``LRUCache`` to use, for example one shared by all the stages to
+            bound the memory used by all of them
+        path (def: None):
+            If given, directory used to also store the results on disk
+
+    The decorated method has the attributes ``cache``, ``store`` and
+    ``deps`` (a function returning the names the stage depends on for a
+    host or params class)
+    '''
+    if len(names) == 1 and callable(names[0]):  # @stage without ()
+        return stage()(names[0])
+
+    declared = frozenset(names)
+    depends = kwargs.get('depends', ())
+    trace = kwargs.get('trace', False) or not declared
+    cache = kwargs.get('cache', None)
+    if cache is None:
+        cache = LRUCache(kwargs.get('maxsize', MEMO_MAXSIZE),
+                         kwargs.get('maxbytes', None))
+
+    path = kwargs.get('path', None)
+    store = DiskStore(path) if path is not None else None
+
+    def real_decorator(func):
+        funcid = _funcid(func)
+        learned = {}  # params class -> set of traced names
+
+        def deps(cls):
+            pcls = cls
+            if cls in PSETTING:
+                pcls = getattr(cls, PSETTING[cls][KWARG_PNAME])
+
+            out = set(declared) | learned.get(pcls, set())
+            for dep in depends:
+                out |= dep.deps(pcls)
+
+            return out
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            params = getattr(self, PSETTING[type(self)][KWARG_PNAME])
+            pcls = params.__class__
+            known = not trace or pcls in learned
+            names = sorted(deps(pcls))
+            key = _stagekey(funcid, type(self), params, names, args, kwargs)
+            result = _MISSING
+            if known and key is not None:
+                result = cache.get(key, _MISSING)
+                if result is _MISSING and store is not None:
+                    result = store.get(key, _MISSING)
+                    if result is not _MISSING:
+                        cache.put(key, result)
+
+            if result is _MISSING:
+                stack = _local.__dict__.setdefault('stack', [])
+                stack.append(set())
+                if trace:
+                    _record(pcls)
+
+                try:
+                    result = func(self, *args, **kwargs)
+                finally:
+                    reads = stack.pop()  # and names of the stages called
+                    if trace:
+                        _unrecord(pcls)
+
+                if trace:
+                    reads = set(pcls) if _BULK in reads else reads & set(pcls)
+                    learned[pcls] = learned.get(pcls, set()) | reads
+                    names = sorted(deps(pcls))
+                    key = _stagekey(funcid, type(self), params, names,
+                                    args, kwargs)
+
+                if key is not None:
+                    cache.put(key, result)
+                    if store is not None:
+                        store.put(key, result)
+
+            for outer in getattr(_local, 'stack', ()):  # for traced callers
+                outer.update(names)
+
+            return result
+
+        wrapper.cache = cache
+        wrapper.store = store
+        wrapper.deps = deps
+        return wrapper
+
+    return real_decorator
+
+
+# Transforms: "memoize" definition entry (True or the maxsize of the cache)
+_IMMUTABLE = frozenset([
+    type(None), bool, int, float, complex, str, bytes, frozenset, range,
+    datetime.date, datetime.datetime, datetime.time, datetime.timedelta,
+    decimal.Decimal, re.Pattern,
+])
+
+
+def _fresh(result):
+    '''Returns ``result`` if it cannot be modified, else a deep copy of it
+    (each instance gets its own, the cached one is never handed out)'''
+    t = type(result)
+    if t in _IMMUTABLE:
+        return result
+
+    if t is tuple and all(type(x) in _IMMUTABLE for x in result):
+        return result
+
+    return copy.deepcopy(result)
+
+
+class MemoTransform:
+    '''Transform of a param caching the results by input value (and type) in
+    an LRU cache of up to ``maxsize`` entries. Unhashable values are
+    transformed without caching.
+
+    Results which can be modified (lists, dicts ...) are copied for each
+    instance. Results of the usual immutable types are shared.
+
+    It replaces the declared transform in the definition, hence it is shared
+    by the subclasses and specialized classes which inherit it. The
+    transform must be pure'''
+    def __init__(self, func, maxsize=MEMO_MAXSIZE):
+        functools.update_wrapper(self, func)  # also sets __wrapped__
+        self.maxsize = maxsize
+        self.unhashable = 0
+        self._cached = functools.lru_cache(maxsize=maxsize, typed=True)(func)
+
+    def __call__(self, value):
+        try:
+            return _fresh(self._cached(value))
+        except TypeError:
+            try:
+                hash(value)
+            except TypeError:  # not a failure of the transform
+                self.unhashable += 1
+                return self.__wrapped__(value)
+
+            raise
+
+    def __repr__(self):
+        return 'memoized({!r})'.format(self.__wrapped__)
+
+    def clear(self):
+        self._cached.cache_clear()
+
+    def stats(self):
+        '''Returns a dict with the statistics of the cache'''
+        info = self._cached.cache_info()
+        return dict(size=info.currsize, maxsize=info.maxsize, hits=info.hits,
+                    misses=info.misses, unhashable=self.unhashable)
+
+
+def _memotransform(tr, memo):
+    raw = tr.__wrapped__ if isinstance(tr, MemoTransform) else tr
+    if not memo or raw is None or inspect.iscoroutinefunction(raw):
+        return raw  # not memoized (coroutines: see aio.py)
+
+    maxsize = MEMO_MAXSIZE if memo is True else memo
+    if isinstance(tr, MemoTransform) and tr.maxsize == maxsize:
+        return tr  # inherited: share the cache
+
+    return MemoTransform(raw, maxsize)
+
+
+def install(pdct):
+    '''Replaces the transforms of the definitions in ``pdct`` with a
+    ``memoize`` entry with a ``MemoTransform`` (or with the original one if
+    the entry is false)'''
+    for pdef in pdct.values():
+        if NAME_MEMOIZE in pdef:
+            pdef[NAME_TRANSFORM] = _memotransform(pdef[NAME_TRANSFORM],
+                                                  pdef[NAME_MEMOIZE])
+
+
+def transformstats(cls):
+    '''Returns a dict name -> statistics (see ``MemoTransform.stats``) for
+    the params of ``cls`` (params or host class) with memoized transforms.
+    The caches are shared with the classes inheriting the definition'''
+    if cls in PSETTING:
+        cls = getattr(cls, PSETTING[cls][KWARG_PNAME])
+
+    return {name: pdef[NAME_TRANSFORM].stats()
+            for name, pdef in PARAMS[cls].items()
+            if isinstance(pdef[NAME_TRANSFORM], MemoTransform)}
@@ -19,11 +19,20 @@
 #
 ###############################################################################
 import collections
+import collections.abc
+import contextlib
+import copyreg
+import hashlib
+import operator
 import textwrap
 import sys
+import threading
+import types
 
 from metaframe import MetaFrame
 
+from . import cache
+
 __all__ = ['metaparams', 'MetaParams', 'Params', 'ParamsBase']
 
 # Keyword arguments for class definition (or for the decorator)
@@ -37,6 +46,18 @@ PARAM_SHORT = True
 
 KWARG_PINST = '_pinst'  # if a p.name -> p_name attr will be set in the host
 PARAM_INST = False
+PARAM_INST_LIVE = 'live'  # p_name are class level accessors to p.name
+
+KWARG_PSNAP = '_psnap'  # if params instances are immutable snapshots
+PARAM_SNAP = False
+
+KWARG_PPOOL = '_ppool'  # max number of released host instances kept for reuse
+PARAM_POOL = 0
+
+KWARG_PINPLACE = '_pinplace'  # if the decorator recreates instead of subclass
+PARAM_INPLACE = False
+
+KWARG_PPARAMS = '_pparams'  # instantiation: params instance to install as is
 
 # Names and default values for the dictionary entry defining each parameter
 NAME_VAL = 'value'
@@ -57,6 +78,19 @@ NAME_ARGCHOICES = 'choices'
 VALUE_ARGCHOICES = None
 NAME_ARGALIAS = 'alias'
 VALUE_ARGALIAS = None
+NAME_LAZY = 'lazy'  # optional, loader called on first access (see lazy.py)
+NAME_CONSTRAINTS = 'constraints'  # optional, relations with other params
+NAME_MEMOIZE = 'memoize'  # optional, LRU cache of the transform (see memo.py)
+
+# Operators for the constraints: (op, other) means "param op other"
+CONSTRAINT_OPS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
 
 # Default order expected for params when defined using tuples
 TUPLE_NAME_ORDER = (NAME_VAL, NAME_REQUIRED, NAME_DOC, NAME_TYPE,
@@ -72,13 +106,321 @@ NAME_DOCARGS = 'Args'
 PARAMS = {}  # keeps the complete definition or a param
 DEFAULTS = {}  # keeps params names and default values
 CLS = {}
+POOLS = {}  # keeps the pool of released instances for host classes
 PSETTING = collections.defaultdict(dict)
+FINGERPRINTS = {}  # keeps the fingerprint of the definition of a params cls
+_FPSOURCES = {}  # keeps what is needed to calculate the fingerprint
+RAWGET = {}  # keeps the getter of raw values for params classes with lazies
+PICKLERS = []  # functions applied to the tuple of values to pickle params
+SPECIALS = {}  # keeps the specialized host classes by (class, defaults)
+SPECIALIZED = {}  # keeps (class, defaults) of the specialized host classes
+GETTERS = {}  # keeps the getter of the tuple of values for params classes
+CONSTRAINTS = {}  # keeps the constraints of params classes (if any)
+NESTED = {}  # keeps name -> params class of the nested params (if any)
+_PDEFVIEWS = {}  # keeps the read-only views of the definitions
+
+SLOT_CACHE = '_pcache'  # slot of the instances caching the dict of values
+
+# The registries are written once per class, after the class (and the value
+# to register) has been completely built, and never modified afterwards.
+# The lock is only for operations which check and then create (to create
+# only once) or which modify existing objects
+_REGLOCK = threading.RLock()
+
+_ERR_FROZEN = 'Params "{}" is a snapshot and cannot be modified'
+_ERR_CONSTRAINT_DEF = 'Invalid constraint "{}" for param "{}" in params "{}"'
+
+_osetattr = object.__setattr__  # to set values bypassing snapshot checks
+
+
+def _frozen_setattr(self, name, value):
+    raise AttributeError(_ERR_FROZEN.format(self.__class__.__name__))
+
+
+def _build(cls, values):
+    '''Returns an instance of params class ``cls`` with the values from the
+    dict ``values`` (which must contain all params), used unchecked'''
+    new = cls.__new__(cls)
+    for k in cls:
+        _osetattr(new, k, values[k])
+
+    return new
+
+
+def _unpickle(owner, values):
+    '''Rebuilds a pickled params instance. ``owner`` is the host class (the
+    params classes are not importable) or the params class itself'''
+    if owner in PSETTING:
+        owner = getattr(owner, PSETTING[owner][KWARG_PNAME])
+
+    return _build(owner, dict(zip(owner, values)))
+
+
+def _getter(names):
+    '''Returns a function returning the tuple of the values of the attributes
+    ``names`` of an object, read in a single call'''
+    if not names:
+        return lambda obj: ()
+
+    if len(names) == 1:  # attrgetter returns the value and not a tuple
+        get1 = operator.attrgetter(names[0])
+        return lambda obj: (get1(obj),)
+
+    return operator.attrgetter(*names)
+
+
+def _getvalues(params):
+    '''Returns the tuple of the raw values of ``params``'''
+    cls = params.__class__
+    get = RAWGET.get(cls)
+    if get is None:
+        return GETTERS[cls](params)
+
+    return tuple([get(params, k) for k in cls])  # lazy/traced: raw access
+
+
+def _descriptor(cls, name):
+    '''Returns the descriptor of attribute ``name`` of ``cls`` found through
+    the mro (classes like the specialized ones have no slots of their own)'''
+    for klass in cls.__mro__:
+        if name in klass.__dict__:
+            return klass.__dict__[name]
+
+    raise AttributeError(name)
+
+
+def _cached(params):
+    '''Returns the dict of values of ``params`` cached in the instance, which
+    must not be modified'''
+    try:
+        kwargs = params._pcache
+    except AttributeError:  # not yet set (instance created unchecked)
+        kwargs = None
+
+    if kwargs is None:
+        kwargs = dict(zip(DEFAULTS[params.__class__], _getvalues(params)))
+        _osetattr(params, SLOT_CACHE, kwargs)
+
+    return kwargs
+
+
+def _setvalues(params, items):
+    '''Sets the ``(name, value)`` pairs in ``items``. Unless writes are
+    checked by the class (frozen/snapshots), the per-write invalidation of
+    ``Params.__setattr__`` is bypassed and the cache is invalidated once'''
+    if type(params).__setattr__ is not Params.__setattr__:
+        for k, v in items:
+            setattr(params, k, v)
+
+        return
+
+    try:
+        for k, v in items:
+            _osetattr(params, k, v)
+    finally:
+        _osetattr(params, SLOT_CACHE, None)
+
+
+def _constraints(pdct, clsname):
+    '''Returns the list of ``(name, op, other)`` for the constraints declared
+    in the definitions ``pdct``. ``op`` is a key of ``CONSTRAINT_OPS`` and
+    ``other`` the name of a param, or ``op`` is a callable receiving the dict
+    of values and ``other`` is ``None``'''
+    out = []
+    for name, pdef in pdct.items():
+        cons = pdef.get(NAME_CONSTRAINTS)
+        if not cons:
+            continue
+
+        if callable(cons) or isinstance(cons[0], str):  # a single one
+            cons = [cons]
+
+        for con in cons:
+            if callable(con):
+                out.append((name, con, None))
+                continue
+
+            try:
+                op, other = con
+            except (TypeError, ValueError):
+                op = other = None
+
+            if op not in CONSTRAINT_OPS or other not in pdct:
+                errmsg = _ERR_CONSTRAINT_DEF.format(con, name, clsname)
+                raise ValueError(errmsg)
+
+            out.append((name, op, other))
+
+    return out
+
+
+def _derive(params, values):
+    '''Returns a new instance of the class of ``params`` with the same values
+    except for those in the dict ``values``, which are used unchecked'''
+    cls = params.__class__
+    new = cls.__new__(cls)
+    get = RAWGET.get(cls, getattr)
+    for k in cls:
+        _osetattr(new, k, values[k] if k in values else get(params, k))
+
+    return new
+
+
+def _canon_code(code):
+    consts = [_canon_code(c) if hasattr(c, 'co_code') else _canon(c)
+              for c in code.co_consts]
+    h = hashlib.sha1(code.co_code)
+    h.update(repr((consts, code.co_names)).encode('utf-8'))
+    return h.hexdigest()
+
+
+_UNSTABLE = ' at 0x'  # default repr of objects, changes across runs
+_FP_UNSTABLE = '~'  # prefix of the fingerprints which change across runs
+
+_CANON_REPR = (type(None), bool, int, float, complex, str, bytes)
+_CANON_FAST = frozenset(_CANON_REPR + (type,))  # repr is stable for classes
+_CANON_SEQ = (list, tuple)
+_CANON_SET = (set, frozenset)
+
+
+def _canon(obj):
+    '''Returns a string representation of ``obj`` which is stable across runs
+    for the usual values used for params (and for functions and classes),
+    meant to be hashed'''
+    t = type(obj)
+    if t in _CANON_FAST:
+        return repr(obj)
+
+    if t is dict:
+        items = sorted(_canon(k) + ':' + _canon(v) for k, v in obj.items())
+        return '{' + ','.join(items) + '}'
+
+    if t in _CANON_SEQ:
+        items = [repr(x) if type(x) in _CANON_FAST else _canon(x) for x in obj]
+        return t.__name__ + '(' + ','.join(items) + ')'
+
+    if t in _CANON_SET:
+        return t.__name__ + '(' + ','.join(sorted(map(_canon, obj))) + ')'
+
+    if isinstance(obj, _CANON_REPR):  # subclasses like enums
+        return repr(obj)
+
+    if isinstance(obj, Params):  # nested params
+        return '{}({})'.format(t.__name__, _canon(_cached(obj)))
+
+    if hasattr(obj, 'tobytes') and hasattr(obj, 'shape'):  # numpy-like
+        h = hashlib.sha1(obj.tobytes()).hexdigest()  # repr may be elided
+        return '{}({},{},{})'.format(t.__name__, obj.dtype, obj.shape, h)
+
+    name = getattr(obj, '__qualname__', None)
+    if name is None:
+        return repr(obj)
+
+    name = '{}.{}'.format(getattr(obj, '__module__', None), name)
+    code = getattr(obj, '__code__', None)
+    if code is None:  # classes, builtins
+        return name
+
+    # functions (also lambdas): the code, defaults and closure do matter
+    cells = []
+    for cell in obj.__closure__ or ():
+        try:
+            cells.append(cell.cell_contents)
+        except ValueError:  # empty cell
+            cells.append(None)
+
+    extra = _canon((obj.__defaults__, tuple(cells)))
+    return '{}:{}:{}'.format(name, _canon_code(code), extra)
+
+
+def _fpcalc(pbases, ndecl):
+    '''Calculates a fingerprint from the params classes (or dicts) in
+    ``pbases`` and the new declaration ``ndecl`` (see ``_fpdecl``).
+
+    If the definition holds values with a default ``repr`` (with the
+    address of the object) the fingerprint changes across runs and starts
+    with ``_FP_UNSTABLE``: it must not be used to key persistent caches'''
+    fps = [_fingerprint(b) if isinstance(b, type) else _canon(b)
+           for b in pbases]
+    fps.append(_canon(ndecl))
+    fp = hashlib.sha1('|'.join(fps).encode('utf-8')).hexdigest()
+    if any(_UNSTABLE in x or x[:1] == _FP_UNSTABLE for x in fps):
+        return _FP_UNSTABLE + fp
+
+    return fp
+
+
+def _fpdecl(nparams):
+    '''Returns the declaration for a fingerprint from the dict-normalized
+    declaration ``nparams``, keeping the order and before defaults are added
+    for the missing entries. It is flattened to a list to be quickly
+    canonicalized'''
+    ndecl = []
+    for k, v in nparams.items():
+        ndecl += [k, len(v)]
+        for item in v.items():
+            ndecl += item
+
+    return ndecl
+
+
+def _fingerprint(cls):
+    '''Returns the fingerprint of params class ``cls``, calculating it the
+    first time it is requested'''
+    try:
+        return FINGERPRINTS[cls]
+    except KeyError:
+        pass
+
+    return FINGERPRINTS.setdefault(cls, _fpcalc(*_FPSOURCES[cls]))
+
+
+def _collect(args, kwargs):
+    '''Collects into a dict the dict-like objects or iterables of pairs in
+    ``args`` and the ``kwargs`` passed to update methods'''
+    updater = {}
+    # individual args are dict-like or tuples/lists of pairs
+    for arg in args:
+        try:
+            items = dict(**arg)
+        except TypeError:  # ** not supported
+            items = iter(arg)  # iterable with pairs ((a, b), (c, d)...)
+            # Do this to let other exceptions be raised
+            while True:
+                try:
+                    k, v = next(items)
+                except StopIteration:
+                    break
+
+                updater[k] = v
+        else:
+            updater.update(items)
+
+    updater.update(kwargs)
+    return updater
+
+
+# Template for the auto-documentation of each param
+_DOC_TMPL = ' '.join([
+    '  - {}:',
+    '(default: {})',
+    '(required: {})',
+    '(type: {})',
+    '(transform: {})',
+    '(argparse: {})',
+    '(group: {})',
+    '(choices: {})',
+    '(alias: {})',
+    '\n{}',
+])
 
 
 class ParamsMeta(type):
     def __new__(meta, name, bases, dct, **kwargs):
         # Normalize the info passed by the parent classes of the host
         pbases = dct.pop('pbases', [{}])
+        if dct.pop('pfrozen', False):  # instances will be read-only snapshots
+            dct['__setattr__'] = dct['__delattr__'] = _frozen_setattr
 
         pdct = {}  # params dictionary for class creation
         for pbase in pbases[:-1]:  # all bases definitions except last (new)
@@ -89,8 +431,8 @@ class ParamsMeta(type):
             for k in pbasedct:
                 if k in pdct:  # other base(s) have added/update the key before
                     pdct[k].update(pbasedct[k])
-                else:
-                    pdct[k] = pbasedct[k]  # set it for the 1st element
+                else:  # copy it, the definition in the base must not change
+                    pdct[k] = dict(pbasedct[k])  # set it for the 1st element
 
         nparams = pbases[-1]  # last is new declaration
         if not isinstance(nparams, dict):  # support non-dict declaration
@@ -125,10 +467,11 @@ class ParamsMeta(type):
 
             nparams = ndct
 
-        else:
-            for k, v in nparams.items():  # convert items which are not dicts
-                if not isinstance(v, dict):
-                    nparams[k] = {NAME_VAL: v}
+        else:  # copy: the declaration may be shared and must not change
+            nparams = {k: dict(v) if isinstance(v, dict) else {NAME_VAL: v}
+                       for k, v in nparams.items()}
+
+        ndecl = _fpdecl(nparams)  # keep for the fingerprint
 
         # Update the global params dict with the new definition
         for k, v in nparams.items():  # guaranteed to be a dict
@@ -158,23 +501,28 @@ class ParamsMeta(type):
 
             pdct[k] = v  # store the complete param definition
 
-        # Now ... auto-document
-        ptmpl = ['  - {}:']
-        ptmpl += ['(default: {})']
-        ptmpl += ['(required: {})']
-        ptmpl += ['(type: {})']
-        ptmpl += ['(transform: {})']
-        ptmpl += ['(argparse: {})']
-        ptmpl += ['(group: {})']
-        ptmpl += ['(choices: {})']
-        ptmpl += ['(alias: {})']
-        ptmpl += ['\n{}']
-        ptmpl = ' '.join(ptmpl)
+        # Now ... auto-document, reusing the expensive part (wrapping the docs)
+        # from the definitions cache if possible
+        defcache = cache.active()
+        entry = None
+        if defcache is not None:
+            fingerprint = _fpcalc(pbases[:-1], ndecl)
+            if fingerprint[0] == _FP_UNSTABLE:  # would miss on every run
+                defcache = None
+            else:
+                entry = defcache.get(fingerprint)
+
+        if entry is None or entry['names'] != list(pdct):
+            vdocs = [textwrap.indent(textwrap.fill(v[NAME_DOC]), prefix='    ')
+                     for v in pdct.values()]
+            if defcache is not None:
+                defcache.put(fingerprint, {'names': list(pdct), 'docs': vdocs})
+        else:
+            vdocs = entry['docs']
 
         doc = [NAME_DOCARGS, '\n']
-        for k, v in pdct.items():
-            vdoc = textwrap.indent(textwrap.fill(v[NAME_DOC]), prefix='    ')
-            t = ptmpl.format(
+        for (k, v), vdoc in zip(pdct.items(), vdocs):
+            t = _DOC_TMPL.format(
                 k,
                 v[NAME_VAL],
                 v[NAME_REQUIRED],
@@ -192,12 +540,17 @@ class ParamsMeta(type):
         # Create an ad-hoc Params subclass with collected values (and defaults)
         # dct contains the definition of methods, etc, ... expand with slots
         dct['__slots__'] = list(pdct.keys())
+        if not any(isinstance(b, ParamsMeta) for b in bases):  # Params itself
+            dct['__slots__'].append(SLOT_CACHE)
 
         # Generate a module_class name for indentification purposes
         cls = super().__new__(meta, name, bases, dct)
 
         # Register the defaults and the complete dict for the created class
         PARAMS[cls] = pdct  # register the defaults for the class
+        _FPSOURCES[cls] = (pbases[:-1], ndecl)  # fingerprint on demand
+        if defcache is not None:
+            FINGERPRINTS[cls] = fingerprint
         # First with Python 3.6 it is possible to use the comprehension
         # DEFAULTS[cls] = OrderedDict(k, v[NAME_VAL] for k, v in pdct.items())
         # And with 3.7
@@ -207,6 +560,28 @@ class ParamsMeta(type):
         for k, v in pdct.items():
             defscls[k] = v[NAME_VAL]
 
+        if any(NAME_MEMOIZE in v for v in pdct.values()):
+            from . import memo  # not at the top, memo imports this module
+            memo.install(pdct)
+
+        GETTERS[cls] = _getter(list(pdct))
+        constraints = _constraints(pdct, name)
+        if constraints:
+            CONSTRAINTS[cls] = constraints
+
+        lazies = {k: v[NAME_LAZY] for k, v in pdct.items() if v.get(NAME_LAZY)}
+        if lazies:
+            from . import lazy  # not at the top, lazy imports this module
+            RAWGET[cls] = lazy.install(cls, lazies)
+
+        # a params class as value declares nested params (see nested.py)
+        nesteds = {k: v[NAME_VAL] for k, v in pdct.items()
+                   if isinstance(v[NAME_VAL], ParamsMeta) and k not in lazies}
+        if nesteds:
+            from . import nested  # not at the top, nested imports this module
+            nested.install(cls, nesteds)
+            NESTED[cls] = nesteds
+
         return cls  # return the new subclass
 
     # These 3 defined here to make them work as class methods of Params
@@ -229,11 +604,18 @@ class ParamsMeta(type):
 _ERR_REQ = 'Required parameter "{}" in params "{}" not provided'
 _ERR_TYPE = 'Wrong type "{}" for param "{}" / type "{}" in params "{}"'
 _ERR_TR = 'Error transforming param "{}" with value "{}" in params "{}"'
+_ERR_TR_AWAIT = ('Transform of param "{}" in params "{}" returns an '
+                 'awaitable: create the instance with _acreate (see '
+                 'metaparams.aio)')
+_ERR_CONSTRAINT = 'Constraint "{} {} {}" not met ({!r}, {!r}) in params "{}"'
+_ERR_CONSTRAINT_FN = 'Constraint "{}" of param "{}" not met in params "{}"'
 
 
 class Params(metaclass=ParamsMeta):
     # Intended to generate subclasses dynamically for ParamsBase subclasses
-    __slots__ = []  # params are declared once. no other attributes allowed
+    # params are declared once. no other attributes allowed, except the cache
+    # of the dict of values (added to the slots by the metaclass)
+    __slots__ = []
 
     # The parameters are expressed as dictionaries. The entries are either
     # key: val
@@ -242,6 +624,10 @@ class Params(metaclass=ParamsMeta):
     # default values set to: required=False, val=None, doc=''
     def __init__(self, **kwargs):
         clsname = self.__class__.__name__
+        if self.__class__ in NESTED:  # fold "nested.name" kwargs
+            from . import nested  # not at the top, nested imports this module
+            kwargs = nested.fold(self.__class__, kwargs)
+
         # loop over the defined parameters and the default values
         for name, val in PARAMS[self.__class__].items():
             if name not in kwargs:
@@ -251,30 +637,37 @@ class Params(metaclass=ParamsMeta):
                     raise ValueError(errmsg)
 
                 # Not provided, not required, use the default value
-                setattr(self, name, val[NAME_VAL])
+                _osetattr(self, name, val[NAME_VAL])
 
             else:  # name is provided in kwargs
-                v = kwargs[name]
-                # See if type check is needed
-                t = val[NAME_TYPE]
-                if t and not isinstance(v, t):
-                    errmsg = _ERR_TYPE.format(type(v), name, t, clsname)
-                    raise TypeError(errmsg)
-
-                # Check if transformation is needed and apply it
-                tr = val[NAME_TRANSFORM]
-                if tr:
-                    try:
-                        v = tr(v)
-                    except Exception as e:
-                        errmsg = _ERR_TR.format(name, v, clsname)
-                        raise ValueError(errmsg)
+                # type check and transform (if needed) and set the parameter
+                _osetattr(self, name, self._validate(name, kwargs[name]))
 
-                # everything worked out, set the parameter
-                setattr(self, name, v)
+        if self.__class__ in CONSTRAINTS:
+            self._check()
 
     def __str__(self):
-        return str(self._kwargs())
+        return str(_cached(self))
+
+    # writes invalidate the cached dict of values. The hook costs about
+    # 0.5us per single write (benchmarks/bench_views.py), the bulk writes of
+    # _update/_reset and of the pool bypass it and invalidate once
+    def __setattr__(self, name, value):
+        _osetattr(self, name, value)
+        _osetattr(self, SLOT_CACHE, None)
+
+    def __delattr__(self, name):
+        object.__delattr__(self, name)
+        _osetattr(self, SLOT_CACHE, None)
+
+    def __reduce__(self):
+        # pickled by reference to the host class and the tuple of raw values
+        cls = self.__class__
+        values = _getvalues(self)
+        for pickler in PICKLERS:
+            values = pickler(values)
+
+        return _unpickle, (CLS.get(cls, cls), values)
 
     @classmethod
     def __iter__(cls):
@@ -285,22 +678,55 @@ class Params(metaclass=ParamsMeta):
         return len(DEFAULTS[cls])
 
     def __getitem__(self, key):
-        return getattr(self, key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            name, dot, rest = key.partition('.')
+            if not dot:
+                raise
+
+        return getattr(self, name)[rest]  # "nested.name"
 
     def __setitem__(self, key, val):
-        setattr(self, key, val)
+        if '.' in key:
+            self._update({key: val})  # "nested.name", replaces the nested
+        else:
+            setattr(self, key, val)
 
     @classmethod
     def _remaining(cls, **kwargs):
         '''Returns the keywords arguments which are not consumed by this Params
         class'''
-        return {k: v for k, v in kwargs.items() if k not in cls}
+        nesteds = NESTED.get(cls)
+        if nesteds is None:
+            return {k: v for k, v in kwargs.items() if k not in cls}
+
+        return {k: v for k, v in kwargs.items()
+                if k not in cls and k.partition('.')[0] not in nesteds}
 
     @classmethod
     def _defkwargs(cls):
         '''Returns a dict with the default values of the params'''
         return DEFAULTS[cls].copy()
 
+    @classmethod
+    def _defview(cls):
+        '''Returns a read-only view (not a copy) of the dict with the default
+        values of the params'''
+        return types.MappingProxyType(DEFAULTS[cls])
+
+    @classmethod
+    def _pdefview(cls):
+        '''Returns a read-only view of the complete definitions of the params:
+        name -> read-only view of the definition'''
+        try:
+            return _PDEFVIEWS[cls]
+        except KeyError:
+            pass
+
+        views = {k: types.MappingProxyType(v) for k, v in PARAMS[cls].items()}
+        return _PDEFVIEWS.setdefault(cls, types.MappingProxyType(views))
+
     @classmethod
     def _defkeys(cls):
         '''Returns the define param names as an iterable'''
@@ -327,27 +753,35 @@ class Params(metaclass=ParamsMeta):
         '''Returns the parameter names as an iterable'''
         return DEFAULTS[cls].keys()  # keys are unique, unlike values
 
+    # The methods returning actual values return the raw values of lazy
+    # params, not the loaded objects
     def _values(self):
         '''Returns the parameter actual values as an iterable'''
-        return (getattr(self, k) for k in self)
+        return iter(_getvalues(self))
 
     def _value(self, name):
         '''Returns the actual value for parameter ``name``'''
-        return getattr(self, name)
+        return RAWGET.get(self.__class__, getattr)(self, name)
 
     def _items(self):
         '''Returns the names and actual values for the params as an iterable
         of pairs'''
-        return ((k, getattr(self, k)) for k in self)
+        return zip(DEFAULTS[self.__class__], _getvalues(self))
 
     def _kwargs(self):
-        '''Returns a dict with the actual values of the params'''
-        return {k: getattr(self, k) for k in self}
+        '''Returns a dict with the actual values of the params. The dict is
+        cached in the instance until a param is set and a copy is returned'''
+        return _cached(self).copy()
+
+    def _view(self):
+        '''Returns a live read-only mapping of the names to the actual values
+        of the params (see ``ParamsView``)'''
+        return ParamsView(self)
 
     def _isdefault(self, name):
         '''Returns a boolean indicating if param ``name`` has the default
         value'''
-        return getattr(self, name) == DEFAULTS[self.__class__][name]
+        return self._value(name) == DEFAULTS[self.__class__][name]
 
     @classmethod
     def _isrequired(cls, name):
@@ -386,14 +820,80 @@ class Params(metaclass=ParamsMeta):
 
         return p[prop]  # Let it raise exception if not preset
 
+    @classmethod
+    def _fingerprint(cls):
+        '''Returns a string which identifies the definition of the params
+        (names, default values, checks, ...) including the inherited ones.
+        Two classes with the same definition have the same fingerprint, also
+        across runs, unless values have the default ``repr`` of objects (the
+        fingerprint then starts with ``~`` and is not used by caches)'''
+        return _fingerprint(cls)
+
+    def _digest(self):
+        '''Returns a string which identifies the definition of the params
+        (see ``_fingerprint``) and the actual values of this instance'''
+        values = _canon(tuple(self._values()))
+        h = hashlib.sha1(_fingerprint(self.__class__).encode('utf-8'))
+        h.update(values.encode('utf-8'))
+        return h.hexdigest()
+
+    @classmethod
+    def _validate(cls, name, value):
+        '''Checks ``value`` against the type defined for param ``name`` and
+        applies the defined transformation if any.
+
+        Returns the value which would be set for the param or raises the same
+        exceptions as during instantiation'''
+        pdef = PARAMS[cls][name]
+        # See if type check is needed
+        t = pdef[NAME_TYPE]
+        if t and not isinstance(value, t):
+            errmsg = _ERR_TYPE.format(type(value), name, t, cls.__name__)
+            raise TypeError(errmsg)
+
+        # Check if transformation is needed and apply it
+        tr = pdef[NAME_TRANSFORM]
+        if tr:
+            try:
+                value = tr(value)
+            except Exception as e:
+                errmsg = _ERR_TR.format(name, value, cls.__name__)
+                raise ValueError(errmsg)
+
+            if isinstance(value, collections.abc.Awaitable):  # async def
+                if hasattr(value, 'close'):  # not left unawaited
+                    value.close()
+
+                raise TypeError(_ERR_TR_AWAIT.format(name, cls.__name__))
+
+        return value
+
+    def _check(self):
+        '''Checks the constraints between params (``constraints`` entry of
+        the definitions) and raises ``ValueError`` if one is not met. Done
+        during instantiation, to be called after updating the values'''
+        cls = self.__class__
+        values = _cached(self)
+        for name, op, other in CONSTRAINTS.get(cls, ()):
+            if other is None:
+                if not op(dict(values)):
+                    fname = getattr(op, '__name__', op)
+                    raise ValueError(
+                        _ERR_CONSTRAINT_FN.format(fname, name, cls.__name__))
+
+            elif not CONSTRAINT_OPS[op](values[name], values[other]):
+                errmsg = _ERR_CONSTRAINT.format(name, op, other, values[name],
+                                                values[other], cls.__name__)
+                raise ValueError(errmsg)
+
     def _reset(self, name=None):
         '''Reset parameter ``name`` if given, else reset all to the default
         values'''
+        defaults = DEFAULTS[self.__class__]
         if name:
-            setattr(self, name, self._defvalue(name))
+            setattr(self, name, defaults[name])
         else:
-            for k, v in self._defitems():
-                setattr(self, k, v)
+            _setvalues(self, defaults.items())
 
     def _update(self, *args, **kwargs):
         '''Update the current values of the params with
@@ -401,27 +901,31 @@ class Params(metaclass=ParamsMeta):
           - dict-like or other params (passed without expansion as *args)
           - **kwargs: keywords arguments
         '''
-        # individual args are dict-like or tuples/lists of pairs
-        for arg in args:
-            try:
-                items = dict(**arg)
-            except TypeError:  # ** not supported
-                items = iter(arg)  # iterable with pairs ((a, b), (c, d)...)
-                # Do this to let other exceptions be raised
-                while True:
-                    try:
-                        k, v = next(items)
-                    except StopIteration:
-                        break
+        values = _collect(args, kwargs)
+        if self.__class__ in NESTED:  # "nested.name" replaces the nested
+            from . import nested  # not at the top, nested imports this module
+            values = nested.fold(self.__class__, values, self)
 
-                    setattr(self, k, v)
-            else:
-                for k, v in items.items():
-                    setattr(self, k, v)
+        _setvalues(self, values.items())
+
+    def _replace(self, *args, **kwargs):
+        '''Returns a new instance with the values of this one, updated (after
+        type checking and transformation) with the same arguments as
+        ``_update``. The instance itself is not modified, which is the way to
+        update params which are snapshots'''
+        values = _collect(args, kwargs)
+        if self.__class__ in NESTED:  # "nested.name" replaces the nested
+            from . import nested  # not at the top, nested imports this module
+            values = nested.fold(self.__class__, values, self)
 
-        # Now process kwargs (could recurse self._update(kwargs.items()))
-        for k, v in kwargs.items():
-            setattr(self, k, v)
+        for k, v in values.items():
+            values[k] = self._validate(k, v)
+
+        new = _derive(self, values)
+        if new.__class__ in CONSTRAINTS:
+            new._check()
+
+        return new
 
     @classmethod
     def _group(cls, name):
@@ -440,7 +944,7 @@ class Params(metaclass=ParamsMeta):
         return PARAMS[cls][name][NAME_ARGALIAS]
 
     @classmethod
-    def _argparse(cls, parser, group=None, skip=True, minus=True):
+    def _argparse(cls, parser, group=None, skip=True, minus=True, prefix=''):
         '''Autogenerate command line switches for an argparse parser.
 
         If ``group`` is given (``str``), use it to create a group under which
@@ -451,20 +955,37 @@ class Params(metaclass=ParamsMeta):
 
         if ``minus`` is ``True``, then ``_`` (underscores) in the param name
         will be replaced with ``-`` (minus) to improve readability.
+
+        The values are converted from strings with the converters compiled
+        from the definition (see ``metaparams.convert``)
+
+        The switches of nested params are added with the name of the nested
+        param as ``prefix`` (``--sizer.stake``), grouped under that name
         '''
+        from . import convert  # not at the top, convert imports this module
+
+        convs = convert.converters(cls)
         if group:
             parser = parser.add_argument_group(title=group)
 
         pgroups = {None: parser}  # to keep track of grouping for options
+        nesteds = NESTED.get(cls, {})
 
         for p in cls:
             if skip and p[-1] == '_':
                 continue
 
+            if p in nesteds:
+                nesteds[p]._argparse(parser, group=None if group else p,
+                                     skip=skip, minus=minus,
+                                     prefix=prefix + p + '.')
+                continue
+
             pkwargs = dict(
                 help=cls._doc(p),
                 required=cls._isrequired(p),
                 default=cls._defvalue(p),
+                type=convs[p],
             )
 
             grp = cls._group(p)  # before replacing _ to -
@@ -481,7 +1002,8 @@ class Params(metaclass=ParamsMeta):
                 pkwargs['choices'] = choices
 
             # Add the aliases
-            palias = ['-' + x for x in cls._alias(p) or []]
+            palias = ['-' + prefix + x for x in cls._alias(p) or []]
+            p = prefix + p
 
             if minus:  # last action to avoid breaking identifiers
                 p = p.replace('_', '-')
@@ -491,7 +1013,7 @@ class Params(metaclass=ParamsMeta):
             pgroup.add_argument('--' + p, *palias, **pkwargs)
 
     @classmethod
-    def _parseargs(cls, args, skip=True):
+    def _parseargs(cls, args, skip=True, prefix=''):
         '''Use an object ``args`` containing parsed arguments and use the values to
         update the values of the defined parameters
 
@@ -502,14 +1024,33 @@ class Params(metaclass=ParamsMeta):
         method ``_argparse``, because the ``Argparse`` object automatically
         replaces ``-`` (minus) with ``_`` (underscore), because the former is
         not a valid character for Python identifiers.
+
+        String values are converted (see ``metaparams.convert``). Values
+        which are the default value (not given in the command line) are not
+        included, as if they had not been passed
+
+        The values of nested params are returned as ``nested.name``
         '''
+        from . import convert  # not at the top, convert imports this module
+
+        convs = convert.converters(cls)
+        defaults = DEFAULTS[cls]
+        nesteds = NESTED.get(cls, {})
         updater = {}
         for p in cls:
             if skip and p[-1] == '_':
                 continue
 
-            if hasattr(args, p):
-                updater[p] = getattr(args, p)
+            if p in nesteds:
+                sub = nesteds[p]._parseargs(args, skip=skip,
+                                            prefix=prefix + p + '.')
+                updater.update((p + '.' + k, v) for k, v in sub.items())
+                continue
+
+            if hasattr(args, prefix + p):
+                val = getattr(args, prefix + p)
+                if val is not defaults[p]:
+                    updater[p] = convs[p](val)
 
         return updater
 
@@ -530,6 +1071,105 @@ class Params(metaclass=ParamsMeta):
         return hostcls(**cls._parseargs(args, skip=skip))
 
 
+class ParamsView(collections.abc.Mapping):
+    '''Read-only mapping over a params instance, which always shows the
+    current values. ``values`` and ``items`` read all the values at once and
+    return tuples'''
+    __slots__ = ['_params']
+
+    def __init__(self, params):
+        self._params = params
+
+    def __getitem__(self, name):
+        params = self._params
+        if name not in DEFAULTS[params.__class__]:
+            raise KeyError(name)
+
+        return params._value(name)
+
+    def __iter__(self):
+        return iter(DEFAULTS[self._params.__class__])
+
+    def __len__(self):
+        return len(DEFAULTS[self._params.__class__])
+
+    def __contains__(self, name):
+        return name in DEFAULTS[self._params.__class__]
+
+    def keys(self):
+        return DEFAULTS[self._params.__class__].keys()
+
+    def values(self):
+        return _getvalues(self._params)
+
+    def items(self):
+        params = self._params
+        return tuple(zip(DEFAULTS[params.__class__], _getvalues(params)))
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, _cached(self._params))
+
+
+def _shortname(pname):
+    '''Returns the shortcut for params name ``pname``'''
+    return pname[0:1 + (pname[0] == '_')]  # respect leading _
+
+
+def _live_accessor(pname, name):
+    '''Returns a descriptor for the host class which reads/writes param
+    ``name`` of the params instance installed as ``pname``'''
+    def fset(self, value):
+        setattr(getattr(self, pname), name, value)
+
+    # attrgetter does the 2 lookups in C, faster than a python descriptor
+    return property(operator.attrgetter(pname + '.' + name), fset)
+
+
+class _HostPool:
+    '''Released host instances of a class, the statistics and what is needed
+    to quickly reset and reinstall the params of the instances'''
+    __slots__ = ['objs', 'ids', 'maxsize', 'hits', 'misses', 'released',
+                 'dropped', 'defaults', 'required']
+
+    def __init__(self, pcls, maxsize):
+        self.objs = []
+        self.ids = set()  # of the objs, to refuse releasing them twice
+        self.maxsize = maxsize
+        self.hits = self.misses = self.released = self.dropped = 0
+        self.defaults = tuple(DEFAULTS[pcls].items())
+        self.required = tuple(k for k in pcls if pcls._isrequired(k))
+
+
+_ERR_SPECIAL = 'Param "{}" to specialize is not defined in "{}"'
+_ERR_RELEASE_CLS = 'Cannot release an instance of "{}" to the pool of "{}"'
+_ERR_RELEASED = 'Instance of "{}" already released to the pool'
+
+
+def _special(cls, defaults):
+    '''Unpickles a specialized host class'''
+    return cls._specialize(**defaults)
+
+
+def _reduce_host(cls):
+    '''Pickles host classes (with the metaclass of a specialized one): by
+    name, or as the call to ``_specialize`` (the name cannot be imported)'''
+    special = SPECIALIZED.get(cls)
+    if special is None:
+        return cls.__qualname__
+
+    return _special, special
+
+
+def _specialkey(cls, defaults):
+    key = tuple(sorted(defaults.items()))
+    try:
+        hash(key)
+    except TypeError:  # unhashable values
+        key = _canon(key)
+
+    return cls, key
+
+
 class MetaParams(MetaFrame):
     '''Metaclass or Paramsbase, which cooperates with gathers information
     during class creation to first dynamically attach subclassess of ``Params``
@@ -548,6 +1188,8 @@ class MetaParams(MetaFrame):
             pname = getattr(meta, KWARG_PNAME)
             pshort = getattr(meta, KWARG_PSHORT)
             pinst = getattr(meta, KWARG_PINST)
+            psnap = getattr(meta, KWARG_PSNAP)
+            ppool = getattr(meta, KWARG_PPOOL)
         elif bases:
             bcls = [b for b in bases if b in PSETTING]  # get bases with params
 
@@ -569,16 +1211,25 @@ class MetaParams(MetaFrame):
 
             # Get the defaults from the base class if any or global defs
             # override if the class declaration says something else
-            pshortdef = PSETTING[b].get(KWARG_PSHORT, PARAM_SHORT)
+            bsetting = PSETTING.get(b, {})  # no [] to not insert None
+            pshortdef = bsetting.get(KWARG_PSHORT, PARAM_SHORT)
             pshort = kwargs.get(KWARG_PSHORT, pshortdef)
 
-            pinstdef = PSETTING[b].get(KWARG_PINST, PARAM_INST)
+            pinstdef = bsetting.get(KWARG_PINST, PARAM_INST)
             pinst = kwargs.get(KWARG_PINST, pinstdef)
 
+            psnapdef = bsetting.get(KWARG_PSNAP, PARAM_SNAP)
+            psnap = kwargs.get(KWARG_PSNAP, psnapdef)
+
+            ppooldef = bsetting.get(KWARG_PPOOL, PARAM_POOL)
+            ppool = kwargs.get(KWARG_PPOOL, ppooldef)
+
         else:  # no bases defined, used provided kwargs or defaults
             pname = kwargs.get(KWARG_PNAME, PARAM_NAME)
             pshort = kwargs.get(KWARG_PSHORT, PARAM_SHORT)
-            pinst = kwargs.get(KWARG_PSHORT, PARAM_INST)
+            pinst = kwargs.get(KWARG_PINST, PARAM_INST)
+            psnap = kwargs.get(KWARG_PSNAP, PARAM_SNAP)
+            ppool = kwargs.get(KWARG_PPOOL, PARAM_POOL)
 
         pbases = []  # collect params definitions from bases
         for b in bases:
@@ -595,7 +1246,7 @@ class MetaParams(MetaFrame):
 
         modname = dct.get('__module__', '').replace('.', '_')
         pclsname = '_'.join((modname, name, pname))
-        pcls = type(pclsname, (Params,), {'pbases': pbases})
+        pcls = type(pclsname, (Params,), {'pbases': pbases, 'pfrozen': psnap})
         dct[pname] = pcls
 
         # Update documentation
@@ -604,23 +1255,50 @@ class MetaParams(MetaFrame):
 
         cls = super().__new__(meta, name, bases, dct)  # create class
 
-        # Keep actual settings in register for new class
-        PSETTING[cls][KWARG_PNAME] = pname
-        PSETTING[cls][KWARG_PSHORT] = pshort
-        PSETTING[cls][KWARG_PINST] = pinst
+        # Keep actual settings in register for new class (complete at once)
+        PSETTING[cls] = {
+            KWARG_PNAME: pname,
+            KWARG_PSHORT: pshort,
+            KWARG_PINST: pinst,
+            KWARG_PSNAP: psnap,
+            KWARG_PPOOL: ppool,
+        }
+        if ppool:
+            POOLS[cls] = _HostPool(pcls, ppool)
 
         CLS[pcls] = cls  # reverse binding to host class
 
+        if pinst == PARAM_INST_LIVE and pshort:  # install class level access
+            shortname = _shortname(pname)
+            for p in pcls:
+                pinstname = '{}_{}'.format(shortname, p)
+                if pinstname not in dct:  # respect the definitions in host
+                    setattr(cls, pinstname, _live_accessor(pname, p))
+
         # pclsname = '_'.join((cls.__module__.replace('.', '_'), name, pname))
         # setattr(cls, pname, pcls)  # install params class as class attribute
 
         return cls
 
     def _new_do(cls, *args, **kwargs):
-        pname = PSETTING[cls][KWARG_PNAME]
-        pshort = PSETTING[cls][KWARG_PSHORT]
-        pinst = PSETTING[cls][KWARG_PINST]
+        if KWARG_PPARAMS in kwargs:  # prebuilt params, values used unchecked
+            params = kwargs.pop(KWARG_PPARAMS)
+            self, args, kwargs = super()._new_do(*args, **kwargs)
+            cls._pinstall(self, params)
+            return self, args, kwargs
+
+        pool = POOLS.get(cls)
+        if pool is not None:
+            try:
+                self = pool.objs.pop()
+            except IndexError:
+                pool.misses += 1
+            else:
+                pool.ids.discard(id(self))
+                pool.hits += 1
+                return cls._new_reuse(pool, self, *args, **kwargs)
 
+        pname = PSETTING[cls][KWARG_PNAME]
         params = getattr(cls, pname)(**kwargs)  # create a params instance
 
         kwargs = params._remaining(**kwargs)  # get the params not consumed
@@ -628,24 +1306,261 @@ class MetaParams(MetaFrame):
         # create class instance with the parameters not consumed by params
         self, args, kwargs = super()._new_do(*args, **kwargs)
 
+        cls._pinstall(self, params)  # install params instance in instance
+        return self, args, kwargs  # return the expected values
+
+    def _new_reuse(cls, pool, self, *args, **kwargs):
+        # self comes from the pool with the params reset to the defaults (or
+        # with a snapshot which may still be referenced and is not reused)
+        psetting = PSETTING[cls]
+        params = getattr(self, psetting[KWARG_PNAME])
+        if psetting[KWARG_PSNAP]:
+            params = params.__class__(**kwargs)
+            kwargs = params._remaining(**kwargs)
+            cls._pinstall(self, params)
+            return self, args, kwargs
+
+        for name in pool.required:
+            if name not in kwargs:
+                errmsg = _ERR_REQ.format(name, params.__class__.__name__)
+                raise ValueError(errmsg)
+
+        defaults = DEFAULTS[params.__class__]
+        if params.__class__ in NESTED:  # fold "nested.name" kwargs
+            from . import nested  # not at the top, nested imports this module
+            kwargs = nested.fold(params.__class__, kwargs)
+
+        remaining = {}
+        for name, val in kwargs.items():
+            if name in defaults:
+                _osetattr(params, name, params._validate(name, val))
+            else:
+                remaining[name] = val
+
+        _osetattr(params, SLOT_CACHE, None)
+        if params.__class__ in CONSTRAINTS:
+            params._check()
+
+        if psetting[KWARG_PINST]:  # refresh the copies of the values
+            cls._pinstall(self, params)
+
+        return self, args, remaining
+
+    def _release(cls, obj):
+        '''Returns the instance ``obj`` of ``cls`` to the pool of the class
+        (if one has been configured with ``_ppool``) to be reused during
+        instantiation. ``__init__`` will be called again on reuse.
+
+        The params are reset to the defaults to release the references to
+        the values. ``obj`` must no longer be used after the call.
+
+        Raises ``TypeError`` if ``obj`` is not an instance of ``cls`` itself
+        and ``ValueError`` if it is already in the pool'''
+        if type(obj) is not cls:
+            errmsg = _ERR_RELEASE_CLS.format(type(obj).__name__, cls.__name__)
+            raise TypeError(errmsg)
+
+        pool = POOLS.get(cls)
+        if pool is None:
+            return
+
+        if id(obj) in pool.ids:
+            raise ValueError(_ERR_RELEASED.format(cls.__name__))
+
+        if len(pool.objs) >= pool.maxsize:
+            pool.dropped += 1
+            return
+
+        psetting = PSETTING[cls]
+        if not psetting[KWARG_PSNAP]:
+            params = getattr(obj, psetting[KWARG_PNAME])
+            for k, v in pool.defaults:
+                _osetattr(params, k, v)
+
+            _osetattr(params, SLOT_CACHE, None)
+
+        pool.released += 1
+        pool.ids.add(id(obj))
+        pool.objs.append(obj)
+
+    @contextlib.contextmanager
+    def _pooled(cls, *args, **kwargs):
+        '''Context manager which returns an instance of ``cls`` (created with
+        ``args`` and ``kwargs``) and releases it to the pool at the end'''
+        obj = cls(*args, **kwargs)
+        try:
+            yield obj
+        finally:
+            cls._release(obj)
+
+    def _poolstats(cls):
+        '''Returns a dict with the statistics of the pool of ``cls`` or
+        ``None`` if the class has no pool'''
+        pool = POOLS.get(cls)
+        if pool is None:
+            return None
+
+        return dict(
+            size=len(pool.objs),
+            maxsize=pool.maxsize,
+            hits=pool.hits,
+            misses=pool.misses,
+            released=pool.released,
+            dropped=pool.dropped,
+        )
+
+    async def _acreate(cls, *args, limit=None, **kwargs):
+        '''Coroutine returning an instance of ``cls``, awaiting concurrently
+        the params transforms which are coroutine functions (at most
+        ``limit`` at the same time, see ``metaparams.aio``)'''
+        from . import aio  # not at the top, aio imports this module
+        return await aio.acreate(cls, *args, limit=limit, **kwargs)
+
+    def _specialize(cls, **defaults):
+        '''Returns a subclass of ``cls`` in which the params have the given
+        ``defaults``. The subclass is created once for each set of defaults.
+
+        Unlike a subclass declaring ``params``, it shares the definition (and
+        the slots) of the params of ``cls`` and only the defaults change'''
+        key = _specialkey(cls, defaults)
+        try:
+            return SPECIALS[key]
+        except KeyError:
+            pass
+
+        with _REGLOCK:  # created and registered only once
+            if key in SPECIALS:
+                return SPECIALS[key]
+
+            psetting = PSETTING[cls]
+            pname = psetting[KWARG_PNAME]
+            pcls = getattr(cls, pname)
+            pdct = PARAMS[pcls].copy()
+            for k, v in defaults.items():
+                if k not in pdct:
+                    raise ValueError(_ERR_SPECIAL.format(k, cls.__name__))
+
+                t = pdct[k][NAME_TYPE]
+                if t and not isinstance(v, t):
+                    errmsg = _ERR_TYPE.format(type(v), k, t, cls.__name__)
+                    raise TypeError(errmsg)
+
+                pdct[k] = dict(pdct[k], **{NAME_VAL: v})
+
+            if pcls in CONSTRAINTS:  # the new defaults must meet them
+                _build(pcls, dict(DEFAULTS[pcls], **defaults))._check()
+
+            # name shows the defaults, e.g.: Host[period=20]
+            args = ', '.join('{}={!r}'.format(k, v)
+                             for k, v in defaults.items())
+            name = '{}[{}]'.format(cls.__name__, args)
+
+            # no new slots: the descriptors of the base params class are used
+            pdoc = {'__slots__': (), '__doc__': pcls.__doc__}
+            spcls = type.__new__(ParamsMeta, name, (pcls,), pdoc)
+            PARAMS[spcls] = pdct
+            DEFAULTS[spcls] = dict(DEFAULTS[pcls], **defaults)
+            GETTERS[spcls] = GETTERS[pcls]
+            if pcls in CONSTRAINTS:
+                CONSTRAINTS[spcls] = CONSTRAINTS[pcls]
+            if pcls in NESTED:
+                NESTED[spcls] = NESTED[pcls]
+            ndecl = _fpdecl({k: {NAME_VAL: v} for k, v in defaults.items()})
+            _FPSOURCES[spcls] = ([pcls], ndecl)
+            if pcls in RAWGET:
+                RAWGET[spcls] = RAWGET[pcls]
+
+            hdct = {pname: spcls, '__doc__': cls.__doc__,
+                    '__module__': cls.__module__}
+            scls = type.__new__(type(cls), name, (cls,), hdct)
+            PSETTING[scls] = dict(psetting)
+            if psetting[KWARG_PPOOL]:
+                POOLS[scls] = _HostPool(spcls, psetting[KWARG_PPOOL])
+
+            CLS[spcls] = scls
+            SPECIALIZED[scls] = (cls, dict(defaults))
+            copyreg.pickle(type(cls), _reduce_host)  # not importable by name
+            SPECIALS[key] = scls
+            return scls
+
+    def _pinstall(cls, self, params):
+        '''Installs the ``params`` instance (and the shortcuts if configured)
+        in the instance ``self`` of ``cls``'''
+        pname = PSETTING[cls][KWARG_PNAME]
+        pshort = PSETTING[cls][KWARG_PSHORT]
+        pinst = PSETTING[cls][KWARG_PINST]
+
         setattr(self, pname, params)  # install params instance in instance
+        shortname = _shortname(pname)
         if pshort and len(pname) > 1:  # install shortcut if requested
-            # respect leading _
-            shortname = pname[0:1 + (pname[0] == '_')]
             setattr(self, shortname, params)
 
-        if pinst and pshort:
+        if pinst and pshort and pinst != PARAM_INST_LIVE:
             for p, v in params._items():
                 setattr(self, '{}_{}'.format(shortname, p), v)
 
-        return self, args, kwargs  # return the expected values
-
 
 class ParamsBase(metaclass=MetaParams):
     '''Base class to create subclasses which support the params pattern'''
     pass
 
 
+_DECOMETAS = {}  # keeps the metaclasses created by the decorator
+
+
+def _decometa(pname, pshort, pinst, psnap, ppool):
+    '''Returns the (cached) MetaParams subclass for the given settings'''
+    key = (pname, pshort, pinst, psnap, ppool)
+    try:
+        return _DECOMETAS[key]
+    except KeyError:
+        pass
+
+    metadct = {
+        KWARG_PNAME: pname,
+        KWARG_PSHORT: pshort,
+        KWARG_PINST: pinst,
+        KWARG_PSNAP: psnap,
+        KWARG_PPOOL: ppool,
+    }
+    newmeta = type('MetaParamsDecorator', (MetaParams,), metadct)
+    return _DECOMETAS.setdefault(key, newmeta)
+
+
+def _rebuild(meta, cls, pname, pattr):
+    '''Recreates ``cls`` with metaclass ``meta`` and ``pattr`` as the params
+    declaration under ``pname``. Returns ``None`` if not possible'''
+    dct = dict(cls.__dict__)
+    if '__slots__' in dct or type(cls) is not type:
+        return None  # slot descriptors or own metaclass, leave untouched
+
+    dct.pop('__dict__', None)  # automatically (re)created by type
+    dct.pop('__weakref__', None)
+    dct[pname] = pattr
+    newcls = meta(cls.__name__, cls.__bases__, dct)
+
+    # zero-argument super() in methods refers to cls via a closure cell
+    funcs = []
+    for obj in dct.values():
+        if isinstance(obj, (classmethod, staticmethod)):
+            funcs.append(obj.__func__)
+        elif isinstance(obj, property):
+            funcs.extend((obj.fget, obj.fset, obj.fdel))
+        else:
+            funcs.append(obj)
+
+    with _REGLOCK:  # the functions may be shared with other classes
+        for func in funcs:
+            for cell in getattr(func, '__closure__', None) or ():
+                try:
+                    if cell.cell_contents is cls:
+                        cell.cell_contents = newcls
+                except ValueError:  # empty cell
+                    pass
+
+    return newcls
+
+
 def metaparams(*args, **kwargs):
     '''Decorator to make a class "Params"-enabled
     Args:
@@ -655,31 +1570,51 @@ def metaparams(*args, **kwargs):
         _pshort (def: True):
             Install a 1-letter alias of the Params instance (if the original
             name is longer than 1 and respecting a leading underscore if any)
+        _pinst (def: False):
+            Install the values of the params as ``p_name`` attributes in the
+            instance. With ``'live'``, ``p_name`` are accessors installed
+            once in the class, which always return the current values
+        _psnap (def: False):
+            Params instances are immutable snapshots which are replaced as a
+            whole (see ``metaparams.snapshot``) rather than modified
+        _ppool (def: 0):
+            Keep up to this number of released instances (see
+            ``MetaParams._release``) for reuse during instantiation
+        _pinplace (def: False):
+            Recreate the decorated class with the params metaclass instead
+            of subclassing it, which keeps the MRO as declared. Not possible
+            (and the subclass is created) if the class defines ``__slots__``
     '''
     # done here to support removing the () call with the args checks below
     # if func defintion had kwargs _pname/_pshort the check would not succeed
     _pname = kwargs.get(KWARG_PNAME, PARAM_NAME)
     _pshort = kwargs.get(KWARG_PSHORT, PARAM_SHORT)
     _pinst = kwargs.get(KWARG_PINST, PARAM_INST)
+    _psnap = kwargs.get(KWARG_PSNAP, PARAM_SNAP)
+    _ppool = kwargs.get(KWARG_PPOOL, PARAM_POOL)
+    _pinplace = kwargs.get(KWARG_PINPLACE, PARAM_INPLACE)
 
     def real_decorator(cls):
-        # Subclass MetaParamsBase with the passed pname/pshort values
-        metadct = {
-            KWARG_PNAME: _pname,
-            KWARG_PSHORT: _pshort,
-            KWARG_PINST: _pinst,
-        }
-        newmeta = type('xxxxx', (MetaParams,), metadct)
+        # Get the MetaParams subclass with the passed pname/pshort... values
+        newmeta = _decometa(_pname, _pshort, _pinst, _psnap, _ppool)
         # Remove any params definition and let it be parsed by the subclass
         pattr = getattr(cls, _pname, {})
-        if pattr:
-            delattr(cls, _pname)
 
-        # Subclass with the new metaclass from above and the params definition
-        newcls = newmeta(cls.__name__, (cls,), {_pname: pattr})
+        newcls = None
+        if _pinplace:  # recreate the class with the new metaclass if possible
+            newcls = _rebuild(newmeta, cls, _pname, pattr)
+
+        if newcls is None:
+            with _REGLOCK:  # cls is modified
+                if _pname in cls.__dict__:
+                    delattr(cls, _pname)
+
+            # Subclass with the new metaclass and the params definition
+            newcls = newmeta(cls.__name__, (cls,), {_pname: pattr})
+
         mod = sys.modules.get(cls.__module__, None)
         if mod is not None:  # install in mod (if possible) to make it pickable
-            setattr(mod, cls.__name__, newcls)
+            setattr(mod, cls.__name__, newcls)  # a single (atomic) setattr
 
         return newcls
 
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Params whose value is another params class (nested params), for
+hierarchical configurations::
+
+    class Sizer(ParamsBase):
+        params = dict(stake=1)
+
+    class Strategy(ParamsBase):
+        params = dict(period=10, sizer=Sizer.params)
+
+    s = Strategy(**{'sizer.stake': 5})  # or sizer=dict(stake=5)
+    s.p.sizer.stake  # the nested instance is created now
+    s.p['sizer.stake']
+
+The nested instances are created on first access from the slice of kwargs
+given for them (a dict or dotted names). Until then only the kwargs are
+kept, and errors in them are raised on access.
+
+Nested instances are read-only and can be shared: the one with the default
+values is shared by all the parents which do not change it, and instances
+derived with ``_replace`` share the nested ones which are not replaced. They
+are modified through the parent, which gets a new nested instance::
+
+    s.p['sizer.stake'] = 7
+    s.p._update({'sizer.stake': 7})
+    s2 = s.p._replace(**{'sizer.stake': 7})
+
+A params instance given as value is used as it is.
+'''
+from .metaparams import (PARAMS, DEFAULTS, GETTERS, CONSTRAINTS, RAWGET,
+                         NESTED, CLS, Params, ParamsMeta, _FPSOURCES,
+                         _REGLOCK, _frozen_setattr)
+
+__all__ = ['NestedParam', 'frozen', 'shared', 'fold']
+
+_ERR_NESTED = 'Param "{}" is not defined in the nested params "{}" of "{}"'
+
+_FROZEN = {}  # params class -> read-only variant
+_SHARED = {}  # params class -> shared read-only instance with the defaults
+
+
+def frozen(pcls):
+    '''Returns the read-only variant of params class ``pcls``, created once
+    (``pcls`` itself if its instances are snapshots)'''
+    if pcls.__setattr__ is _frozen_setattr:
+        return pcls
+
+    try:
+        return _FROZEN[pcls]
+    except KeyError:
+        pass
+
+    with _REGLOCK:
+        if pcls in _FROZEN:
+            return _FROZEN[pcls]
+
+        dct = {'__slots__': (), '__doc__': pcls.__doc__,
+               '__module__': pcls.__module__,
+               '__setattr__': _frozen_setattr, '__delattr__': _frozen_setattr}
+        fcls = type.__new__(ParamsMeta, pcls.__name__, (pcls,), dct)
+        for registry in (PARAMS, DEFAULTS, GETTERS, CONSTRAINTS, RAWGET,
+                         NESTED, CLS):
+            if pcls in registry:
+                registry[fcls] = registry[pcls]
+
+        _FPSOURCES[fcls] = ([pcls], [])
+        _FROZEN[pcls] = fcls
+        return fcls
+
+
+def shared(pcls):
+    '''Returns the read-only instance of ``pcls`` with the default values,
+    shared by all the parents which use it'''
+    try:
+        return _SHARED[pcls]
+    except KeyError:
+        pass
+
+    return _SHARED.setdefault(pcls, frozen(pcls)())
+
+
+def _check(pcls, names, name, owner):
+    '''Checks that ``names`` (maybe dotted) are params of ``pcls``'''
+    nesteds = NESTED.get(pcls, {})
+    for k in names:
+        first, dot, _ = k.partition('.')
+        if first not in DEFAULTS[pcls] or (dot and first not in nesteds):
+            raise ValueError(_ERR_NESTED.format(k, name, owner.__name__))
+
+
+def fold(pcls, kwargs, params=None):
+    '''Returns ``kwargs`` with the dotted names (``sizer.stake``) of the
+    nested params of ``pcls`` folded in the value of the nested param: a
+    dict of kwargs or, if an instance is given (or taken from the current
+    values of ``params``), a new instance with those values replaced'''
+    nesteds = NESTED[pcls]
+    out, subs = {}, {}
+    for k, v in kwargs.items():
+        name, dot, rest = k.partition('.')
+        if dot and name in nesteds:
+            subs.setdefault(name, {})[rest] = v
+        else:
+            out[k] = v
+
+    for name, sub in subs.items():
+        _check(nesteds[name], sub, name, pcls)
+        base = out.get(name)
+        if base is None and params is not None:
+            base = getattr(params, name)
+
+        if isinstance(base, Params):
+            out[name] = base._replace(sub)
+        elif isinstance(base, dict):
+            out[name] = dict(base, **sub)
+        else:
+            out[name] = sub
+
+    return out
+
+
+class NestedParam:
+    '''Replaces the slot of a nested param in the params class. The slot
+    holds a params class (the default), a dict of kwargs or an instance.
+    Reading the attribute returns the instance, created if needed'''
+    __slots__ = ['slot', 'name']
+
+    def __init__(self, slot, name):
+        self.slot = slot
+        self.name = name
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+
+        raw = self.slot.__get__(obj, cls)
+        if isinstance(raw, Params):
+            return raw
+
+        if isinstance(raw, dict):
+            pcls = NESTED[obj.__class__][self.name]
+            _check(pcls, raw, self.name, obj.__class__)
+            sub = frozen(pcls)(**raw)
+        elif isinstance(raw, ParamsMeta):  # the params class (default)
+            sub = shared(raw)
+        else:  # something else has been set, e.g.: None
+            return raw
+
+        self.slot.__set__(obj, sub)  # same value, created only once
+        return sub
+
+    def __set__(self, obj, value):
+        self.slot.__set__(obj, value)
+
+    def __delete__(self, obj):
+        self.slot.__delete__(obj)
+
+
+def install(cls, nesteds):
+    '''Installs ``NestedParam`` for the nested params (``name -> params
+    class`` in ``nesteds``) of class ``cls``'''
+    for name in nesteds:
+        setattr(cls, name, NestedParam(cls.__dict__[name], name))
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Record types (namedtuple or frozen dataclass) with the same fields, order
+and defaults as a params class, for hot loops and for code which takes plain
+tuples::
+
+    Rec = record.recordtype(MyHost)
+    rec = record.to_record(host.p)
+    period, factor = rec  # positional unpacking, no attribute lookups
+    params = record.from_record(MyHost, rec)
+
+Conversions copy the references to the values (the raw values for lazy
+params) and are not checked, unless ``check=True`` is passed to
+``from_record``.
+'''
+import dataclasses
+import collections
+import keyword
+import re
+import sys
+
+from .metaparams import (PSETTING, KWARG_PNAME, CLS, DEFAULTS, _build,
+                         _getter, _getvalues)
+
+__all__ = ['recordtype', 'to_record', 'to_records', 'from_record',
+           'from_records']
+
+RECORD_NAMEDTUPLE = 'namedtuple'
+RECORD_DATACLASS = 'dataclass'
+
+_ERR_KIND = 'Unknown record kind "{}" (use "{}" or "{}")'
+_ERR_FIELD = ('Param "{}" of "{}" cannot be a field of a "{}" record (a '
+              'keyword, or with a leading underscore for a namedtuple)')
+
+_SLOTS = sys.version_info >= (3, 10)  # dataclass(slots=True)
+
+_RECORDS = {}  # (params class, kind) -> record type
+_GETTERS = {}  # record type -> getter of the tuple of values
+
+
+def _pcls(cls):
+    if cls in PSETTING:
+        return getattr(cls, PSETTING[cls][KWARG_PNAME])
+
+    return cls
+
+
+def _dataclass(name, defaults):
+    fields = []
+    for k, v in defaults.items():
+        if v.__class__.__hash__ is None:  # mutable default (list, dict ...)
+            f = dataclasses.field(default_factory=lambda v=v: v)
+        else:
+            f = dataclasses.field(default=v)
+
+        fields.append((k, object, f))
+
+    kwargs = dict(slots=True) if _SLOTS else {}
+    return dataclasses.make_dataclass(name, fields, frozen=True, **kwargs)
+
+
+def recordtype(cls, kind=RECORD_NAMEDTUPLE):
+    '''Returns the record type for params (or host) class ``cls``, created
+    once. ``kind`` is ``'namedtuple'`` or ``'dataclass'`` (frozen, with
+    slots if the Python version supports it)'''
+    pcls = _pcls(cls)
+    try:
+        return _RECORDS[pcls, kind]
+    except KeyError:
+        pass
+
+    defaults = DEFAULTS[pcls]
+    host = CLS.get(pcls, pcls)
+    for k in defaults:
+        if keyword.iskeyword(k) or (k[0] == '_' and kind == RECORD_NAMEDTUPLE):
+            raise ValueError(_ERR_FIELD.format(k, host.__name__, kind))
+
+    name = re.sub(r'\W', '_', host.__name__) + 'Record'
+    if kind == RECORD_NAMEDTUPLE:
+        rtype = collections.namedtuple(name, list(defaults),
+                                       defaults=list(defaults.values()))
+        getter = tuple
+    elif kind == RECORD_DATACLASS:
+        rtype = _dataclass(name, defaults)
+        getter = _getter(list(defaults))
+    else:
+        raise ValueError(_ERR_KIND.format(kind, RECORD_NAMEDTUPLE,
+                                          RECORD_DATACLASS))
+
+    rtype.__module__ = host.__module__
+    _GETTERS[rtype] = getter
+    return _RECORDS.setdefault((pcls, kind), rtype)
+
+
+def to_record(params, kind=RECORD_NAMEDTUPLE):
+    '''Returns a record with the values of the params instance ``params``'''
+    return recordtype(params.__class__, kind)(*_getvalues(params))
+
+
+def to_records(items, kind=RECORD_NAMEDTUPLE):
+    '''Returns a list of records for the params instances in ``items``, which
+    must be all of the same class'''
+    items = list(items)
+    if not items:
+        return []
+
+    rtype = recordtype(items[0].__class__, kind)
+    if kind == RECORD_NAMEDTUPLE:
+        return list(map(rtype._make, map(_getvalues, items)))
+
+    return [rtype(*values) for values in map(_getvalues, items)]
+
+
+def from_record(cls, record, check=False):
+    '''Returns an instance of the params class of ``cls`` (params or host
+    class) with the values in ``record`` (a record or any tuple in the order
+    of the params). With ``check`` the values are type checked and
+    transformed as during instantiation'''
+    return from_records(cls, [record], check)[0]
+
+
+def from_records(cls, records, check=False):
+    '''Returns a list of params instances for the ``records`` (see
+    ``from_record``)'''
+    pcls = _pcls(cls)
+    names = list(pcls)
+    out = []
+    for record in records:
+        getter = _GETTERS.get(record.__class__, tuple)
+        values = dict(zip(names, getter(record)))
+        out.append(pcls(**values) if check else _build(pcls, values))
+
+    return out
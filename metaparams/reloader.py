@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import json
+import os
+import threading
+import weakref
+
+from . import snapshot
+from .metaparams import PSETTING, KWARG_PNAME, CONSTRAINTS, _derive
+
+__all__ = ['FileSource', 'Reloader']
+
+
+class FileSource:
+    '''Polls a configuration file and returns its parsed content when the file
+    has changed since the last call, else ``None``
+
+      - ``path``: the file to watch
+      - ``loader``: callable receiving the open file and returning a dict-like
+        object. Defaults to ``json.load``
+    '''
+    def __init__(self, path, loader=json.load):
+        self.path = path
+        self.loader = loader
+        self._stamp = None
+
+    def __call__(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:  # not there (yet), nothing to report
+            return None
+
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self._stamp:
+            return None
+
+        with open(self.path) as f:
+            data = self.loader(f)
+
+        self._stamp = stamp  # only once the content has been parsed
+        return data
+
+
+class Reloader:
+    '''Applies changes coming from a configuration ``source`` to the params of
+    registered (live) host instances.
+
+      - ``source``: callable returning a dict-like object with new values or
+        ``None`` if nothing has changed (see ``FileSource``)
+      - ``interval``: seconds between polls when running in the background
+        (see ``start``)
+
+    Only the params which actually change are set and the changes for a host
+    are only applied if all of them pass the checks defined in the params
+    class (``type``, ``transform`` and constraints). Hosts are held with weak
+    references and are not rebuilt. The read path of the params is not
+    touched.
+
+    The changes are applied atomically: a new params instance with all of
+    them is checked and then swapped in at once (see ``snapshot.publish``),
+    also for hosts without snapshot params (``_psnap``). A reader holding the
+    previous instance keeps seeing the previous values, never half of an
+    update.
+    '''
+    def __init__(self, source, interval=1.0):
+        self.source = source
+        self.interval = interval
+        self.errors = []  # (host, exception) pairs from the last apply/poll
+        self._hosts = {}  # id(host) -> (weakref, section, callback)
+        self._lock = threading.Lock()  # serializes writers only
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, host, section=None, callback=None):
+        '''Register ``host`` to receive updates.
+
+          - ``section``: if given, the values for the host are taken from
+            ``data[section]`` rather than from the top level of the data
+          - ``callback``: called as ``callback(host, changed)`` after changes
+            have been applied, where ``changed`` is a dict with the new values
+        '''
+        hid = id(host)
+        ref = weakref.ref(host, lambda r, hid=hid: self._hosts.pop(hid, None))
+        self._hosts[hid] = (ref, section, callback)
+
+    def unregister(self, host):
+        '''Stop delivering updates to ``host``'''
+        self._hosts.pop(id(host), None)
+
+    def diff(self, host, values):
+        '''Returns a dict with the params of ``host`` which would change if
+        ``values`` were applied. The returned values have already been checked
+        and transformed, and the resulting params checked against the
+        constraints (``ValueError`` if one is not met)'''
+        params = getattr(host, PSETTING[type(host)][KWARG_PNAME])
+        changed = {}
+        for name, value in values.items():
+            if name not in params:
+                continue  # not for this host
+
+            value = params._validate(name, value)
+            if params._value(name) != value:
+                changed[name] = value
+
+        if changed and params.__class__ in CONSTRAINTS:
+            _derive(params, changed)._check()
+
+        return changed
+
+    def _apply(self, host, values):
+        with snapshot.writer(host):  # no snapshot.update in between
+            changed = self.diff(host, values)
+            if not changed:
+                return changed
+
+            # swap in a new (checked by diff) instance with all the changes
+            params = getattr(host, PSETTING[type(host)][KWARG_PNAME])
+            snapshot.publish(host, _derive(params, changed))
+
+        return changed
+
+    def apply(self, data):
+        '''Applies ``data`` to all registered hosts and returns a list of
+        ``(host, changed)`` pairs for the hosts which were updated'''
+        applied = []
+        errors = []
+        with self._lock:
+            for ref, section, callback in list(self._hosts.values()):
+                host = ref()
+                if host is None:
+                    continue
+
+                values = data if section is None else data.get(section, {})
+                try:
+                    changed = self._apply(host, values)
+                except (TypeError, ValueError) as e:
+                    errors.append((host, e))  # nothing applied for this host
+                    continue
+
+                if not changed:
+                    continue
+
+                applied.append((host, changed))
+                if callback is not None:
+                    try:
+                        callback(host, changed)
+                    except Exception as e:  # the other hosts still updated
+                        errors.append((host, e))
+
+            self.errors = errors
+
+        return applied
+
+    def poll(self):
+        '''Checks the source once and applies the changes (if any). Returns
+        the same as ``apply``'''
+        data = self.source()
+        if data is None:
+            return []
+
+        return self.apply(data)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:  # e.g.: half-written file, retried later
+                self.errors = [(None, e)]
+
+    def start(self):
+        '''Poll the source in a background (daemon) thread. Errors reading
+        the source are recorded in ``errors`` (with ``None`` as host) and the
+        polling goes on'''
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        '''Stop the background polling (if running)'''
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
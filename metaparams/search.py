@@ -0,0 +1,511 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Sampling based search over the values of params with successive halving.
+
+The search space is read from the definition of the params. Params with
+``choices`` (or of ``type`` bool) and params with an extra ``range`` entry
+take part in the search, the rest keep the default value::
+
+    class A(ParamsBase):
+        params = dict(
+            period=dict(value=10, type=int, range=(5, 50)),
+            factor=dict(value=0.5, type=float, range=(0.1, 2.0)),
+            mode=dict(value='fast', choices=['fast', 'slow']),
+        )
+
+    def objective(params, budget):
+        return run_backtest(params, bars=budget)  # higher is better
+
+    best = Search(A, objective, seed=7).run(n=81, budget=100)[0]
+
+The ``constraints`` declared between params narrow the dimensions before
+sampling (interval propagation over the ranges and choices) and the samples
+which still do not meet them are dropped. ``grid`` enumerates all the valid
+combinations (a ``step`` entry gives the values of float ranges), pruning
+the values of the params not yet assigned instead of generating and
+rejecting the combinations.
+
+Propagation is done with the values before the ``transform`` of the params.
+Constraints given as callables are only checked on complete combinations.
+'''
+import collections
+import math
+import random
+
+from .metaparams import (PSETTING, KWARG_PNAME, CLS, DEFAULTS, NAME_TYPE,
+                         NAME_ARGCHOICES, CONSTRAINTS, CONSTRAINT_OPS)
+
+__all__ = ['Dimension', 'Trial', 'Search', 'space', 'narrow', 'grid',
+           'SAMPLERS']
+
+NAME_RANGE = 'range'  # extra definition entry: (low, high) for the search
+NAME_STEP = 'step'  # extra definition entry: step of the values of a grid
+
+_ERR_SPACE = 'No param in "{}" defines choices or a range to search'
+_ERR_STEP = 'Param "{}" needs a "step" to be part of a grid'
+_ERR_EMPTY = 'The constraints leave no values for param "{}" in "{}"'
+_ERR_SAMPLER = 'Unknown sampler "{}", available: {}'
+_ERR_SOBOL = 'The sobol sampler needs scipy (scipy.stats.qmc)'
+
+Trial = collections.namedtuple('Trial', 'values score budget')
+
+
+class Dimension:
+    '''A searchable param: ``kind`` is one of ``choice``, ``int``, ``float``.
+    Maps a value in ``[0, 1)`` to a value of the param'''
+    __slots__ = ['name', 'kind', 'choices', 'low', 'high', 'step']
+
+    def __init__(self, name, kind, choices=None, low=None, high=None,
+                 step=None):
+        self.name = name
+        self.kind = kind
+        self.choices = choices
+        self.low = low
+        self.high = high
+        self.step = step
+
+    def copy(self):
+        return Dimension(self.name, self.kind, self.choices, self.low,
+                         self.high, self.step)
+
+    def empty(self):
+        if self.kind == 'choice':
+            return not self.choices
+
+        return self.low > self.high
+
+    def values(self):
+        '''Returns the list of values of the dimension for a grid'''
+        if self.kind == 'choice':
+            return list(self.choices)
+
+        step = self.step or (1 if self.kind == 'int' else None)
+        if step is None:
+            raise ValueError(_ERR_STEP.format(self.name))
+
+        n = int((self.high - self.low) / step + 1e-9) + 1  # float rounding
+        return [self.low + i * step for i in range(max(n, 0))]
+
+    def value(self, u):
+        if self.kind == 'choice':
+            n = len(self.choices)
+            return self.choices[min(int(u * n), n - 1)]
+
+        if self.kind == 'int':
+            n = self.high - self.low + 1
+            return self.low + min(int(u * n), n - 1)
+
+        return self.low + u * (self.high - self.low)
+
+
+def _pcls(cls):
+    '''Returns the params class of a host class or the class itself'''
+    if cls in PSETTING:
+        return getattr(cls, PSETTING[cls][KWARG_PNAME])
+
+    return cls
+
+
+def space(cls, ranges=None):
+    '''Returns the list of ``Dimension`` for the params class (or host class)
+    ``cls``. ``ranges`` (name -> ``(low, high)`` or list of choices) adds to
+    or overrides what the definition declares. A range may also be given as
+    ``(low, high, step)``'''
+    pcls = _pcls(cls)
+    ranges = ranges or {}
+    dims = []
+    for name in pcls:
+        ptype = pcls._get(name, NAME_TYPE)
+        rng = ranges.get(name, pcls._get(name, NAME_RANGE, default=None))
+        if isinstance(rng, (list, set, frozenset)):  # given choices
+            dims.append(Dimension(name, 'choice', choices=list(rng)))
+        elif rng is not None:
+            low, high, *step = rng
+            step = step[0] if step else pcls._get(name, NAME_STEP,
+                                                  default=None)
+            if ptype is int or (ptype is None and isinstance(low, int) and
+                                isinstance(high, int)):
+                kind = 'int'
+            else:
+                kind = 'float'
+
+            dims.append(Dimension(name, kind, low=low, high=high, step=step))
+        elif pcls._get(name, NAME_ARGCHOICES):
+            choices = list(pcls._get(name, NAME_ARGCHOICES))
+            dims.append(Dimension(name, 'choice', choices=choices))
+        elif ptype is bool:
+            dims.append(Dimension(name, 'choice', choices=[False, True]))
+
+    return dims
+
+
+_REVERSED = {'<': '>', '<=': '>=', '>': '<', '>=': '<=', '==': '==',
+             '!=': '!='}
+
+
+def _bounds(dim):
+    if dim.kind != 'choice':
+        return dim.low, dim.high
+
+    try:
+        return min(dim.choices), max(dim.choices)
+    except TypeError:  # choices which cannot be ordered
+        return None
+
+
+def _restrict(dim, op, bound):
+    '''Keeps the values ``v`` of ``dim`` for which ``v op bound``. Returns
+    ``True`` if ``dim`` has changed'''
+    if dim.kind == 'choice':
+        test = CONSTRAINT_OPS[op]
+        try:
+            choices = [c for c in dim.choices if test(c, bound)]
+        except TypeError:
+            return False
+
+        changed = len(choices) != len(dim.choices)
+        dim.choices = choices
+        return changed
+
+    low, high = dim.low, dim.high
+    if dim.kind == 'int':
+        if op == '<':
+            high = min(high, math.ceil(bound) - 1)
+        elif op == '<=':
+            high = min(high, math.floor(bound))
+        elif op == '>':
+            low = max(low, math.floor(bound) + 1)
+        elif op == '>=':
+            low = max(low, math.ceil(bound))
+        elif op == '!=':
+            low += low == bound
+            high -= high == bound
+    elif op in ('<', '<='):
+        high = min(high, bound)
+    elif op in ('>', '>='):
+        low = max(low, bound)
+
+    changed = (low, high) != (dim.low, dim.high)
+    dim.low, dim.high = low, high
+    return changed
+
+
+def _narrow(dim, op, other):
+    '''Narrows ``dim`` to the values which meet ``op`` with some value of
+    ``other``. Returns ``True`` if ``dim`` has changed'''
+    bounds = _bounds(other)
+    if bounds is None:
+        return False
+
+    lo, hi = bounds
+    if op in ('<', '<='):
+        return _restrict(dim, op, hi)
+
+    if op in ('>', '>='):
+        return _restrict(dim, op, lo)
+
+    if op == '==':
+        changed = _restrict(dim, '>=', lo) | _restrict(dim, '<=', hi)
+        if dim.kind == 'choice' and other.kind == 'choice':
+            choices = [c for c in dim.choices if c in other.choices]
+            changed |= len(choices) != len(dim.choices)
+            dim.choices = choices
+
+        return changed
+
+    if lo == hi:  # "!=" only narrows against a single value
+        return _restrict(dim, op, lo)
+
+    return False
+
+
+def _domains(pcls, dims):
+    '''Returns a dict name -> narrowed copy of the dimensions in ``dims``,
+    adding as single choice the params which are not searched but take part
+    in constraints'''
+    doms = {dim.name: dim.copy() for dim in dims}
+    cons = [c for c in CONSTRAINTS.get(pcls, ()) if c[2] is not None]
+    for name in (n for c in cons for n in (c[0], c[2])):
+        if name not in doms:
+            doms[name] = Dimension(name, 'choice',
+                                   choices=[DEFAULTS[pcls][name]])
+
+    changed = True
+    while changed:  # until a fixed point, dimensions only shrink
+        changed = False
+        for a, op, b in cons:
+            changed |= _narrow(doms[a], op, doms[b])
+            changed |= _narrow(doms[b], _REVERSED[op], doms[a])
+            for dim in (doms[a], doms[b]):
+                if dim.empty():
+                    raise ValueError(_ERR_EMPTY.format(dim.name,
+                                                       pcls.__name__))
+
+    return doms
+
+
+def narrow(cls, dims):
+    '''Returns copies of the dimensions in ``dims`` (see ``space``) narrowed
+    to the values which can meet the constraints declared in ``cls``.
+    Raises ``ValueError`` if no value is left for one of them'''
+    doms = _domains(_pcls(cls), dims)
+    return [doms[dim.name] for dim in dims]
+
+
+def _valid(pcls, values):
+    '''Returns if ``values`` (with the defaults for the missing params) meet
+    the constraints of ``pcls``'''
+    full = dict(DEFAULTS[pcls], **values)
+    for name, op, other in CONSTRAINTS.get(pcls, ()):
+        if other is None:
+            if not op(dict(full)):
+                return False
+        elif not CONSTRAINT_OPS[op](full[name], full[other]):
+            return False
+
+    return True
+
+
+def grid(cls, ranges=None):
+    '''Yields the dicts of values of all the combinations of the dimensions
+    of ``cls`` (see ``space``) which meet the constraints. Float ranges need
+    a ``step``.
+
+    When a value is assigned to a param, the values of the params not yet
+    assigned which cannot meet the constraints with it are removed, and the
+    combinations which would contain them are never generated'''
+    pcls = _pcls(cls)
+    dims = [Dimension(d.name, 'choice', choices=d.values())
+            for d in space(pcls, ranges)]
+    if not dims:
+        raise ValueError(_ERR_SPACE.format(pcls.__name__))
+
+    names = [dim.name for dim in dims]
+    doms = _domains(pcls, dims)
+    order = [n for n in doms if n not in names] + names  # fixed ones first
+    pos = {name: i for i, name in enumerate(order)}
+
+    # forward[i]: (j, test, swapped) to filter the values w of j > i once i
+    # has value v, with test(v, w) (or test(w, v) if swapped)
+    forward = [[] for _ in order]
+    calls = []
+    for a, op, b in CONSTRAINTS.get(pcls, ()):
+        if b is None:
+            calls.append(op)
+        elif pos[a] < pos[b]:
+            forward[pos[a]].append((pos[b], CONSTRAINT_OPS[op], False))
+        elif pos[a] > pos[b]:
+            forward[pos[b]].append((pos[a], CONSTRAINT_OPS[op], True))
+
+    n = len(order)
+    defaults = DEFAULTS[pcls]
+
+    def walk(i, values, domains):
+        if i == n:
+            if not calls or all(c(dict(defaults, **values)) for c in calls):
+                yield {name: values[name] for name in names}
+            return
+
+        for v in domains[i]:
+            nxt = list(domains)
+            for j, test, swapped in forward[i]:
+                if swapped:
+                    nxt[j] = [w for w in nxt[j] if test(w, v)]
+                else:
+                    nxt[j] = [w for w in nxt[j] if test(v, w)]
+
+                if not nxt[j]:
+                    break
+            else:
+                values[order[i]] = v
+                yield from walk(i + 1, values, nxt)
+
+    return walk(0, {}, [doms[name].choices for name in order])
+
+
+# Samplers: return a batch of n points in [0, 1)^d
+def _random(n, d, rng):
+    return [[rng.random() for _ in range(d)] for _ in range(n)]
+
+
+def _lhs(n, d, rng):
+    '''Latin hypercube: each dimension is split in n strata and each stratum
+    is used exactly once'''
+    cols = []
+    for _ in range(d):
+        col = [(i + rng.random()) / n for i in range(n)]
+        rng.shuffle(col)
+        cols.append(col)
+
+    return [list(point) for point in zip(*cols)]
+
+
+def _primes(d):
+    primes, x = [], 2
+    while len(primes) < d:
+        if all(x % p for p in primes):
+            primes.append(x)
+        x += 1
+
+    return primes
+
+
+def _halton(n, d, rng):
+    '''Halton sequence with a random shift (modulo 1) per dimension'''
+    points = [[0.0] * d for _ in range(n)]
+    for j, base in enumerate(_primes(d)):
+        shift = rng.random()
+        for i in range(n):
+            k, f, r = i + 1, 1.0, 0.0
+            while k:
+                f /= base
+                r += f * (k % base)
+                k //= base
+
+            points[i][j] = (r + shift) % 1.0
+
+    return points
+
+
+def _sobol(n, d, rng):
+    try:
+        from scipy.stats import qmc
+    except ImportError:
+        raise ImportError(_ERR_SOBOL)
+
+    sampler = qmc.Sobol(d, scramble=True, seed=rng.getrandbits(32))
+    return sampler.random(n).tolist()
+
+
+SAMPLERS = {
+    'random': _random,
+    'lhs': _lhs,
+    'halton': _halton,
+    'sobol': _sobol,
+}
+
+
+def _evaluate(objective, target, values, budget):
+    '''Runs in the workers: builds the params (checked and transformed) and
+    calls the objective'''
+    return objective(_pcls(target)(**values), budget)
+
+
+class Search:
+    '''Search the values of the params of ``cls`` (params or host class)
+    which maximize (or minimize) ``objective``
+
+      - ``objective``: callable receiving a params instance and a budget
+        (e.g.: number of bars or epochs) and returning a score
+      - ``ranges``: see ``space``
+      - ``sampler``: one of ``SAMPLERS`` or a callable ``(n, d, rng)``
+        returning ``n`` points in ``[0, 1)^d``
+      - ``seed``: the same seed gives the same search
+      - ``executor``: a ``concurrent.futures`` executor to run the
+        evaluations. ``None`` runs them in the calling thread. With a process
+        pool the ``objective`` must be picklable and ``cls`` should be a host
+        class defined at module level (params classes are not picklable)
+      - ``maximize``: if ``False`` lower scores are better
+
+    ``history`` keeps all the trials which have been run
+    '''
+    def __init__(self, cls, objective, ranges=None, sampler='lhs', seed=None,
+                 executor=None, maximize=True):
+        self.pcls = pcls = _pcls(cls)
+        self.dims = narrow(pcls, space(pcls, ranges))
+        if not self.dims:
+            raise ValueError(_ERR_SPACE.format(pcls.__name__))
+
+        if not callable(sampler):
+            try:
+                sampler = SAMPLERS[sampler]
+            except KeyError:
+                raise ValueError(_ERR_SAMPLER.format(sampler, list(SAMPLERS)))
+
+        self.objective = objective
+        self.sampler = sampler
+        self.executor = executor
+        self.maximize = maximize
+        self.rng = random.Random(seed)
+        self.history = []
+        self._target = CLS.get(pcls, pcls)  # hosts can be pickled
+
+    def sample(self, n):
+        '''Returns a batch of up to ``n`` distinct dicts of values which meet
+        the constraints'''
+        dims, pcls = self.dims, self.pcls
+        check = pcls in CONSTRAINTS
+        batch, seen = [], set()
+        for point in self.sampler(n, len(dims), self.rng):
+            values = {dim.name: dim.value(u) for dim, u in zip(dims, point)}
+            key = tuple(values.values())
+            if key not in seen:  # int and choices may repeat, skip them
+                seen.add(key)
+                if not check or _valid(pcls, values):
+                    batch.append(values)
+
+        return batch
+
+    def evaluate(self, batch, budget):
+        '''Evaluates the dicts of values in ``batch`` with ``budget``. Returns
+        the trials in the same order'''
+        n = len(batch)
+        args = ([self.objective] * n, [self._target] * n, batch, [budget] * n)
+        if self.executor is None:
+            scores = map(_evaluate, *args)
+        else:
+            scores = self.executor.map(_evaluate, *args)
+
+        trials = [Trial(v, s, budget) for v, s in zip(batch, scores)]
+        self.history.extend(trials)
+        return trials
+
+    def _best(self, trials, k):
+        # stable sort: ties are resolved with the sampling order, which keeps
+        # the search reproducible regardless of the executor
+        sign = -1 if self.maximize else 1
+        return sorted(trials, key=lambda t: sign * t.score)[:k]
+
+    def run(self, n=27, budget=1, maxbudget=None, eta=3):
+        '''Successive halving: ``n`` sampled configurations are evaluated with
+        ``budget``, the best ``1/eta`` are evaluated again with ``eta`` times
+        the budget and so on until one is left or ``maxbudget`` would be
+        exceeded.
+
+        Returns the trials of the last round, best first'''
+        batch = self.sample(n)
+        while True:
+            trials = self._best(self.evaluate(batch, budget), len(batch))
+            keep = len(trials) // eta
+            budget *= eta
+            if not keep or (maxbudget is not None and budget > maxbudget):
+                return trials
+
+            batch = [t.values for t in trials[:keep]]
+
+    def best(self):
+        '''Returns the best trial among those run with the largest budget'''
+        top = max(t.budget for t in self.history)
+        return self._best([t for t in self.history if t.budget == top], 1)[0]
+
+    def params(self, values):
+        '''Returns an instance of the params class with ``values``'''
+        return self.pcls(**values)
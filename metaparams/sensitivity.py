@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''One-at-a-time sensitivity analysis of an objective around a base params
+instance: each param is moved alone, the rest keep the base values::
+
+    sens = Sensitivity(MyHost, objective, base=tuned.p)
+    for row in sens.run():  # as the evaluations finish
+        print(row.name, row.value, row.score, row.delta)
+
+    sens.spread()  # name -> max - min of the scores seen for the param
+
+The values tried for a param come from the definition:
+
+  - ``choices``: all the other choices (bools: the opposite value)
+  - ints and floats (the ``type`` or the type of the base value): the base
+    value moved ``1..radius`` steps down and up. The step is the one given
+    in ``steps``, else the ``step`` entry (see ``metaparams.search``), else 1
+    for ints and a fraction of the base value for floats. Values out of a
+    declared ``range`` are skipped
+
+Values which are rejected by the params (type, transform, constraints) are
+kept in ``invalid``. Configurations which are the same once canonicalized
+(see ``metaparams.dedup``) are evaluated once.
+
+The objective receives a params instance and returns a score. If it raises,
+the exception is the score of the ``Response`` (and the delta is ``None``),
+for the base too. By default
+the evaluations run in a process pool: the objective must be picklable and
+the params class must belong to a host class defined at module level.
+'''
+import collections
+import concurrent.futures
+
+from .metaparams import (PSETTING, KWARG_PNAME, NAME_TYPE, NAME_ARGCHOICES,
+                         _build)
+from .dedup import canonical, _key
+from .search import NAME_RANGE, NAME_STEP
+
+__all__ = ['Response', 'Sensitivity', 'perturbations']
+
+RELATIVE_STEP = 0.1  # float step without a declared one: 10% of the value
+
+Response = collections.namedtuple('Response', 'name value score delta')
+
+
+def _pcls(cls):
+    if cls in PSETTING:
+        return getattr(cls, PSETTING[cls][KWARG_PNAME])
+
+    return cls
+
+
+def _delta(score, base):
+    if isinstance(score, Exception) or isinstance(base, Exception):
+        return None
+
+    return score - base
+
+
+def perturbations(pcls, name, value, radius=1, step=None):
+    '''Returns the list of values to try for param ``name`` of ``pcls``
+    around the base ``value`` (see the module documentation)'''
+    choices = pcls._get(name, NAME_ARGCHOICES)
+    if choices:
+        return [c for c in choices if c != value]
+
+    ptype = pcls._get(name, NAME_TYPE) or type(value)
+    if ptype is bool:
+        return [not value]
+
+    if ptype not in (int, float):
+        return []
+
+    step = step or pcls._get(name, NAME_STEP, default=None)
+    if not step:
+        step = 1 if ptype is int else (
+            abs(value) * RELATIVE_STEP or RELATIVE_STEP)
+
+    values = [value + k * step for k in range(-radius, radius + 1) if k]
+    rng = pcls._get(name, NAME_RANGE, default=None)
+    if rng is not None and not isinstance(rng, (list, set, frozenset)):
+        low, high = rng[:2]
+        values = [v for v in values if low <= v <= high]
+
+    return values
+
+
+class Sensitivity:
+    '''Sensitivity of ``objective`` to the params of ``cls`` (host or params
+    class) around ``base`` (a params instance, defaults if not given)
+
+      - ``radius``: number of steps tried on each side of numeric values
+      - ``steps``: dict name -> step, overriding the declared ones
+      - ``executor``: a ``concurrent.futures`` executor. If ``None`` a
+        process pool with ``workers`` processes is used during ``run``
+
+    Filled by ``run``:
+
+      - ``base_score``: score of the base instance (the exception if the
+        objective raised)
+      - ``table``: name -> list of ``Response``
+      - ``invalid``: list of ``(name, value, error)``
+      - ``evaluations`` / ``reused``: configurations evaluated / values
+        which reused the evaluation of an identical configuration
+    '''
+    def __init__(self, cls, objective, base=None, radius=1, steps=None,
+                 executor=None, workers=None):
+        self.pcls = _pcls(cls)
+        self.objective = objective
+        self.base = base if base is not None else self.pcls()
+        self.radius = radius
+        self.steps = steps or {}
+        self.executor = executor
+        self.workers = workers
+        self.base_score = None
+        self.table = {}
+        self.invalid = []
+        self.evaluations = self.reused = 0
+
+    def candidates(self):
+        '''Yields ``(name, value, params)`` for each perturbation which the
+        params accept'''
+        base = self.base
+        for name in self.pcls:
+            values = perturbations(self.pcls, name, base._value(name),
+                                   self.radius, self.steps.get(name))
+            for value in values:
+                try:
+                    params = base._replace(**{name: value})
+                except (TypeError, ValueError) as e:
+                    self.invalid.append((name, value, e))
+                    continue
+
+                yield name, value, params
+
+    def _submit(self, executor):
+        pending = {}  # future -> [(name, value)], None for the base itself
+        seen = {}  # canonical key -> future
+        for name, value, params in [(None, None, self.base)] + list(
+                self.candidates()):
+            values = canonical(self.pcls, params)
+            key = _key(values)
+            fut = seen.get(key)
+            if fut is None:
+                params = _build(self.pcls, values)
+                seen[key] = fut = executor.submit(self.objective, params)
+                self.evaluations += 1
+            elif name is not None:
+                self.reused += 1
+
+            pending.setdefault(fut, []).append((name, value))
+
+        return pending
+
+    def run(self):
+        '''Yields a ``Response`` for each value tried as soon as its
+        evaluation (and the one of the base) has finished'''
+        executor = self.executor
+        if executor is None:
+            executor = concurrent.futures.ProcessPoolExecutor(self.workers)
+
+        try:
+            pending = self._submit(executor)
+            held = []  # finished before the base
+            for fut in concurrent.futures.as_completed(pending):
+                try:
+                    score = fut.result()
+                except Exception as e:  # reported, the others go on
+                    score = e
+
+                items = pending[fut]
+                rows = [(n, v, score) for n, v in items if n is not None]
+                if len(rows) < len(items):  # the base is among them
+                    self.base_score = score
+                    rows += held
+
+                if self.base_score is None:
+                    held += rows
+                    continue
+
+                for name, value, score in rows:
+                    row = Response(name, value, score,
+                                   _delta(score, self.base_score))
+                    self.table.setdefault(name, []).append(row)
+                    yield row
+        finally:
+            if executor is not self.executor:
+                executor.shutdown()
+
+    def spread(self):
+        '''Returns a dict name -> difference between the highest and lowest
+        scores seen for the param (the base included), largest first. The
+        evaluations which raised are left out'''
+        out = {}
+        for name, rows in self.table.items():
+            scores = [r.score for r in rows] + [self.base_score]
+            scores = [s for s in scores if not isinstance(s, Exception)]
+            if scores:
+                out[name] = max(scores) - min(scores)
+
+        return dict(sorted(out.items(), key=lambda item: -item[1]))
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Pickling of large array values of params through shared memory.
+
+While sharing is active, pickling a params instance (for example when sending
+a host to a process pool) places each large numpy array value in a
+``multiprocessing.shared_memory`` block, once per content, and pickles a
+small handle instead. Unpickling the handle attaches a read-only view of the
+block, without copying::
+
+    with shm.sharing():
+        results = list(pool.map(evaluate, hosts))
+
+Blocks are identified by the content of the arrays: pickling an array which
+has been modified places the new content in a new block.
+
+Each handle has a slot in the block, which the receiver marks when attaching.
+A block is released (unlinked) when no array with its content is alive in
+this process and all its handles have been attached (or with ``release``). A
+process attaching a block keeps it mapped as long as views of it are alive.
+Handles which are never unpickled keep the block until ``release`` (or the
+end of the process).
+
+numpy is optional. Without it nothing is shared.
+'''
+import contextlib
+import hashlib
+import os
+import sys
+import threading
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .metaparams import PICKLERS
+
+__all__ = ['SharedArray', 'enable', 'disable', 'sharing', 'release', 'stats']
+
+SHM_THRESHOLD = 1 << 16  # arrays with at least this many bytes are shared
+SHM_SLOTS = 4096  # handles per block, a new block is created when exhausted
+
+_threshold = SHM_THRESHOLD
+_lock = threading.RLock()  # finalizers may run while it is held
+_BLOCKS = {}  # block name -> _Block, the blocks created by this process
+_CURRENT = {}  # content key -> _Block handing out the new handles
+_KEYREFS = {}  # content key -> number of arrays alive with that content
+_SOURCES = {}  # id(array) -> (weakref to array, content key)
+_ATTACHED = {}  # block name -> (weakref to the view, block) in this process
+_TRACK = sys.version_info >= (3, 13)  # attaching can skip the tracker
+_POSIX = os.name == 'posix'  # blocks are registered with a resource tracker
+
+
+class SharedArray:
+    '''Handle to an array placed in a shared memory block. Unpickles as a
+    read-only view of the block'''
+    __slots__ = ['name', 'shape', 'dtype', 'pid', 'slot']
+
+    def __init__(self, name, shape, dtype, pid, slot):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+        self.pid = pid
+        self.slot = slot
+
+    def __reduce__(self):
+        return _attach, (self.name, self.shape, self.dtype, self.pid,
+                         self.slot)
+
+
+class _Block:
+    '''Shared memory block created by this process: the array followed by a
+    byte per handle, set by the receiver when attaching'''
+    __slots__ = ['shm', 'key', 'offset', 'issued']
+
+    def __init__(self, shm, key, offset):
+        self.shm = shm
+        self.key = key
+        self.offset = offset
+        self.issued = 0
+
+    def pending(self):
+        '''Number of handles not yet attached'''
+        acks = self.shm.buf[self.offset:self.offset + self.issued]
+        return self.issued - sum(acks)
+
+
+def _open(name, pid):
+    # Only the creator may have the block tracked, or the tracker of a worker
+    # would unlink it when the worker ends
+    if _TRACK:
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    shm = shared_memory.SharedMemory(name=name)
+    if _POSIX and os.getpid() != pid:  # registered by opening it
+        resource_tracker.unregister(shm._name, 'shared_memory')
+
+    return shm
+
+
+def _content(array):
+    '''Returns the key identifying the content of ``array``'''
+    h = hashlib.sha1(numpy.ascontiguousarray(array).data)
+    return (h.hexdigest(), array.dtype.str, array.shape)
+
+
+def _unlink(block):
+    shm = block.shm
+    if not _TRACK and _POSIX:  # a worker sharing the tracker unregistered it
+        resource_tracker.register(shm._name, 'shared_memory')
+
+    shm.close()
+    shm.unlink()
+
+
+def _sweep(keep=True, force=False):
+    '''Unlinks (with the lock held) the blocks no longer needed: all handles
+    attached and, if ``keep``, no array alive with the content. ``force``
+    unlinks all'''
+    for name, block in list(_BLOCKS.items()):
+        current = _CURRENT.get(block.key) is block
+        if not force:
+            if keep and current and _KEYREFS.get(block.key):
+                continue
+
+            if block.pending():
+                continue
+
+        del _BLOCKS[name]
+        if current:
+            del _CURRENT[block.key]
+
+        _unlink(block)
+
+
+def _gone(aid):
+    with _lock:
+        _, key = _SOURCES.pop(aid)
+        _deref(key)
+        _sweep()
+
+
+def _deref(key):
+    _KEYREFS[key] -= 1
+    if not _KEYREFS[key]:
+        del _KEYREFS[key]
+
+
+def _share(array):
+    key = _content(array)
+    aid = id(array)
+    with _lock:
+        source = _SOURCES.get(aid)
+        if source is None:
+            _SOURCES[aid] = (weakref.ref(array), key)
+            weakref.finalize(array, _gone, aid)
+            _KEYREFS[key] = _KEYREFS.get(key, 0) + 1
+        elif source[1] != key:  # modified since it was last pickled
+            _SOURCES[aid] = (source[0], key)
+            _deref(source[1])
+            _KEYREFS[key] = _KEYREFS.get(key, 0) + 1
+
+        block = _CURRENT.get(key)
+        if block is None or block.issued == SHM_SLOTS:
+            size = array.nbytes + SHM_SLOTS
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            data = numpy.ndarray(array.shape, array.dtype, buffer=shm.buf)
+            data[...] = array
+            del data  # no exported buffers may remain to close the block
+            shm.buf[array.nbytes:size] = bytes(SHM_SLOTS)
+            block = _BLOCKS[shm.name] = _CURRENT[key] = _Block(
+                shm, key, array.nbytes)
+
+        slot = block.offset + block.issued
+        block.issued += 1
+        _sweep()  # blocks of previous contents
+
+    return SharedArray(block.shm.name, array.shape, array.dtype.str,
+                       os.getpid(), slot)
+
+
+def _pickler(values):
+    if not any(type(v) is numpy.ndarray for v in values):
+        return values
+
+    return tuple(
+        _share(v) if (type(v) is numpy.ndarray and v.nbytes and
+                      v.nbytes >= _threshold and not v.dtype.hasobject) else v
+        for v in values
+    )
+
+
+def _attach(name, shape, dtype, pid, slot):
+    with _lock:
+        entry = _ATTACHED.get(name)
+        view = entry[0]() if entry is not None else None
+        if view is None:
+            shm = _open(name, pid)
+            view = numpy.ndarray(shape, numpy.dtype(dtype), buffer=shm.buf)
+            view.flags.writeable = False
+            weakref.finalize(view, _detach, name, shm)
+            _ATTACHED[name] = entry = (weakref.ref(view), shm)
+
+        entry[1].buf[slot] = 1  # the creator may now release the block
+
+    return view
+
+
+def _detach(name, shm):
+    with _lock:
+        entry = _ATTACHED.get(name)
+        if entry is not None and entry[0]() is None:
+            del _ATTACHED[name]
+
+    shm.close()
+
+
+def enable(threshold=SHM_THRESHOLD):
+    '''Activates sharing for arrays of at least ``threshold`` bytes'''
+    global _threshold
+    _threshold = threshold
+    if numpy is not None and _pickler not in PICKLERS:
+        PICKLERS.append(_pickler)
+
+
+def disable():
+    '''Deactivates sharing. Blocks already created remain valid'''
+    if _pickler in PICKLERS:
+        PICKLERS.remove(_pickler)
+
+
+@contextlib.contextmanager
+def sharing(threshold=SHM_THRESHOLD):
+    '''Context manager activating sharing (see ``enable``)'''
+    enable(threshold)
+    try:
+        yield
+    finally:
+        disable()
+
+
+def release(force=False):
+    '''Unlinks the blocks created in this process whose handles have all
+    been attached, also if arrays with the content are alive (pickling them
+    again creates new blocks). With ``force`` all the blocks are unlinked and
+    the handles not yet unpickled become invalid. Views attached in other
+    processes remain valid until they are collected'''
+    with _lock:
+        _sweep(keep=False, force=force)
+
+
+def stats():
+    '''Returns a dict with the blocks created and attached by this process,
+    the bytes held by the created ones and their handles not yet attached'''
+    with _lock:
+        _sweep()
+        return dict(
+            created=len(_BLOCKS),
+            nbytes=sum(block.shm.size for block in _BLOCKS.values()),
+            attached=len(_ATTACHED),
+            pending=sum(block.pending() for block in _BLOCKS.values()),
+        )
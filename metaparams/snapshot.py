@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Read-copy-update of the params of host instances.
+
+Hosts created with ``_psnap=True`` hold immutable params instances. An update
+builds a new instance and swaps it in the host with a reference assignment.
+Readers never block and always see a complete set of values::
+
+    class A(ParamsBase, _psnap=True):
+        params = dict(p1=1, p2=2)
+
+    a = A()
+    p = a.p  # consistent snapshot, even if another thread updates
+    snapshot.update(a, p1=5, p2=6)
+'''
+import asyncio
+import threading
+
+from .metaparams import PSETTING, KWARG_PNAME
+
+__all__ = ['snapshot', 'publish', 'update', 'changed', 'writer']
+
+_WAITERS = {}  # id(host) -> list of (loop, future) waiting for a change
+_LOCK = threading.Lock()  # protects _WAITERS, never taken by readers
+_WRITERS = [threading.RLock() for _ in range(64)]  # by id(host), see writer
+
+
+def snapshot(host):
+    '''Returns the params instance currently installed in ``host``'''
+    return getattr(host, PSETTING[type(host)][KWARG_PNAME])
+
+
+def publish(host, params):
+    '''Installs the ``params`` instance in ``host`` (with the configured
+    shortcuts) and wakes up the coroutines waiting in ``changed``. Returns
+    ``params``'''
+    type(host)._pinstall(host, params)
+
+    with _LOCK:
+        waiters = _WAITERS.pop(id(host), [])
+
+    for loop, fut in waiters:
+        loop.call_soon_threadsafe(_wakeup, fut, params)
+
+    return params
+
+
+def writer(host):
+    '''Returns the lock serializing the writers of ``host`` which read the
+    current params and publish a new instance derived from them. Readers
+    never take it'''
+    return _WRITERS[id(host) % len(_WRITERS)]
+
+
+def update(host, *args, **kwargs):
+    '''Builds a new params instance from the current one in ``host`` with the
+    values given as in ``Params._update`` (type checked and transformed) and
+    publishes it. Returns the new instance.
+
+    Concurrent updates of the same host are serialized: none is lost'''
+    with writer(host):
+        return publish(host, snapshot(host)._replace(*args, **kwargs))
+
+
+def _wakeup(fut, params):
+    if not fut.done():  # may have been cancelled in the meantime
+        fut.set_result(params)
+
+
+def _discard(hid, waiter):
+    with _LOCK:
+        waiters = _WAITERS.get(hid, [])
+        if waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del _WAITERS[hid]
+
+
+async def changed(host):
+    '''Waits for the next params instance to be published for ``host`` (from
+    any thread) and returns it'''
+    loop = asyncio.get_running_loop()
+    fut = loop.create_future()
+    hid, waiter = id(host), (loop, fut)
+    with _LOCK:
+        _WAITERS.setdefault(hid, []).append(waiter)
+
+    fut.add_done_callback(
+        lambda f: f.cancelled() and _discard(hid, waiter))
+
+    return await fut
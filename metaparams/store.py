@@ -0,0 +1,362 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+import array
+import bisect
+import heapq
+
+from .metaparams import (PSETTING, KWARG_PNAME, NAME_TYPE, NAME_ARGCHOICES,
+                         Params, _build)
+
+__all__ = ['ResultsStore', 'between']
+
+# array typecodes for the declared types. bool is stored as categorical
+_TYPECODES = {int: 'q', float: 'd'}
+
+# bit positions set in each possible byte, to extract row ids from masks
+_BITS = [tuple(b for b in range(8) if x >> b & 1) for x in range(256)]
+
+
+class _Range:
+    __slots__ = ['low', 'high']
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def __contains__(self, value):
+        return ((self.low is None or self.low <= value) and
+                (self.high is None or value <= self.high))
+
+
+def between(low=None, high=None):
+    '''Condition for ``ResultsStore.query`` matching ``low <= value <= high``.
+    Any of the limits may be ``None`` to leave the range open'''
+    return _Range(low, high)
+
+
+def _tomask(ids, n):
+    '''Returns a bitmap (an int) with the bits in ``ids`` set'''
+    ba = bytearray((n + 7) >> 3)
+    for i in ids:
+        ba[i >> 3] |= 1 << (i & 7)
+
+    return int.from_bytes(ba, 'little')
+
+
+def _fromask(mask):
+    '''Returns the list of row ids set in the bitmap ``mask``'''
+    ids = []
+    nbytes = (mask.bit_length() + 7) >> 3
+    for nbyte, byte in enumerate(mask.to_bytes(nbytes, 'little')):
+        if byte:
+            base = nbyte << 3
+            ids.extend(base + b for b in _BITS[byte])
+
+    return ids
+
+
+class _Column:
+    '''Values of a param (or a metric) stored in a typed array if the declared
+    type allows it, as codes of the categories for choices (and bools) or in a
+    list otherwise'''
+    __slots__ = ['data', 'categories', 'codes']
+
+    def __init__(self, ptype=None, choices=None):
+        self.categories = None
+        if ptype is bool and not choices:
+            choices = (False, True)
+
+        if choices:
+            self.categories = list(choices)
+            self.codes = {c: i for i, c in enumerate(self.categories)}
+            self.data = array.array('l')
+        elif ptype in _TYPECODES:
+            self.data = array.array(_TYPECODES[ptype])
+        else:
+            self.data = []
+
+    def __len__(self):
+        return len(self.data)
+
+    def append(self, value):
+        if self.categories is not None:
+            try:
+                code = self.codes[value]
+            except KeyError:  # not declared, add it
+                code = self.codes[value] = len(self.categories)
+                self.categories.append(value)
+
+            self.data.append(code)
+            return
+
+        try:
+            self.data.append(value)
+        except (TypeError, OverflowError):  # not for the array, degrade
+            self.data = list(self.data)
+            self.data.append(value)
+
+    def __getitem__(self, i):
+        if self.categories is None:
+            return self.data[i]
+
+        return self.categories[self.data[i]]
+
+    def getter(self):
+        '''Returns the fastest callable to get the value of a row'''
+        if self.categories is None:
+            return self.data.__getitem__
+
+        return self.__getitem__
+
+    def filter(self, ids, cond):
+        '''Returns the ids from ``ids`` for which the value in the column
+        matches ``cond`` (a value or a range)'''
+        data = self.data
+        if self.categories is not None:  # translate the condition to codes
+            if not isinstance(cond, _Range):
+                code = self.codes.get(cond)
+                return [i for i in ids if data[i] == code]
+
+            codes = {c for v, c in self.codes.items() if v in cond}
+            return [i for i in ids if data[i] in codes]
+
+        if not isinstance(cond, _Range):
+            return [i for i in ids if data[i] == cond]
+
+        low, high = cond.low, cond.high
+        if low is None and high is None:  # open range: all match
+            return list(ids)
+
+        if low is None:
+            return [i for i in ids if data[i] <= high]
+
+        if high is None:
+            return [i for i in ids if low <= data[i]]
+
+        return [i for i in ids if low <= data[i] <= high]
+
+
+class _SortedIndex:
+    '''Row ids sorted by value, for range and equality lookups. Rows with
+    ``nan`` (missing metrics) match nothing and are left out'''
+    def __init__(self, column):
+        values = [column[i] for i in range(len(column))]
+        order = sorted([i for i, v in enumerate(values) if v == v],
+                       key=values.__getitem__)
+        self.keys = [values[i] for i in order]
+        self.ids = order
+
+    def match(self, cond):
+        keys = self.keys
+        if not isinstance(cond, _Range):
+            cond = _Range(cond, cond)
+
+        i = 0 if cond.low is None else bisect.bisect_left(keys, cond.low)
+        j = len(keys)
+        if cond.high is not None:
+            j = bisect.bisect_right(keys, cond.high)
+
+        return self.ids[i:j]
+
+
+class _BitmapIndex:
+    '''A bitmap of the rows for each distinct value'''
+    def __init__(self, column):
+        n = len(column)
+        rows = {}
+        for i in range(n):
+            rows.setdefault(column[i], []).append(i)
+
+        self.masks = {v: _tomask(ids, n) for v, ids in rows.items()}
+
+    def mask(self, cond):
+        if not isinstance(cond, _Range):
+            return self.masks.get(cond, 0)
+
+        mask = 0
+        for v, m in self.masks.items():
+            if v in cond:
+                mask |= m
+
+        return mask
+
+
+class ResultsStore:
+    '''Column store for the values of the params of a ``Params`` subclass (or
+    of a host class) and metrics obtained with them.
+
+      - ``pcls``: the params (or host) class
+      - ``metrics``: names of the metrics, stored as floats
+      - ``index``: names of the params/metrics to index. Use ``index`` to
+        choose the kind of index
+
+    Columns are typed following the declared ``type`` and ``choices``. Queries
+    work on the columns and indexes and return row ids. Params instances are
+    only created on request (see ``params``)
+    '''
+    def __init__(self, pcls, metrics=(), index=()):
+        if pcls in PSETTING:  # host class, get the params class
+            pcls = getattr(pcls, PSETTING[pcls][KWARG_PNAME])
+
+        self.pcls = pcls
+        self.names = list(pcls)
+        self.metrics = list(metrics)
+        self.columns = {}
+        for name in self.names:
+            ptype = pcls._get(name, NAME_TYPE)
+            choices = pcls._get(name, NAME_ARGCHOICES)
+            self.columns[name] = _Column(ptype, choices)
+
+        for name in self.metrics:
+            self.columns[name] = _Column(float)
+
+        self._nrows = 0
+        self._kinds = {}  # name -> bitmap (True) or sorted index (False)
+        self._indexes = {}  # built on demand, discarded when rows are added
+        for name in index:
+            self.index(name)
+
+    def __len__(self):
+        return self._nrows
+
+    def add(self, params, **metrics):
+        '''Adds a row with the values of ``params`` (an instance of the params
+        class or a dict with the non-default values) and the ``metrics``
+        (missing ones are stored as ``nan``). Returns the row id'''
+        if isinstance(params, Params):
+            values = params._kwargs()
+        else:
+            values = self.pcls._defkwargs()
+            values.update(params)
+
+        columns = self.columns
+        for name in self.names:
+            columns[name].append(values[name])
+
+        for name in self.metrics:
+            columns[name].append(metrics.get(name, float('nan')))
+
+        self._indexes.clear()
+        self._nrows += 1
+        return self._nrows - 1
+
+    def extend(self, rows):
+        '''Adds the ``(params, metrics)`` pairs from the iterable ``rows``'''
+        for params, metrics in rows:
+            self.add(params, **metrics)
+
+    def index(self, name, bitmap=None):
+        '''Indexes column ``name`` with a bitmap index (good for few distinct
+        values, also for ranges) or a sorted index. By default choices/bools
+        get a bitmap and the rest a sorted index'''
+        if bitmap is None:
+            bitmap = self.columns[name].categories is not None
+
+        self._kinds[name] = bitmap
+        self._indexes.pop(name, None)
+
+    def _index(self, name):
+        try:
+            return self._indexes[name]
+        except KeyError:
+            pass
+
+        column = self.columns[name]
+        if self._kinds[name]:
+            idx = _BitmapIndex(column)
+        else:
+            idx = _SortedIndex(column)
+
+        self._indexes[name] = idx
+        return idx
+
+    def _select(self, where):
+        '''Returns the ids of the rows matching ``where``. The most selective
+        sorted index gives the candidates, which are then filtered with the
+        columns. If only bitmap indexes apply, the bitmaps are combined'''
+        sorteds, bitmaps, others = [], [], []
+        for name, cond in where.items():
+            kind = self._kinds.get(name)
+            if kind is None:
+                others.append((name, cond))
+            elif kind:
+                bitmaps.append((name, cond))
+            else:
+                sorteds.append(self._index(name).match(cond))
+
+        if sorteds:
+            sorteds.sort(key=len)
+            ids = sorteds[0]
+            others += bitmaps  # filter with the columns, cheaper than masks
+            for cands in sorteds[1:]:
+                cands = set(cands)
+                ids = [i for i in ids if i in cands]
+        elif bitmaps:
+            mask = -1
+            for name, cond in bitmaps:
+                mask &= self._index(name).mask(cond)
+
+            ids = _fromask(mask)
+        else:
+            ids = range(self._nrows)
+
+        for name, cond in others:
+            ids = self.columns[name].filter(ids, cond)
+
+        return list(ids)
+
+    def query(self, where=None, order=None, desc=False, limit=None):
+        '''Returns the ids of the rows matching all conditions in ``where``
+
+          - ``where``: dict of name to value (equality) or ``between(lo, hi)``
+          - ``order``: name of the column to sort the results
+          - ``desc``: sort in descending order
+          - ``limit``: return only the first ``limit`` results (the top-k if
+            ``order`` is given)
+        '''
+        ids = self._select(where or {})
+        if order is not None:
+            key = self.columns[order].getter()
+            if limit is not None:
+                topk = heapq.nlargest if desc else heapq.nsmallest
+                return topk(limit, ids, key=key)
+
+            ids.sort(key=key, reverse=desc)
+
+        if limit is not None:
+            ids = ids[:limit]
+
+        return ids
+
+    def value(self, i, name):
+        '''Returns the value of column ``name`` in row ``i``'''
+        return self.columns[name][i]
+
+    def row(self, i):
+        '''Returns a dict with the values of the params and metrics in row
+        ``i``'''
+        return {name: column[i] for name, column in self.columns.items()}
+
+    def params(self, i):
+        '''Returns an instance of the params class with the values in row
+        ``i``'''
+        values = {name: self.columns[name][i] for name in self.names}
+        return _build(self.pcls, values)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015-2018 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''Counting of the reads and writes of the params of a class, to find the
+params which are never read (dead) and those read the most (hot)::
+
+    trace.trace(MyHost)
+    run_everything()
+    trace.untrace(MyHost)
+    print(trace.dead(MyHost), trace.hot(MyHost))
+
+Reads are the attribute accesses (``self.p.period``, also through the live
+``p_name`` accessors). The bulk methods (``_kwargs``, ``_values`` ...) are not
+counted. Writes include the ones done during instantiation.
+
+A ``Sampler`` traces only during short windows, to keep the overhead low in
+long runs. The counts are then samples and not totals.
+
+Counting is not synchronized: with threads the counts are approximate.
+'''
+import threading
+
+from .metaparams import PSETTING, KWARG_PNAME, CLS, RAWGET, _descriptor
+
+__all__ = ['trace', 'untrace', 'Sampler', 'counts', 'report', 'dead', 'hot',
+           'reset']
+
+_TRACED = {}  # params class -> list of _Counter (installed or not)
+_ORIGINALS = {}  # params class -> (descriptors, owned, raw getters: prev, own)
+_INSTALLED = set()  # params classes with the counters installed
+
+
+def _pcls(cls):
+    if cls in PSETTING:
+        return getattr(cls, PSETTING[cls][KWARG_PNAME])
+
+    return cls
+
+
+class _Counter:
+    '''Wraps the descriptor of a param counting the reads and writes'''
+    __slots__ = ['name', 'desc', 'reads', 'writes']
+
+    def __init__(self, name, desc):
+        self.name = name
+        self.desc = desc
+        self.reads = 0
+        self.writes = 0
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self.desc.__get__(obj, cls)
+
+        self.reads += 1
+        return self.desc.__get__(obj, cls)
+
+    def __set__(self, obj, value):
+        self.writes += 1
+        self.desc.__set__(obj, value)
+
+    def __delete__(self, obj):
+        self.desc.__delete__(obj)
+
+
+def _prepare(pcls):
+    if pcls in _TRACED:
+        return
+
+    # through the mro: specialized (and frozen) classes have no own slots
+    descs = {name: _descriptor(pcls, name) for name in pcls}
+    owned = {name for name in pcls if name in pcls.__dict__}
+    # lazy params keep the slot (the raw value) in "member"
+    raws = {k: getattr(desc, 'member', desc) for k, desc in descs.items()}
+
+    def rawget(obj, name):  # bulk access of the raw values, not counted
+        return raws[name].__get__(obj)
+
+    _ORIGINALS[pcls] = (descs, owned, RAWGET.get(pcls), rawget)
+    _TRACED[pcls] = [_Counter(name, desc) for name, desc in descs.items()]
+
+
+def trace(cls):
+    '''Starts counting the accesses to the params of ``cls`` (host or params
+    class). Counts accumulate over successive calls (see ``reset``)'''
+    pcls = _pcls(cls)
+    _prepare(pcls)
+    if pcls in _INSTALLED:
+        return
+
+    _INSTALLED.add(pcls)
+    RAWGET[pcls] = _ORIGINALS[pcls][3]
+    for counter in _TRACED[pcls]:
+        setattr(pcls, counter.name, counter)
+
+
+def untrace(cls):
+    '''Stops counting and restores the original access to the params. The
+    counts remain available'''
+    pcls = _pcls(cls)
+    if pcls not in _INSTALLED:
+        return
+
+    _INSTALLED.discard(pcls)
+    descs, owned, rawget, _ = _ORIGINALS[pcls]
+    for name, desc in descs.items():
+        if name in owned:
+            setattr(pcls, name, desc)
+        else:
+            delattr(pcls, name)  # the one of the base is used again
+
+    if rawget is None:
+        RAWGET.pop(pcls, None)
+    else:
+        RAWGET[pcls] = rawget
+
+
+def reset(cls):
+    '''Sets the counts of ``cls`` to 0'''
+    for counter in _TRACED.get(_pcls(cls), []):
+        counter.reads = counter.writes = 0
+
+
+def counts(cls):
+    '''Returns a dict of param name to ``dict(reads=, writes=)``'''
+    return {c.name: dict(reads=c.reads, writes=c.writes)
+            for c in _TRACED.get(_pcls(cls), [])}
+
+
+def dead(cls):
+    '''Returns the names of the params of ``cls`` which have not been read'''
+    return [c.name for c in _TRACED.get(_pcls(cls), []) if not c.reads]
+
+
+def hot(cls, n=10):
+    '''Returns up to ``n`` ``(name, reads)`` pairs for the most read params of
+    ``cls``, most read first'''
+    counters = [c for c in _TRACED.get(_pcls(cls), []) if c.reads]
+    counters.sort(key=lambda c: c.reads, reverse=True)
+    return [(c.name, c.reads) for c in counters[:n]]
+
+
+def report(n=10):
+    '''Returns a dict with an entry per traced class (keyed by the name of the
+    host class) with the ``dead`` and ``hot`` params'''
+    out = {}
+    for pcls in _TRACED:
+        host = CLS.get(pcls, pcls)
+        name = '{}.{}'.format(host.__module__, host.__qualname__)
+        out[name] = dict(dead=dead(pcls), hot=hot(pcls, n))
+
+    return out
+
+
+class Sampler:
+    '''Traces ``cls`` (host or params class) during windows of ``window``
+    seconds every ``period`` seconds from a background thread. Outside the
+    windows the access to the params is not touched.
+
+    Use ``start``/``stop`` or as a context manager'''
+    def __init__(self, cls, window=0.01, period=1.0):
+        self.pcls = _pcls(cls)
+        self.window = window
+        self.period = period
+        self.windows = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def duty(self):
+        '''Fraction of the time the class is traced'''
+        return self.window / self.period
+
+    def _run(self):
+        while not self._stop.wait(self.period - self.window):
+            trace(self.pcls)
+            self._stop.wait(self.window)
+            untrace(self.pcls)
+            self.windows += 1
+
+    def start(self):
+        _prepare(self.pcls)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -22,7 +22,10 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
 from collections import OrderedDict
+import json
+import os
 import sys
+import tempfile
 
 from metaparams import ParamsBase, metaparams, MetaParams
 
@@ -198,5 +201,1856 @@ def test_run(main=False):
     d = D()
     assert(d.params.p1)
 
+
+def test_reloader(main=False):
+    from metaparams.reloader import FileSource, Reloader
+
+    class E(ParamsBase):
+        params = dict(
+            p1=dict(value=1, type=int),
+            p2=dict(value='A', transform=lambda x: x.upper()),
+        )
+
+    e = E()
+    calls = []
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'conf.json')
+        reloader = Reloader(FileSource(path))
+        reloader.register(e, callback=lambda h, c: calls.append(c))
+
+        check_nofile = reloader.poll() == []
+
+        with open(path, 'w') as f:
+            json.dump(dict(p1=2, p2='A', other=5), f)
+
+        old = e.p  # a reader holding the params while the changes arrive
+        applied = reloader.poll()
+        check_applied = applied == [(e, {'p1': 2})]  # p2 unchanged after tr
+        check_value = e.p.p1 == 2
+        check_swap = e.p is not old and e.params is e.p and old.p1 == 1
+        check_callback = calls == [{'p1': 2}]
+        check_unchanged = reloader.poll() == []
+
+        with open(path, 'w') as f:
+            json.dump(dict(p1='wrong', p2='b'), f)
+
+        check_atomic = reloader.poll() == [] and e.p.p2 == 'A'
+        check_errors = isinstance(reloader.errors[0][1], TypeError)
+
+        def boom(host, changed):
+            raise RuntimeError('callback')
+
+        e2, e3 = E(), E()
+        reloader = Reloader(FileSource(path), interval=0.01)
+        reloader.register(e2, callback=boom)
+        reloader.register(e3)
+        applied = reloader.apply(dict(p1=3))
+        check_cbfail = (len(applied) == 2 and e3.p.p1 == 3 and
+                        isinstance(reloader.errors[0][1], RuntimeError))
+
+        with open(path, 'w') as f:
+            f.write('{"p1": ')  # half-written
+
+        import time
+        reloader.start()
+        time.sleep(0.1)
+        check_polling = isinstance(reloader.errors[0][1], ValueError)
+        with open(path, 'w') as f:
+            json.dump(dict(p1=4, p2='x'), f)
+
+        deadline = time.time() + 5.0
+        while e3.p.p1 != 4 and time.time() < deadline:
+            time.sleep(0.01)
+
+        reloader.stop()
+        check_alive = e3.p.p1 == 4
+
+    assert check_nofile
+    assert check_applied
+    assert check_value
+    assert check_swap
+    assert check_callback
+    assert check_unchanged
+    assert check_atomic
+    assert check_errors
+    assert check_cbfail
+    assert check_polling
+    assert check_alive
+
+
+def test_snapshot(main=False):
+    import asyncio
+    import threading
+    from metaparams import snapshot
+
+    class F(ParamsBase, _psnap=True):
+        params = dict(
+            p1=dict(value=1, type=int),
+            p2=dict(value='a', transform=lambda x: x.upper()),
+        )
+
+    f = F(p2='b')
+    old = f.p
+
+    try:
+        f.p.p1 = 2
+    except AttributeError:
+        check_frozen = True
+    else:
+        check_frozen = False
+
+    new = snapshot.update(f, p1=2, p2='c')
+    check_swap = f.p is new and f.params is new
+    check_new = new._kwargs() == {'p1': 2, 'p2': 'C'}
+    check_old = old._kwargs() == {'p1': 1, 'p2': 'B'}
+
+    async def waiter():
+        fut = asyncio.ensure_future(snapshot.changed(f))
+        await asyncio.sleep(0)  # let the waiter register
+        t = threading.Thread(target=snapshot.update, args=(f,),
+                             kwargs=dict(p1=3))
+        t.start()
+        p = await fut
+        t.join()
+        return p
+
+    p = asyncio.run(waiter())
+    check_changed = p is f.p and p.p1 == 3
+
+    import time
+
+    def slow(value):  # widen the window between reading and publishing
+        time.sleep(0.0001)
+        return value
+
+    class G(ParamsBase, _psnap=True):
+        params = {'a{}'.format(i): dict(value=0, transform=slow)
+                  for i in range(8)}
+
+    g = G()
+
+    def bump(name):
+        for k in range(1, 51):
+            snapshot.update(g, **{name: k})
+
+    threads = [threading.Thread(target=bump, args=(name,))
+               for name in G.params]
+    for t in threads:
+        t.start()
+
+    for t in threads:
+        t.join()
+
+    check_nolost = set(g.p._values()) == {50}
+
+    assert check_frozen
+    assert check_swap
+    assert check_new
+    assert check_old
+    assert check_changed
+    assert check_nolost
+
+
+def test_fingerprint(main=False):
+    from metaparams import cache
+
+    def make(value):
+        class G(ParamsBase):
+            params = dict(
+                p1=dict(value=value, type=int, doc='First param'),
+                p2=dict(value='a', transform=str.upper),
+            )
+
+        return G
+
+    G1, G2, G3 = make(1), make(1), make(2)
+    check_same = G1.params._fingerprint() == G2.params._fingerprint()
+    check_diff = G1.params._fingerprint() != G3.params._fingerprint()
+
+    class H(G1):
+        params = dict(p1=5)
+
+    check_sub = H.params._fingerprint() != G1.params._fingerprint()
+    check_base = G1.params._defvalue('p1') == 1 and G1().p.p1 == 1
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        defcache = cache.enable(tmpdir)
+        G4 = make(1)
+        check_miss = defcache.misses == 1
+        cache.disable()
+
+        defcache = cache.enable(tmpdir)  # reloaded from disk
+        G5 = make(1)
+        check_hit = defcache.hits == 1
+        check_doc = G4.__doc__ == G5.__doc__ == G1.__doc__
+
+        # the repr of a plain object changes across runs: not cached
+        counts = defcache.hits, defcache.misses, len(defcache.entries)
+
+        class U(ParamsBase):
+            params = dict(sentinel=object())
+
+        class U2(U):
+            params = dict(n=1)
+
+        check_unstable = (
+            U.params._fingerprint().startswith('~') and
+            U2.params._fingerprint().startswith('~') and
+            (defcache.hits, defcache.misses, len(defcache.entries)) == counts
+        )
+        cache.disable()
+
+    assert check_same
+    assert check_diff
+    assert check_sub
+    assert check_base
+    assert check_miss
+    assert check_hit
+    assert check_doc
+    assert check_unstable
+
+
+def test_decorator_inplace(main=False):
+    class Base:
+        def hello(self):
+            return 'base'
+
+    @metaparams(_pinplace=True)
+    class Inplace(Base):
+        params = dict(p1=1)
+
+        def hello(self):
+            return 'i-' + super().hello()
+
+    @metaparams
+    class J(Base):
+        params = dict(p1=1)
+
+    i = Inplace(p1=2)
+    check_mro = Inplace.__mro__ == (Inplace, Base, object)
+    check_mro_sub = len(J.__mro__) == 4  # subclass of the decorated class
+    check_meta = type(Inplace) is type(J)  # metaclass is cached
+    check_params = i.p.p1 == 2 and J().p.p1 == 1
+    check_super = i.hello() == 'i-base'
+
+    assert check_mro
+    assert check_mro_sub
+    assert check_meta
+    assert check_params
+    assert check_super
+
+
+def test_pool(main=False):
+    class K(ParamsBase, _ppool=2):
+        params = dict(p1=1, p2=dict(value='a', transform=str.upper))
+
+        def __init__(self, x=0):
+            self.x = x
+
+    k = K(p2='b', x=5)
+    K._release(k)
+    check_reset = k.p.p2 == 'a'
+
+    k2 = K(p1=3, x=7)
+    check_reuse = k2 is k
+    check_values = k2.p._kwargs() == {'p1': 3, 'p2': 'a'} and k2.x == 7
+
+    K._release(k2)
+    with K._pooled(p2='c') as k3:
+        check_ctx = k3 is k and k3.p.p2 == 'C'
+
+    ks = [K() for i in range(3)]  # 1 instance in the pool, 2 created
+    for x in ks:
+        K._release(x)  # the last one is dropped, pool is full
+
+    stats = K._poolstats()
+    check_stats = stats == dict(size=2, maxsize=2, hits=3, misses=3,
+                                released=5, dropped=1)
+
+    class K2(K):
+        pass
+
+    def fails(obj, exc):
+        try:
+            K._release(obj)
+        except exc:
+            return True
+
+        return False
+
+    k4, k5 = K(), K()  # empty the pool
+    K._release(k4)
+    check_twice = (k5 is not k4 and fails(k4, ValueError) and
+                   K() is k4 and K() is not k4)
+    check_other = fails(K2(), TypeError)
+
+    assert check_reset
+    assert check_reuse
+    assert check_values
+    assert check_ctx
+    assert check_stats
+    assert check_twice
+    assert check_other
+
+
+def test_pinst_live(main=False):
+    from metaparams import snapshot
+
+    class L(ParamsBase, _pinst='live'):
+        params = dict(p1=1, p2=2)
+
+    class M(ParamsBase, _pinst=True):
+        params = dict(p1=1, p2=2)
+
+    lo, m = L(p1=5), M(p1=5)
+    check_values = lo.p_p1 == m.p_p1 == 5
+    check_nodict = 'p_p1' not in vars(lo) and 'p_p1' in vars(m)
+
+    lo.p._update(p2=7)
+    check_live = lo.p_p2 == 7
+
+    lo.p_p1 = 3
+    check_set = lo.p.p1 == 3
+
+    class N(L, _psnap=True):
+        params = dict(p3=3)
+
+    n = N()
+    snapshot.update(n, p3=4)
+    check_sub = n.p_p3 == 4 and n.p_p1 == 1
+
+    assert check_values
+    assert check_nodict
+    assert check_live
+    assert check_set
+    assert check_sub
+
+
+def test_memoize(main=False):
+    from metaparams.memo import memoize
+
+    calls = []
+
+    def make(default, path=None):
+        class Memo(ParamsBase):
+            params = dict(p1=default, p2=dict(value='a', transform=str.upper))
+
+            @memoize(maxsize=2, path=path)
+            def run(self, x):
+                calls.append(x)
+                return self.p.p1 * x
+
+        return Memo
+
+    Memo = make(2)
+    check_first = Memo().run(3) == 6 and Memo().run(3) == 6 and len(calls) == 1
+    check_params = Memo(p1=3).run(3) == 9 and len(calls) == 2
+    check_args = Memo().run(4) == 8 and len(calls) == 3
+    check_lru = Memo.run.cache.stats()['evictions'] == 1
+
+    Memo2 = make(5)  # default changed: different entries
+    check_default = Memo2(p1=2).run(3) == 6 and len(calls) == 4
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        Memo3 = make(2, path=tmpdir)
+        Memo3().run(3)
+        Memo4 = make(2, path=tmpdir)  # new memory cache, same disk store
+        check_disk = Memo4().run(3) == 6 and len(calls) == 5
+        check_disk_hit = Memo4.run.store.hits == 1
+
+    # a mixin method memoized for two hosts with the same params
+    class Named:
+        @memoize
+        def name(self):
+            return self.label()
+
+    class X(Named, ParamsBase):
+        params = dict(p1=1)
+
+        def label(self):
+            return 'X'
+
+    class Y(Named, ParamsBase):
+        params = dict(p1=1)
+
+        def label(self):
+            return 'Y'
+
+    check_mixin = (X().name(), Y().name()) == ('X', 'Y')
+
+    class B(ParamsBase):
+        params = dict(n=1)
+
+        @memoize(maxsize=100, maxbytes=2500)
+        def blob(self):
+            return bytes(500 * self.p.n)
+
+    for n in range(1, 4):
+        B(n=n).blob()
+
+    stats = B.blob.cache.stats()
+    check_maxbytes = (stats['maxbytes'] == 2500 and stats['size'] == 1 and
+                      stats['evictions'] == 2)
+
+    assert check_first
+    assert check_params
+    assert check_args
+    assert check_lru
+    assert check_default
+    assert check_disk
+    assert check_disk_hit
+    assert check_mixin
+    assert check_maxbytes
+
+
+def test_stage(main=False):
+    from metaparams.memo import stage, LRUCache
+
+    calls = []
+
+    class P(ParamsBase):
+        params = dict(period=10, threshold=1, stake=1, mode='a')
+
+        @stage('period')
+        def indicator(self):
+            calls.append('indicator')
+            return self.p.period * 2
+
+        @stage('threshold', depends=[indicator])
+        def signals(self):
+            calls.append('signals')
+            return self.indicator() > self.p.threshold
+
+        @stage  # traced: reads stake and calls signals
+        def execution(self):
+            calls.append('execution')
+            return self.p.stake if self.signals() else 0
+
+    check_first = P().execution() == 1 and len(calls) == 3
+    check_deps = P.execution.deps(P) == {'period', 'threshold', 'stake'}
+    del calls[:]
+    P(stake=2).execution()  # only the last stage runs again
+    check_down = calls == ['execution']
+    del calls[:]
+    P(threshold=30).execution()  # indicator is reused
+    check_mid = calls == ['execution', 'signals']
+    del calls[:]
+    P(mode='b').execution()  # not read by any stage
+    check_unread = calls == []
+
+    class Q(ParamsBase):
+        params = dict(p1=1, p2=2)
+
+        @stage
+        def bulk(self):
+            return sum(self.p._values())
+
+    check_bulk = Q().bulk() == 3 and Q.bulk.deps(Q) == {'p1', 'p2'}
+
+    class H(ParamsBase):
+        params = dict(period=5)
+
+        def name(self):
+            return 'H'
+
+        @stage('period')
+        def ind(self):
+            return self.name() + str(self.p.period)
+
+    class H2(H):
+        def name(self):  # the inherited stage must not reuse the results
+            return 'H2'
+
+    check_override = (H().ind(), H2().ind()) == ('H5', 'H25')
+
+    import threading
+    seen = []
+
+    class W(ParamsBase):
+        params = dict(x=1)
+
+        @stage
+        def write(self):
+            self.p.x = 2  # the real params, not a stand-in
+            t = threading.Thread(target=lambda: seen.append(type(self.p)))
+            t.start()
+            t.join()
+            return self.p.x
+
+    check_write = W().write() == 2 and seen == [W.params]
+    check_restored = 'x' not in W.params.__dict__ or \
+        type(W.params.__dict__['x']).__name__ == 'member_descriptor'
+
+    cache = LRUCache(maxsize=10, maxbytes=1000)
+    cache.put('a', b'x' * 600)
+    cache.put('b', b'x' * 600)
+    check_bytes = 'a' not in cache._data and cache.stats()['evictions'] == 1
+
+    assert check_first
+    assert check_deps
+    assert check_down
+    assert check_mid
+    assert check_unread
+    assert check_bulk
+    assert check_override
+    assert check_write
+    assert check_restored
+    assert check_bytes
+
+
+def test_store(main=False):
+    from metaparams.store import ResultsStore, between
+
+    class Q(ParamsBase):
+        params = dict(
+            period=dict(value=10, type=int),
+            stake=dict(value=1, type=int),
+            mode=dict(value='a', choices=['a', 'b']),
+            flag=dict(value=False, type=bool),
+        )
+
+    store = ResultsStore(Q, metrics=['sharpe'], index=['period', 'mode'])
+    for period in range(5, 26):
+        for stake in (1, 2):
+            mode = 'ab'[period % 2]
+            store.add(dict(period=period, stake=stake, mode=mode),
+                      sharpe=period * stake / 10.0)
+
+    store.add(Q.params(period=15, flag=True), sharpe=0.5)
+
+    where = dict(period=between(10, 20), stake=1)
+    ids = store.query(where, order='sharpe', desc=True)
+    check_range = [store.value(i, 'period') for i in ids] == list(
+        range(20, 9, -1)) + [15]
+
+    top = store.query(where, order='sharpe', desc=True, limit=2)
+    check_topk = top == ids[:2]
+
+    ids = store.query(dict(mode='b', stake=2, period=between(high=9)))
+    check_bitmap = [store.row(i)['period'] for i in ids] == [5, 7, 9]
+
+    ids = store.query(dict(flag=True))
+    p = store.params(ids[0])
+    check_params = (len(ids) == 1 and isinstance(p, Q.params) and
+                    p._kwargs() == dict(period=15, stake=1, mode='a',
+                                        flag=True))
+
+    check_typed = store.columns['period'].data.typecode == 'q'
+
+    check_open = len(store.query(dict(stake=between()))) == len(store)
+
+    nans = ResultsStore(Q, metrics=['m'])
+    for m in (1.0, None, 2.0, 3.0):
+        nans.add({}, **({} if m is None else dict(m=m)))
+
+    plain = nans.query(dict(m=between(0, 5)))
+    nans.index('m')
+    check_nan = plain == nans.query(dict(m=between(0, 5))) == [0, 2, 3]
+
+    assert check_range
+    assert check_open
+    assert check_nan
+    assert check_topk
+    assert check_bitmap
+    assert check_params
+    assert check_typed
+
+
+def test_search(main=False):
+    from concurrent.futures import ThreadPoolExecutor
+    from metaparams.search import Search, space
+
+    class S(ParamsBase):
+        params = dict(
+            x=dict(value=0.0, type=float, range=(0.0, 10.0)),
+            y=dict(value=0.0, range=(-1.0, 1.0)),
+            mode=dict(value='a', choices=['a', 'b']),
+            fixed=5,
+        )
+
+    def objective(params, budget):
+        return -abs(params.x - 3) - abs(params.y) + (params.mode == 'b')
+
+    dims = space(S, ranges=dict(fixed=(1, 9)))
+    check_space = [(d.name, d.kind) for d in dims] == [
+        ('x', 'float'), ('y', 'float'), ('mode', 'choice'), ('fixed', 'int')]
+
+    search = Search(S, objective, seed=11)
+    trials = search.run(n=27, budget=1, eta=3)
+    budgets = [t.budget for t in search.history]
+    check_rounds = [budgets.count(b) for b in (1, 3, 9, 27)] == [27, 9, 3, 1]
+    check_best = (len(trials) == 1 and trials[0] == search.best() and
+                  trials[0].values['mode'] == 'b')
+
+    with ThreadPoolExecutor(4) as executor:
+        search = Search(S, objective, seed=11, executor=executor)
+        check_seed = search.run(n=27, budget=1, eta=3) == trials
+
+    search = Search(S, objective, sampler='halton', seed=1)
+    trials = search.run(n=20, budget=10, maxbudget=40, eta=2)
+    check_maxbudget = (len(trials) == 5 and
+                       max(t.budget for t in search.history) == 40)
+
+    check_lhs = sorted(int(v['x']) for v in
+                       Search(S, objective, seed=2).sample(10)) == list(
+                           range(10))
+
+    assert check_space
+    assert check_rounds
+    assert check_best
+    assert check_seed
+    assert check_maxbudget
+    assert check_lhs
+
+
+class Dist(ParamsBase):
+    params = dict(
+        x=dict(value=1, type=int),
+        scale=dict(value=1, transform=lambda x: x * 10),
+    )
+
+    def score(self, offset=0):
+        return self.p.x * self.p.scale + offset
+
+
+def test_distribute(main=False):
+    import operator
+    import threading
+    from metaparams.distribute import (
+        Broker, Worker, LocalTransport, ManagerTransport, LostTask, TaskError,
+        encode, decode)
+
+    p = Dist(x=3, scale=2).params
+    schema, values = encode(p)
+    check_encode = values == (3, 20) and schema.endswith(p._fingerprint())
+    check_decode = decode(schema, values)._kwargs() == dict(x=3, scale=20)
+
+    # a worker takes one task and dies without sending heartbeats
+    transport = LocalTransport()
+    broker = Broker(transport, timeout=0.2, retries=1)
+    tids = [broker.submit(operator.methodcaller('score', 1),
+                          Dist(x=x, scale=1))
+            for x in range(10)]
+    broker.submit(operator.methodcaller('score', 'a'), Dist())  # fails
+
+    task = transport.tasks.get()
+    transport.messages.put(('hb', 'dead', task[0], task[1]))
+
+    workers = [Worker(transport, interval=0.05) for _ in range(2)]
+    threads = [threading.Thread(target=w.run) for w in workers]
+    for t in threads:
+        t.start()
+
+    results = broker.gather(timeout=5)
+    broker.stop(len(workers))
+    for t in threads:
+        t.join()
+
+    check_results = [results[tid] for tid in tids] == [
+        x * 10 + 1 for x in range(10)]  # no double transformation
+    check_error = isinstance(results[10], TaskError)
+
+    stats = broker.stats()
+    check_stats = (stats['completed'] == 10 and stats['failed'] == 1 and
+                   stats['retried'] == 1 and stats['tasks_per_sec'] > 0 and
+                   sum(w.done for w in workers) == 11)
+
+    # lost again after the retries
+    transport = LocalTransport()
+    broker = Broker(transport, timeout=0.1, retries=0)
+    tid = broker.submit(operator.methodcaller('score'), Dist())
+    transport.messages.put(('hb', 'dead', tid, transport.tasks.get()[1]))
+    check_lost = isinstance(broker.gather(timeout=5)[tid], LostTask)
+
+    # the worker dies after taking the task and before claiming it
+    transport = LocalTransport()
+    broker = Broker(transport, timeout=0.1, retries=1)
+    tid = broker.submit(operator.methodcaller('score'), Dist(x=2, scale=1))
+    transport.tasks.get()
+    worker = Worker(transport, interval=0.05)
+    thread = threading.Thread(target=worker.run, args=(1,))
+    thread.start()
+    check_unclaimed = broker.gather(timeout=5) == {tid: 20}
+    thread.join()
+
+    # heartbeats of the first attempt do not keep the retried one alive
+    transport = LocalTransport()
+    broker = Broker(transport, timeout=0.1, retries=1)
+    tid = broker.submit(operator.methodcaller('score'), Dist())
+    transport.messages.put(('hb', 'dead', tid, transport.tasks.get()[1]))
+    stop = threading.Event()
+
+    def ghost():
+        transport.tasks.get()  # the retried task, dropped
+        while not stop.wait(0.02):  # late heartbeats of the first attempt
+            transport.messages.put(('hb', 'dead', tid, 0))
+
+    thread = threading.Thread(target=ghost)
+    thread.start()
+    results = broker.gather(timeout=3)
+    stop.set()
+    thread.join()
+    check_stale = isinstance(results.get(tid), LostTask)
+
+    # same over a manager served on localhost
+    transport = ManagerTransport()
+    transport.serve()
+    try:
+        broker = Broker(transport)
+        tids = [broker.submit(operator.methodcaller('score'),
+                              Dist(x=x, scale=1))
+                for x in range(5)]
+        import multiprocessing
+        check_authkey = (
+            transport.authkey == multiprocessing.current_process().authkey)
+        try:
+            ManagerTransport(transport.address, b'metaparams').connect()
+        except multiprocessing.AuthenticationError:
+            check_badkey = True
+        else:
+            check_badkey = False
+
+        remote = ManagerTransport(transport.address, transport.authkey)
+        remote.connect()
+        worker = Worker(remote)
+        thread = threading.Thread(target=worker.run)
+        thread.start()
+        results = broker.gather(timeout=10)
+        broker.stop()
+        thread.join()
+    finally:
+        transport.close()
+
+    check_manager = [results[tid] for tid in tids] == [
+        x * 10 for x in range(5)]
+
+    assert check_encode
+    assert check_decode
+    assert check_results
+    assert check_error
+    assert check_stats
+    assert check_lost
+    assert check_unclaimed
+    assert check_stale
+    assert check_manager
+    assert check_authkey
+    assert check_badkey
+
+
+def test_dedup(main=False):
+    from metaparams.dedup import Dedup, canonical, dedup
+
+    class D(ParamsBase):
+        params = dict(
+            mode=dict(value='ema', transform=str.lower),
+            alpha=dict(value=0.5, type=float,
+                       irrelevant=dict(mode=['sma', 'wma'])),
+            period=dict(value=10, transform=lambda x: max(2, x)),
+            extra=dict(value=None, irrelevant=lambda v: v['period'] < 5),
+        )
+
+    check_canon = canonical(D, dict(mode='SMA', alpha=0.7, period=1)) == dict(
+        mode='sma', alpha=0.5, period=2, extra=None)
+
+    sweep = [
+        dict(mode='EMA', alpha=0.7),
+        dict(mode='ema', alpha=0.7),  # dup: case
+        dict(mode='sma', alpha=0.1),
+        dict(mode='Sma', alpha=0.9),  # dup: alpha irrelevant
+        D.params(mode='sma'),  # dup: instance
+        dict(period=0, extra=[1]),
+        dict(period=1, extra=[2]),  # dup: clamped and extra irrelevant
+        dict(period=10, extra=[2]),
+        dict(period=10, extra=[2]),  # dup: unhashable value
+    ]
+    stage = Dedup(D)
+    out = list(stage(sweep))
+    check_unique = [p._kwargs() for p in out] == [
+        dict(mode='ema', alpha=0.7, period=10, extra=None),
+        dict(mode='sma', alpha=0.5, period=10, extra=None),
+        dict(mode='ema', alpha=0.5, period=2, extra=None),
+        dict(mode='ema', alpha=0.5, period=10, extra=[2]),
+    ]
+    check_redirects = stage.redirects == [0, 0, 1, 1, 1, 2, 2, 3, 3]
+    check_stats = stage.unique == 4 and stage.duplicates == 5
+
+    check_host = len(list(dedup(D, [dict(mode='x'), dict(mode='X')]))) == 1
+
+    try:
+        list(dedup(D, [dict(alpha=1)]))  # wrong type
+    except TypeError:
+        check_type = True
+    else:
+        check_type = False
+
+    # chained rules (a reset makes another param irrelevant), any order
+    class O1(ParamsBase):
+        params = dict(
+            flag=dict(value='on'),
+            y=dict(value=1, irrelevant=dict(flag='off')),
+            x=dict(value=0, irrelevant=dict(y=1)),
+        )
+
+    class O2(ParamsBase):
+        params = dict(
+            flag=dict(value='on'),
+            x=dict(value=0, irrelevant=dict(y=1)),
+            y=dict(value=1, irrelevant=dict(flag='off')),
+        )
+
+    item = dict(flag='off', y=5, x=7)
+    canon = canonical(O1, item)
+    check_order = canon == canonical(O2, item) == dict(flag='off', y=1, x=0)
+    check_idempotent = (canonical(O1, canon) == canon and
+                        canonical(O2, canonical(O2, item)) == canon)
+    stage = Dedup(O1)
+    list(stage([item, canon]))
+    check_chained = stage.duplicates == 1
+
+    assert check_canon
+    assert check_unique
+    assert check_redirects
+    assert check_stats
+    assert check_host
+    assert check_type
+    assert check_order
+    assert check_idempotent
+    assert check_chained
+
+
+def test_lazy(main=False):
+    from metaparams import lazy
+
+    loads = []
+
+    def loader(path):
+        loads.append(path)
+        return dict(path=path)
+
+    class L(ParamsBase):
+        params = dict(
+            table=dict(value='a.csv', lazy=loader, transform=str.lower),
+            n=1,
+        )
+
+    class L2(L):
+        params = dict(n=2)
+
+    lazy.clear()
+    hosts = [L(table='B.CSV') for _ in range(100)]
+    check_noload = not loads
+    check_raw = (hosts[0].p._kwargs() == dict(table='b.csv', n=1) and
+                 list(hosts[0].p._values()) == ['b.csv', 1] and
+                 hosts[0].p._value('table') == 'b.csv')
+
+    tables = [h.p.table for h in hosts]
+    check_shared = (loads == ['b.csv'] and tables[0] == dict(path='b.csv') and
+                    all(t is tables[0] for t in tables))
+
+    l2 = L2()
+    check_inherit = l2.p.table == dict(path='a.csv') and l2.p._isdefault(
+        'table') and loads == ['b.csv', 'a.csv']
+
+    new = hosts[0].p._replace(n=5)
+    check_replace = new._kwargs() == dict(table='b.csv', n=5)
+
+    lazy.resize(1)
+    L(table='c.csv').p.table
+    hosts[0].p.table  # evicted, loaded again
+    check_evict = loads[-2:] == ['c.csv', 'b.csv']
+    lazy.resize(lazy.LAZY_MAXSIZE)
+
+    assert check_noload
+    assert check_raw
+    assert check_shared
+    assert check_inherit
+    assert check_replace
+    assert check_evict
+
+
+class ShmHost(ParamsBase):
+    params = dict(weights=None, name='w')
+
+
+def _shm_check(host):
+    w = host.p.weights
+    return float(w.sum()), w.flags.writeable, w.base is not None
+
+
+def test_shm(main=False):
+    import pickle
+    try:
+        import numpy
+    except ImportError:  # optional, nothing to share
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    from metaparams import shm
+
+    weights = numpy.arange(100000, dtype='f8')
+    host = ShmHost(weights=weights)
+
+    plain = pickle.dumps(host.p)
+    with shm.sharing():
+        shared = pickle.dumps(host.p)
+        again = pickle.dumps(ShmHost(weights=weights).p)
+        small = pickle.dumps(ShmHost(weights=numpy.ones(4)).p)
+
+    check_plain = len(plain) > weights.nbytes
+    check_shared = len(shared) < 1000 and len(again) < 1000
+    check_once = shm.stats()['created'] == 1
+    check_small = len(small) > 4 * 8
+
+    check_pending = shm.stats()['pending'] == 2
+    p, q = pickle.loads(shared), pickle.loads(again)
+    check_view = (isinstance(p, ShmHost.params) and p.name == 'w' and
+                  numpy.array_equal(p.weights, weights) and
+                  not p.weights.flags.writeable and q.weights.base is not None)
+
+    weights[0] = -1.0  # modified: the new content goes to a new block
+    with shm.sharing():
+        changed = pickle.loads(pickle.dumps(host.p))
+
+    check_changed = (changed.weights[0] == -1.0 and p.weights[0] == 0.0 and
+                     shm.stats()['created'] == 1)  # old one released
+    del changed, q
+
+    with shm.sharing():  # source collected before the receiver attaches
+        temp = numpy.ones(100000)
+        sent = pickle.dumps(ShmHost(weights=temp).p)
+        del temp
+
+    import gc
+    gc.collect()
+    check_kept = shm.stats()['created'] == 2
+    check_late = pickle.loads(sent).weights.sum() == 100000.0
+
+    with shm.sharing(), ProcessPoolExecutor(2) as executor:
+        results = list(executor.map(_shm_check, [host] * 4))
+
+    check_pool = results == [(float(weights.sum()), False, True)] * 4
+
+    del p
+    del host, weights
+    gc.collect()
+    check_release = shm.stats() == dict(created=0, nbytes=0, attached=0,
+                                        pending=0)
+
+    assert check_plain
+    assert check_shared
+    assert check_once
+    assert check_small
+    assert check_pending
+    assert check_view
+    assert check_changed
+    assert check_kept
+    assert check_late
+    assert check_pool
+    assert check_release
+
+
+def test_trace(main=False):
+    import time
+    from metaparams import trace
+
+    class T(ParamsBase, _pinst='live'):
+        params = dict(hot=1, warm=2, dead=3, written=4)
+
+        def run(self):
+            total = 0
+            for _ in range(100):
+                total += self.p.hot
+
+            return total + self.p_warm
+
+    hotdesc = T.params.__dict__['hot']
+    trace.trace(T)
+    t = T(written=5)
+    t.run()
+    t.p.written = 6
+    t.p._kwargs()  # bulk access, not counted
+    trace.untrace(T)
+    t.run()  # not counted
+
+    counts = trace.counts(T)
+    check_counts = (counts['hot'] == dict(reads=100, writes=1) and
+                    counts['warm']['reads'] == 1 and
+                    counts['written'] == dict(reads=0, writes=2))
+    check_dead = trace.dead(T) == ['dead', 'written']
+    check_hot = trace.hot(T, 1) == [('hot', 100)]
+    check_report = list(trace.report().values())[-1] == dict(
+        dead=['dead', 'written'], hot=[('hot', 100), ('warm', 1)])
+    check_restored = type(T.params.__dict__['hot']).__name__ == (
+        'member_descriptor')
+
+    trace.reset(T)
+    with trace.Sampler(T, window=0.01, period=0.02) as sampler:
+        deadline = time.time() + 0.2
+        while time.time() < deadline:
+            t.run()
+
+    check_sampler = (sampler.windows > 0 and 0 < trace.counts(T)['hot'][
+        'reads'] and trace.dead(T) == ['dead', 'written'] and
+                     T.params.__dict__['hot'] is hotdesc)
+
+    S = T._specialize(warm=5)  # no slots of its own
+    trace.trace(S)
+    s = S()
+    s.run()
+    trace.untrace(S)
+    check_special = (trace.counts(S)['warm']['reads'] == 1 and
+                     'hot' not in S.params.__dict__ and S().run() == 105)
+
+    assert check_counts
+    assert check_dead
+    assert check_hot
+    assert check_report
+    assert check_restored
+    assert check_sampler
+    assert check_special
+
+
+def test_specialize(main=False):
+    class H(ParamsBase, _pinst=True):
+        params = dict(
+            market=dict(value='us', doc='market'),
+            size=dict(value=1, type=int),
+        )
+
+    EU = H._specialize(market='eu')
+    check_cached = EU is H._specialize(market='eu')
+    check_subclass = (issubclass(EU, H) and
+                      issubclass(EU.params, H.params) and
+                      EU.params.__slots__ == ())
+
+    eu = EU(size=3)
+    check_values = (eu.p._kwargs() == dict(market='eu', size=3) and
+                    eu.p_market == 'eu' and H().p.market == 'us')
+    check_defs = (EU.params._defvalue('market') == 'eu' and
+                  EU.params._doc('market') == 'market' and
+                  H.params._defvalue('market') == 'us')
+
+    try:
+        EU(size='x')  # checks are kept
+    except TypeError:
+        check_type = True
+    else:
+        check_type = False
+
+    check_fp = (EU.params._fingerprint() != H.params._fingerprint() and
+                EU.params._fingerprint() == H._specialize(
+                    market='eu').params._fingerprint())
+
+    EU2 = EU._specialize(size=2)
+    check_nested = EU2().p._kwargs() == dict(market='eu', size=2)
+
+    class Sub(EU):
+        params = dict(extra=1)
+
+    check_sub = Sub().p._kwargs() == dict(market='eu', size=1, extra=1)
+
+    try:
+        H._specialize(other=1)
+    except ValueError:
+        check_unknown = True
+    else:
+        check_unknown = False
+
+    try:
+        H._specialize(size='x')  # the overrides are checked too
+    except TypeError:
+        check_override = True
+    else:
+        check_override = False
+
+    try:
+        Sens._specialize(period=20)  # period < slow
+    except ValueError:
+        check_violation = True
+    else:
+        check_violation = False
+
+    # the generated name cannot be imported: pickled/sent as the call
+    import pickle
+    from metaparams import distribute
+
+    D5 = Dist._specialize(x=5)
+    p = pickle.loads(pickle.dumps(D5(scale=2).p))
+    check_pickle = (pickle.loads(pickle.dumps(D5)) is D5 and
+                    type(p) is D5.params and p.x == 5 and p.scale == 20 and
+                    pickle.loads(pickle.dumps(Dist)) is Dist)
+
+    schema, values = distribute.encode(D5().p)
+    distribute._RESOLVED.clear()  # as in a fresh worker
+    check_schema = (distribute.decode(schema, values)._kwargs() == dict(
+        x=5, scale=1) and distribute._resolve(schema) is D5.params)
+
+    assert check_cached
+    assert check_subclass
+    assert check_values
+    assert check_defs
+    assert check_type
+    assert check_fp
+    assert check_nested
+    assert check_sub
+    assert check_unknown
+    assert check_override
+    assert check_violation
+    assert check_pickle
+    assert check_schema
+
+
+def test_convert(main=False):
+    import argparse
+    import datetime
+    import enum
+    import io
+    from metaparams import convert
+
+    class Side(enum.Enum):
+        BUY = 1
+        SELL = -1
+
+    class C(ParamsBase):
+        params = dict(
+            period=dict(value=10, type=int),
+            factor=0.5,  # inferred float
+            flag=dict(value=False, type=bool),
+            side=dict(value=Side.BUY, type=Side),
+            start=dict(value=None, type=datetime.date),
+            mode=dict(value='a', choices=['a', 'b']),
+            name=dict(value='x', transform=str.upper),
+        )
+
+    check_single = (
+        convert.convert(C, 'period', '20') == 20 and
+        convert.convert(C, 'period', '') == 10 and
+        convert.convert(C, 'period', 7) == 7 and
+        convert.convert(C, 'factor', '1.5') == 1.5 and
+        convert.convert(C, 'flag', 'Yes') is True and
+        convert.convert(C, 'side', 'SELL') is Side.SELL and
+        convert.convert(C, 'side', '-1') is Side.SELL and
+        convert.convert(C, 'start', '2018-01-02') == datetime.date(
+            2018, 1, 2) and
+        convert.convert(C, 'name', '') == '')
+
+    parser = argparse.ArgumentParser()
+    C.params._argparse(parser)
+    args = parser.parse_args(['--period', '5', '--flag', 'on',
+                              '--side', 'SELL', '--mode', 'b'])
+    c = C.params._create(args)
+    check_argparse = c.p._kwargs() == dict(
+        period=5, factor=0.5, flag=True, side=Side.SELL, start=None,
+        mode='b', name='x')
+
+    ns = argparse.Namespace(period='8', factor='2', start='2018-03-04')
+    check_parseargs = C.params._parseargs(ns) == dict(
+        period=8, factor=2.0, start=datetime.date(2018, 3, 4))
+
+    f = io.StringIO('period,flag,name,other\n1,1,a,x\n,no,b,y\n3,true,c,z\n')
+    ps = convert.from_csv(C, f)
+    check_csv = [p._kwargs() for p in ps] == [
+        dict(period=p, factor=0.5, flag=b, side=Side.BUY, start=None,
+             mode='a', name=n)
+        for p, b, n in [(1, True, 'A'), (10, False, 'B'), (3, True, 'C')]]
+
+    try:
+        convert.from_csv(C, io.StringIO('period\n1\nx\n'))
+    except ValueError:
+        check_csverr = True
+    else:
+        check_csverr = False
+
+    # blank lines are skipped, a short line is reported (not truncated)
+    f = io.StringIO('period,factor\n1,6.5\n\n2,1.5\n\n')
+    check_blank = [p._kwargs()['factor'] for p in convert.from_csv(C, f)] == [
+        6.5, 1.5]
+    try:
+        convert.from_csv(C, io.StringIO('period,factor\n1,6.5\n2\n'))
+    except ValueError as e:
+        check_short = 'Line 3' in str(e)
+    else:
+        check_short = False
+
+    env = dict(APP_PERIOD='30', APP_MODE='b', OTHER='1')
+    check_env = convert.from_env(C, 'APP_', env) == dict(period=30, mode='b')
+
+    assert check_single
+    assert check_argparse
+    assert check_parseargs
+    assert check_csv
+    assert check_csverr
+    assert check_blank
+    assert check_short
+    assert check_env
+
+
+def test_views(main=False):
+    class V(ParamsBase, _ppool=2):
+        params = dict(
+            a=dict(value=1, doc='a'),
+            b=dict(value='x', transform=str.upper),
+        )
+
+    defs = V.params._defview()
+    check_defview = dict(defs) == dict(a=1, b='x')
+    try:
+        defs['a'] = 2
+    except TypeError:
+        check_defro = True
+    else:
+        check_defro = False
+
+    pdefs = V.params._pdefview()
+    try:
+        pdefs['a']['value'] = 2
+    except TypeError:
+        check_pdefs = pdefs['a']['doc'] == 'a' and V.params._defvalue('a') == 1
+    else:
+        check_pdefs = False
+
+    v = V(a=2, b='y')
+    view = v.p._view()
+    check_view = (dict(view) == dict(a=2, b='Y') and len(view) == 2 and
+                  view.values() == (2, 'Y') and 'c' not in view)
+    v.p.a = 3
+    check_live = view['a'] == 3 and view.items() == (('a', 3), ('b', 'Y'))
+
+    kw = v.p._kwargs()
+    kw['a'] = 10  # a copy: the cache is not modified
+    check_kwcache = v.p._kwargs() == dict(a=3, b='Y')
+    v.p.b = 'z'  # invalidates the cache
+    check_kwwrite = (v.p._kwargs() == dict(a=3, b='z') and
+                     str(v.p) == str(dict(a=3, b='z')))
+
+    V._release(v)  # pool reset to the defaults, also invalidates
+    w = V(b='w')
+    check_kwpool = w is v and w.p._kwargs() == dict(a=1, b='W')
+
+    assert check_defview
+    assert check_defro
+    assert check_pdefs
+    assert check_view
+    assert check_live
+    assert check_kwcache
+    assert check_kwwrite
+    assert check_kwpool
+
+
+def test_record(main=False):
+    from metaparams import record
+
+    class R(ParamsBase):
+        params = dict(
+            period=dict(value=10, type=int),
+            levels=[1, 2],
+            name=dict(value='r', transform=str.upper),
+        )
+
+    r = R(period=20)
+    Rec = record.recordtype(R)
+    rec = record.to_record(r.p)
+    check_nt = (Rec is record.recordtype(R.params) and
+                tuple(rec) == (20, [1, 2], 'r') and
+                Rec() == (10, [1, 2], 'r') and Rec._fields == tuple(R.params))
+
+    DRec = record.recordtype(R, 'dataclass')
+    drec = record.to_record(r.p, 'dataclass')
+    try:
+        drec.period = 1
+    except AttributeError:  # frozen
+        check_dc = drec.period == 20 and DRec().levels == [1, 2]
+    else:
+        check_dc = False
+
+    check_back = (record.from_record(R, rec)._kwargs() == r.p._kwargs() and
+                  record.from_record(R, drec)._kwargs() == r.p._kwargs() and
+                  record.from_record(R, (5, [], 'x'))._kwargs() ==
+                  dict(period=5, levels=[], name='x'))
+
+    check_checked = record.from_record(R, (5, [], 'x'), check=True).name == 'X'
+    try:
+        record.from_record(R, ('5', [], 'x'), check=True)
+    except TypeError:
+        check_checkerr = True
+    else:
+        check_checkerr = False
+
+    ps = [R(period=i).p for i in range(5)]
+    recs = record.to_records(ps)
+    back = record.from_records(R, record.to_records(ps, 'dataclass'))
+    check_bulk = ([rec.period for rec in recs] == list(range(5)) and
+                  [p.period for p in back] == list(range(5)))
+
+    try:
+        record.recordtype(R, 'other')
+    except ValueError:
+        check_kind = True
+    else:
+        check_kind = False
+
+    class U(ParamsBase):
+        params = {'_private': 1, 'class': 2}
+
+    class V(ParamsBase):
+        params = dict(_private=1, public=2)
+
+    def fields(cls, kind):
+        try:
+            return record.recordtype(cls, kind)._fields
+        except ValueError as e:
+            return 'Param' in str(e)
+        except Exception:
+            return False
+
+    check_fields = (fields(U, 'namedtuple') is True and
+                    fields(U, 'dataclass') is True and
+                    fields(V, 'namedtuple') is True and
+                    record.to_record(V().p, 'dataclass')._private == 1)
+
+    assert check_nt
+    assert check_dc
+    assert check_back
+    assert check_checked
+    assert check_checkerr
+    assert check_bulk
+    assert check_kind
+    assert check_fields
+
+
+def test_constraints(main=False):
+    from metaparams.search import Search, grid, narrow, space
+
+    class C(ParamsBase):
+        params = dict(
+            fast=dict(value=10, type=int, range=(1, 30),
+                      constraints=('<', 'slow')),
+            slow=dict(value=20, type=int, range=(5, 20)),
+            mode=dict(value='a', choices=['a', 'b']),
+            width=dict(value=1.0, range=(0.5, 2.0), step=0.5,
+                       constraints=lambda v: v['mode'] == 'a' or
+                       v['width'] <= 1.0),
+        )
+
+    check_init = C(fast=5, slow=6).p._kwargs()['fast'] == 5
+    try:
+        C(fast=20, slow=10)
+    except ValueError:
+        check_initerr = True
+    else:
+        check_initerr = False
+
+    try:
+        C(mode='b', width=2.0)
+    except ValueError:
+        check_callable = True
+    else:
+        check_callable = False
+
+    try:
+        C().p._replace(fast=25)
+    except ValueError:
+        check_replace = True
+    else:
+        check_replace = False
+
+    try:
+        class Bad(ParamsBase):
+            params = dict(a=dict(value=1, constraints=('<', 'b')))
+    except ValueError:
+        check_baddef = True
+    else:
+        check_baddef = False
+
+    dims = {d.name: d for d in narrow(C, space(C))}
+    check_narrow = ((dims['fast'].low, dims['fast'].high) == (1, 19) and
+                    (dims['slow'].low, dims['slow'].high) == (5, 20))
+
+    combos = list(grid(C))
+    brute = [dict(fast=f, slow=s, mode=m, width=w)
+             for f in range(1, 31) for s in range(5, 21) for m in 'ab'
+             for w in (0.5, 1.0, 1.5, 2.0)
+             if f < s and (m == 'a' or w <= 1.0)]
+    check_grid = (sorted(map(sorted, map(dict.items, combos))) ==
+                  sorted(map(sorted, map(dict.items, brute))))
+
+    class F(ParamsBase):  # slow is not searched: its default bounds fast
+        params = dict(
+            fast=dict(value=1, range=(1, 100), constraints=('<', 'slow')),
+            slow=10,
+        )
+
+    check_fixed = [v['fast'] for v in grid(F)] == list(range(1, 10))
+
+    search = Search(C, lambda params, budget: params.fast, seed=3)
+    batch = search.sample(50)
+    check_sample = batch and all(v['fast'] < v['slow'] for v in batch)
+
+    try:
+        narrow(C, space(C, ranges=dict(fast=(25, 30))))
+    except ValueError:
+        check_empty = True
+    else:
+        check_empty = False
+
+    import io
+    from metaparams.convert import from_csv
+    from metaparams.dedup import canonical
+    from metaparams.reloader import Reloader
+
+    def fails(func, *args):
+        try:
+            func(*args)
+        except ValueError:
+            return True
+
+        return False
+
+    check_csv = fails(from_csv, C, io.StringIO('fast,slow\n5,6\n8,7\n'))
+    check_canonical = fails(canonical, C, dict(fast=8, slow=7))
+
+    c = C()
+    reloader = Reloader(lambda: None)
+    reloader.register(c)
+    check_reload = (reloader.apply(dict(fast=25)) == [] and
+                    c.p.fast == 10 and
+                    isinstance(reloader.errors[0][1], ValueError))
+
+    assert check_init
+    assert check_csv
+    assert check_canonical
+    assert check_reload
+    assert check_initerr
+    assert check_callable
+    assert check_replace
+    assert check_baddef
+    assert check_narrow
+    assert check_grid
+    assert check_fixed
+    assert check_sample
+    assert check_empty
+
+
+def test_threads(main=False):
+    import copy
+    import threading
+    from metaparams.metaparams import (PSETTING, CLS, PARAMS, DEFAULTS,
+                                       KWARG_PNAME)
+
+    shared = dict(a=1, b=dict(value=2, doc='b'))  # one declaration for all
+    original = copy.deepcopy(shared)
+
+    class Base(ParamsBase):
+        params = dict(x=dict(value=0, type=int))
+
+    base_defs = copy.deepcopy(PARAMS[Base.params])
+
+    nthreads, nclasses = 32, 20
+    barrier = threading.Barrier(nthreads)
+    created, specials, errors = [], [], []
+
+    def create(t):
+        try:
+            barrier.wait()
+            for i in range(nclasses):
+                class Sub(Base):
+                    params = shared
+
+                class Own(Base, _pinst=True):
+                    params = dict(y=dict(value=(t, i)))
+
+                @metaparams(_pname='q')
+                class Deco:
+                    q = shared
+
+                created.extend([(Sub, dict(x=0, a=1, b=2)),
+                                (Own, dict(x=0, y=(t, i))),
+                                (Deco, dict(a=1, b=2))])
+                specials.append(Base._specialize(x=1))
+        except Exception as e:
+            errors.append(e)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads as often as possible
+    try:
+        threads = [threading.Thread(target=create, args=(t,))
+                   for t in range(nthreads)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    check_errors = not errors
+    check_count = len(created) == nthreads * nclasses * 3
+
+    check_registries = True
+    for host, defaults in created:
+        setting = PSETTING[host]
+        pcls = getattr(host, setting[KWARG_PNAME])
+        if (len(setting) != 5 or CLS[pcls] is not host or
+                DEFAULTS[pcls] != defaults or
+                list(PARAMS[pcls]) != list(defaults) or
+                host().__dict__[setting[KWARG_PNAME]]._kwargs() != defaults):
+            check_registries = False
+
+    check_unchanged = (shared == original and
+                       PARAMS[Base.params] == base_defs and
+                       None not in PSETTING)
+    check_special = len(set(specials)) == 1
+
+    assert check_errors
+    assert check_count
+    assert check_registries
+    assert check_unchanged
+    assert check_special
+
+
+class Sizer(ParamsBase):
+    params = dict(
+        stake=dict(value=1, type=int),
+        mode=dict(value='fixed', choices=['fixed', 'percent']),
+    )
+
+
+class Feed(ParamsBase):
+    params = dict(name='feed', sizer=Sizer.params)  # nested in nested
+
+
+class Strategy(ParamsBase):
+    params = dict(
+        period=10,
+        sizer=Sizer.params,
+        feed=Feed.params,
+    )
+
+
+def test_nested(main=False):
+    import argparse
+    import pickle
+
+    a, b = Strategy(), Strategy()
+    check_lazy = (type(a.p.__class__.__dict__['sizer'].slot.__get__(a.p))
+                  is type(Sizer.params))  # not yet created: the class
+    check_shared = (a.p.sizer is b.p.sizer and a.p.sizer.stake == 1 and
+                    a.p.feed.sizer is a.p.sizer)
+
+    c = Strategy(**{'sizer.stake': 5, 'feed.sizer.mode': 'percent'})
+    check_dotted = (c.p.sizer.stake == 5 and c.p['sizer.stake'] == 5 and
+                    c.p['feed.sizer.mode'] == 'percent' and
+                    c.p.feed.name == 'feed' and c.p.sizer is not a.p.sizer)
+    d = Strategy(sizer=dict(stake=3), **{'sizer.mode': 'percent'})
+    check_dict = (d.p.sizer.stake, d.p.sizer.mode) == (3, 'percent')
+
+    try:
+        a.p.sizer.stake = 2  # shared: read-only
+    except AttributeError:
+        check_readonly = True
+    else:
+        check_readonly = False
+
+    a.p['sizer.stake'] = 2  # copy on write
+    check_cow = (a.p.sizer.stake == 2 and b.p.sizer.stake == 1 and
+                 a.p.feed.sizer.stake == 1)
+
+    e = c.p._replace(period=20)
+    f = c.p._replace(**{'feed.sizer.stake': 9})
+    check_replace = (e.sizer is c.p.sizer and e.feed is c.p.feed and
+                     f.feed.sizer.stake == 9 and c.p.feed.sizer.stake == 1 and
+                     f.sizer is c.p.sizer)
+
+    g = Strategy(**{'sizer.stake': 'x'})  # checked on access
+    try:
+        g.p.sizer
+    except TypeError:
+        check_deferred = True
+    else:
+        check_deferred = False
+
+    try:
+        Strategy(**{'sizer.other': 1})
+    except ValueError:
+        check_unknown = True
+    else:
+        check_unknown = False
+
+    parser = argparse.ArgumentParser()
+    Strategy.params._argparse(parser)
+    args = parser.parse_args(['--sizer.stake', '4', '--feed.name', 'f2'])
+    kwargs = Strategy.params._parseargs(args)
+    h = Strategy(**kwargs)
+    check_argparse = (kwargs == {'sizer.stake': 4, 'feed.name': 'f2'} and
+                      h.p.sizer.stake == 4 and h.p.feed.name == 'f2' and
+                      h.p.feed.sizer is a.p.feed.sizer)
+
+    p2 = pickle.loads(pickle.dumps(c.p))
+    check_pickle = (p2.sizer.stake == 5 and
+                    p2.feed.sizer.mode == 'percent' and
+                    p2._digest() == c.p._digest())
+
+    assert check_lazy
+    assert check_shared
+    assert check_dotted
+    assert check_dict
+    assert check_readonly
+    assert check_cow
+    assert check_replace
+    assert check_deferred
+    assert check_unknown
+    assert check_argparse
+    assert check_pickle
+
+
+class Sens(ParamsBase):
+    params = dict(
+        period=dict(value=10, type=int, step=5, range=(5, 30),
+                    constraints=('<', 'slow')),
+        slow=dict(value=15, type=int),
+        factor=dict(value=2.0, type=float),
+        mode=dict(value='a', choices=['a', 'b', 'c']),
+        alpha=dict(value=0.5, type=float, step=0.25,
+                   irrelevant=dict(mode=['a', 'b'])),
+        fast=True,
+        name='x',
+    )
+
+
+def _sens_objective(params):
+    return params.period * params.factor + (params.mode == 'b')
+
+
+def test_acreate(main=False):
+    import asyncio
+    from metaparams import aio
+
+    running = []
+    peak = []
+
+    async def resolve(value):
+        running.append(value)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(value)
+        return value.upper()
+
+    async def fail(value):
+        raise KeyError(value)
+
+    class A(ParamsBase):
+        params = dict(
+            symbol=dict(value='', transform=resolve),
+            market=dict(value='', transform=resolve),
+            stake=dict(value=1, type=int, transform=lambda x: x * 2),
+            name=dict(value=None, required=True),
+            bad=dict(value='', transform=fail),
+        )
+
+        def __init__(self, other=None):
+            self.other = other
+
+    a = asyncio.run(A._acreate(symbol='abc', market='x', stake=2, name='n',
+                               other=5))
+    check_values = (a.p.symbol, a.p.market, a.p.stake) == ('ABC', 'X', 4)
+    check_other = a.other == 5
+
+    kwargs = [dict(symbol=str(i), name=i) for i in range(6)]
+    hosts = asyncio.run(aio.acreate_all(A, kwargs, limit=2))
+    check_all = [h.p.name for h in hosts] == list(range(6))
+    check_limit = max(peak) == 2
+
+    def run(**kwargs):
+        try:
+            asyncio.run(A._acreate(**kwargs))
+        except Exception as e:
+            return type(e)
+
+    check_required = run(symbol='a') is ValueError
+    check_type = run(name=1, stake='1') is TypeError
+    check_transform = run(name=1, bad='x') is ValueError
+
+    import gc
+    import warnings
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')  # no coroutine left unawaited
+        try:
+            A(symbol='abc', name=1)  # synchronous creation
+        except TypeError:
+            check_sync = True
+        else:
+            check_sync = False
+
+    # a plain transform returned an awaitable and a later check fails
+    class B(ParamsBase):
+        params = dict(
+            symbol=dict(value='', transform=lambda v: resolve(v)),
+            stake=dict(value=1, type=int),
+        )
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        failed = False
+        try:
+            asyncio.run(B._acreate(symbol='abc', stake='1'))
+        except TypeError:
+            failed = True
+
+        gc.collect()
+
+    check_discard = failed and not [
+        w for w in caught if issubclass(w.category, RuntimeWarning)]
+
+    assert check_values
+    assert check_other
+    assert check_all
+    assert check_limit
+    assert check_required
+    assert check_type
+    assert check_transform
+    assert check_sync
+    assert check_discard
+
+
+def test_memo_transform(main=False):
+    from metaparams.memo import transformstats
+
+    calls = []
+
+    def parse(value):
+        calls.append(value)
+        return tuple(value) if isinstance(value, list) else value.upper()
+
+    class A(ParamsBase):
+        params = dict(
+            p1=dict(value='', transform=parse, memoize=True),
+            p2=dict(value='', transform=parse, memoize=2),
+        )
+
+    class B(A):  # inherits the definitions: caches are shared
+        params = dict(p1='x')
+
+    class C(A):
+        params = dict(p1=dict(memoize=False))
+
+    vals = [A(p1='a').p.p1, A(p1='a').p.p1, B(p1='a').p.p1,
+            A._specialize(p1='z')(p1='a').p.p1]
+    check_values = vals == ['A'] * 4 and calls == ['a']
+    stats = transformstats(B)['p1']
+    check_shared = stats['hits'] == 3 and stats == transformstats(A)['p1']
+
+    for v in ['a', 'b', 'c', 'a']:
+        A(p2=v)
+
+    check_lru = transformstats(A)['p2']['size'] == 2 and calls.count('a') == 3
+    check_unhashable = (A(p1=['a']).p.p1 == ('a',) and
+                        transformstats(A)['p1']['unhashable'] == 1)
+
+    del calls[:]
+    C(p1='a'), C(p1='a')
+    check_off = calls == ['a', 'a'] and 'p1' not in transformstats(C)
+    check_fp = C.params._fingerprint() != A.params._fingerprint()
+
+    class S(ParamsBase):
+        params = dict(syms=dict(value=(), memoize=True,
+                                transform=lambda s: sorted(s.split(','))))
+
+    a, b = S(syms='Y,X'), S(syms='Y,X')
+    a.p.syms.append('Z')
+    check_copied = (b.p.syms == ['X', 'Y'] and S(syms='Y,X').p.syms ==
+                    ['X', 'Y'] and transformstats(S)['syms']['hits'] == 2)
+
+    assert check_values
+    assert check_shared
+    assert check_lru
+    assert check_unhashable
+    assert check_off
+    assert check_fp
+    assert check_copied
+
+
+def test_sensitivity(main=False):
+    from metaparams.sensitivity import Sensitivity, perturbations
+
+    pcls = Sens.params
+    wide = perturbations(pcls, 'period', 10, radius=2)
+    check_perturb = (perturbations(pcls, 'period', 10) == [5, 15] and
+                     perturbations(pcls, 'period', 5) == [10] and  # range
+                     wide == [5, 15, 20] and
+                     perturbations(pcls, 'factor', 2.0) == [1.8, 2.2] and
+                     perturbations(pcls, 'mode', 'a') == ['b', 'c'] and
+                     perturbations(pcls, 'fast', True) == [False] and
+                     perturbations(pcls, 'name', 'x') == [])
+
+    sens = Sensitivity(Sens, _sens_objective, base=Sens(period=10).p,
+                       workers=2)
+    rows = list(sens.run())
+    check_base = sens.base_score == 20.0
+    check_invalid = [(n, v) for n, v, _ in sens.invalid] == [('period', 15)]
+    # alpha is irrelevant with mode "a": both values reuse the base
+    check_reused = (sens.reused == 2 and
+                    [r.delta for r in sens.table['alpha']] == [0.0, 0.0])
+    check_rows = (len(rows) == 10 and
+                  {(r.name, r.value, r.delta) for r in sens.table['mode']} ==
+                  {('mode', 'b', 1.0), ('mode', 'c', 0.0)})
+    spread = sens.spread()
+    check_spread = (list(spread)[0] == 'period' and spread['period'] == 10.0
+                    and sens.evaluations == 9)
+
+    # the objective raises for the base and for a perturbed value
+    import concurrent.futures
+
+    def fails(params):
+        key = (params.period, params.slow, params.factor, params.fast)
+        if key == (10, 15, 2.0, True) and params.mode != 'b':  # base, 'c'
+            raise RuntimeError(params.mode)
+
+        return params.factor
+
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        sens = Sensitivity(Sens, fails, base=Sens(period=10).p,
+                           executor=executor)
+        rows = list(sens.run())
+
+    check_raised = (isinstance(sens.base_score, RuntimeError) and
+                    len(rows) == 10 and
+                    all(r.delta is None for r in rows) and
+                    sum(isinstance(r.score, RuntimeError) for r in rows) == 3
+                    and sens.spread()['factor'] > 0)
+
+    assert check_perturb
+    assert check_base
+    assert check_invalid
+    assert check_reused
+    assert check_rows
+    assert check_spread
+    assert check_raised
+
+
 if __name__ == '__main__':
     test_run(main=True)
+    test_reloader(main=True)
+    test_snapshot(main=True)
+    test_fingerprint(main=True)
+    test_decorator_inplace(main=True)
+    test_pool(main=True)
+    test_pinst_live(main=True)
+    test_memoize(main=True)
+    test_stage(main=True)
+    test_store(main=True)
+    test_search(main=True)
+    test_distribute(main=True)
+    test_dedup(main=True)
+    test_lazy(main=True)
+    test_shm(main=True)
+    test_trace(main=True)
+    test_specialize(main=True)
+    test_convert(main=True)
+    test_views(main=True)
+    test_record(main=True)
+    test_constraints(main=True)
+    test_threads(main=True)
+    test_nested(main=True)
+    test_sensitivity(main=True)
+    test_acreate(main=True)
+    test_memo_transform(main=True)